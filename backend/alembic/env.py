@@ -27,6 +27,9 @@ if config.config_file_name is not None:
 from app.db.models.report import Report, ReportStatus, ReportAddress, ReportPhoto
 from app.db.models.user import User
 from app.db.models.vote import Vote
+from app.db.models.job import AssessmentJob
+from app.db.models.vision import VisionAssessment, VisionCacheStats
+from app.db.models.geocode import GeocodeCache
 from app.db.base import Base
 
 target_metadata = Base.metadata
@@ -0,0 +1,64 @@
+"""UserAddress coordinates and geocoding cache for local notifications
+
+Revision ID: 0ecad734cf75
+Revises: 26fc89a8cf29
+Create Date: 2025-05-26 15:08:52.640183
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0ecad734cf75"
+down_revision: Union[str, None] = "26fc89a8cf29"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "geocodecache",
+        sa.Column("query", sa.String(), nullable=False),
+        sa.Column("latitude", sa.Numeric(precision=8, scale=6), nullable=True),
+        sa.Column("longitude", sa.Numeric(precision=9, scale=6), nullable=True),
+        sa.Column(
+            "created_datetime",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("query"),
+    )
+    # Existing addresses are geocoded by app.tasks.geocode_addresses
+    op.add_column(
+        "useraddresses",
+        sa.Column("latitude", sa.Numeric(precision=8, scale=6), nullable=True),
+    )
+    op.add_column(
+        "useraddresses",
+        sa.Column("longitude", sa.Numeric(precision=9, scale=6), nullable=True),
+    )
+    op.add_column(
+        "useraddresses", sa.Column("geohash", sa.String(length=12), nullable=True)
+    )
+    op.create_index(
+        "ix_useraddresses_geohash",
+        "useraddresses",
+        ["geohash"],
+        unique=False,
+        postgresql_ops={"geohash": "text_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_useraddresses_geohash", table_name="useraddresses")
+    op.drop_column("useraddresses", "geohash")
+    op.drop_column("useraddresses", "longitude")
+    op.drop_column("useraddresses", "latitude")
+    op.drop_table("geocodecache")
@@ -0,0 +1,38 @@
+"""Index photo paths for content-addressed storage reference counts
+
+Revision ID: 1c8d0318a1a6
+Revises: f1b9e3a6d274
+Create Date: 2025-05-25 10:12:08.904117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "1c8d0318a1a6"
+down_revision: Union[str, None] = "f1b9e3a6d274"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Files are moved to the new layout by app.tasks.migrate_photo_storage
+    op.create_index(
+        op.f("ix_reportphotos_filename_path"),
+        "reportphotos",
+        ["filename_path"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_users_picture_path"), "users", ["picture_path"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_users_picture_path"), table_name="users")
+    op.drop_index(op.f("ix_reportphotos_filename_path"), table_name="reportphotos")
@@ -0,0 +1,29 @@
+"""Index votes by report for vote counter reconciliation
+
+Revision ID: 26fc89a8cf29
+Revises: 1c8d0318a1a6
+Create Date: 2025-05-26 09:41:27.318562
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "26fc89a8cf29"
+down_revision: Union[str, None] = "1c8d0318a1a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # unique_user_vote starts with user_id, it does not help lookups by report
+    op.create_index(op.f("ix_votes_report_id"), "votes", ["report_id"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_votes_report_id"), table_name="votes")
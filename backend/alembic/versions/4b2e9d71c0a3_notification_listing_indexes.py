@@ -0,0 +1,42 @@
+"""Notification listing and unread count indexes
+
+Revision ID: 4b2e9d71c0a3
+Revises: 7563fd053f18
+Create Date: 2025-05-28 10:12:05.331847
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b2e9d71c0a3"
+down_revision: Union[str, None] = "7563fd053f18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_notifications_user_sent",
+        "notifications",
+        ["user_id", "sent_datetime", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notifications_user_unread",
+        "notifications",
+        ["user_id"],
+        unique=False,
+        postgresql_where=sa.text("read_datetime IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_notifications_user_unread", table_name="notifications")
+    op.drop_index("ix_notifications_user_sent", table_name="notifications")
@@ -0,0 +1,42 @@
+"""Weekly digest run progress
+
+Revision ID: 7563fd053f18
+Revises: 0ecad734cf75
+Create Date: 2025-05-27 11:26:40.517309
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7563fd053f18"
+down_revision: Union[str, None] = "0ecad734cf75"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "digestruns",
+        sa.Column("period_start", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_user_id", sa.Integer(), nullable=False),
+        sa.Column("digests", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_datetime",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("finished_datetime", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("period_start"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("digestruns")
@@ -0,0 +1,143 @@
+"""Notifications partitioned by month of sent_datetime
+
+Revision ID: 9f3c6a2e5b17
+Revises: 4b2e9d71c0a3
+Create Date: 2025-05-29 09:41:17.602154
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.partitions import (
+    NOTIFICATION_DEFAULT_PARTITION,
+    addMonths,
+    monthStart,
+    notificationPartitionName,
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9f3c6a2e5b17"
+down_revision: Union[str, None] = "4b2e9d71c0a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3  # the rest is created by app.tasks.notification_retention
+COLUMNS = "id, user_id, report_id, title, note, sent_datetime, read_datetime"
+
+
+def notificationColumns(sent_datetime_nullable: bool) -> list:
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('notifications_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("report_id", sa.Integer(), nullable=True),
+        sa.Column("title", sa.String(), nullable=True),
+        sa.Column("note", sa.String(), nullable=True),
+        sa.Column(
+            "sent_datetime",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=sent_datetime_nullable,
+        ),
+        sa.Column("read_datetime", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["report_id"], ["reports.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+    ]
+
+
+def dropNotificationIndexes(table_name: str) -> None:
+    op.drop_index("ix_notifications_user_unread", table_name=table_name)
+    op.drop_index("ix_notifications_user_sent", table_name=table_name)
+    op.drop_index("ix_notifications_id", table_name=table_name)
+
+
+def createNotificationIndexes() -> None:
+    op.create_index("ix_notifications_id", "notifications", ["id"], unique=False)
+    op.create_index(
+        "ix_notifications_user_sent",
+        "notifications",
+        ["user_id", "sent_datetime", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_notifications_user_unread",
+        "notifications",
+        ["user_id"],
+        unique=False,
+        postgresql_where=sa.text("read_datetime IS NULL"),
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A table cannot be turned into a partitioned one, the rows are copied over
+    op.rename_table("notifications", "notifications_old")
+    op.execute("ALTER INDEX notifications_pkey RENAME TO notifications_old_pkey")
+    dropNotificationIndexes("notifications_old")
+
+    op.create_table(
+        "notifications",
+        *notificationColumns(sent_datetime_nullable=False),
+        sa.PrimaryKeyConstraint("id", "sent_datetime"),
+        postgresql_partition_by="RANGE (sent_datetime)",
+    )
+    op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id")
+    createNotificationIndexes()
+
+    bind = op.get_bind()
+    now = datetime.now(timezone.utc)
+    oldest = bind.scalar(sa.text("SELECT min(sent_datetime) FROM notifications_old"))
+    month = monthStart(oldest or now)
+    last = addMonths(monthStart(now), MONTHS_AHEAD)
+    while month <= last:
+        end = addMonths(month, 1)
+        op.execute(
+            f"CREATE TABLE {notificationPartitionName(month)} "
+            "PARTITION OF notifications "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+    op.execute(
+        f"CREATE TABLE {NOTIFICATION_DEFAULT_PARTITION} "
+        "PARTITION OF notifications DEFAULT"
+    )
+
+    op.execute(
+        f"INSERT INTO notifications ({COLUMNS}) "
+        "SELECT id, user_id, report_id, title, note, "
+        "COALESCE(sent_datetime, now()), read_datetime FROM notifications_old"
+    )
+    op.drop_table("notifications_old")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table("notifications", "notifications_partitioned")
+    op.execute(
+        "ALTER INDEX notifications_pkey RENAME TO notifications_partitioned_pkey"
+    )
+    dropNotificationIndexes("notifications_partitioned")
+
+    op.create_table(
+        "notifications",
+        *notificationColumns(sent_datetime_nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id")
+    createNotificationIndexes()
+
+    op.execute(
+        f"INSERT INTO notifications ({COLUMNS}) "
+        f"SELECT {COLUMNS} FROM notifications_partitioned"
+    )
+    # the monthly and default partitions go with it
+    op.drop_table("notifications_partitioned")
@@ -0,0 +1,41 @@
+"""Vision cache hit/miss counters shared by the assessment workers
+
+Revision ID: a7d41e8c2f90
+Revises: 9f3c6a2e5b17
+Create Date: 2025-05-30 10:05:12.884015
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7d41e8c2f90"
+down_revision: Union[str, None] = "9f3c6a2e5b17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "visioncachestats",
+        sa.Column("backend", sa.String(length=16), nullable=False),
+        sa.Column("hits", sa.BigInteger(), nullable=False),
+        sa.Column("misses", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_datetime",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("backend"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("visioncachestats")
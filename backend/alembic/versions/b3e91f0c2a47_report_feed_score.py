@@ -0,0 +1,53 @@
+"""Denormalized report feed_score with feed index
+
+Revision ID: b3e91f0c2a47
+Revises: 7d1ee8a50ef3
+Create Date: 2025-05-20 18:02:11.418220
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b3e91f0c2a47"
+down_revision: Union[str, None] = "7d1ee8a50ef3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "reports",
+        sa.Column("feed_score", sa.Integer(), nullable=False, server_default="0"),
+    )
+    # Backfill from the photos that were already assessed
+    op.execute(
+        """
+        UPDATE reports
+        SET feed_score = scores.score
+        FROM (
+            SELECT report_id, SUM(ai_score) AS score
+            FROM reportphotos
+            WHERE ai_score IS NOT NULL
+            GROUP BY report_id
+        ) AS scores
+        WHERE scores.report_id = reports.id
+        """
+    )
+    op.create_index(
+        "ix_reports_feed",
+        "reports",
+        ["status", sa.text("feed_score DESC"), "published_datetime", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reports_feed", table_name="reports")
+    op.drop_column("reports", "feed_score")
@@ -0,0 +1,48 @@
+"""Report feed indexes ordered by the feed keys alone
+
+Revision ID: c2e8f5a19d46
+Revises: a7d41e8c2f90
+Create Date: 2025-05-30 11:20:47.119304
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2e8f5a19d46"
+down_revision: Union[str, None] = "a7d41e8c2f90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FEED_COLUMNS = [sa.text("feed_score DESC"), "published_datetime", "id"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Leading with status, neither the public feed (status IN (...)) nor the
+    # admin feed (any status) could stop scanning after LIMIT rows
+    op.drop_index("ix_reports_feed", table_name="reports")
+    op.create_index(
+        "ix_reports_feed_public",
+        "reports",
+        FEED_COLUMNS,
+        unique=False,
+        postgresql_where=sa.text("status IN ('published', 'in_progress')"),
+    )
+    op.create_index("ix_reports_feed", "reports", FEED_COLUMNS, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reports_feed", table_name="reports")
+    op.drop_index("ix_reports_feed_public", table_name="reports")
+    op.create_index(
+        "ix_reports_feed",
+        "reports",
+        ["status", sa.text("feed_score DESC"), "published_datetime", "id"],
+        unique=False,
+    )
@@ -0,0 +1,69 @@
+"""ReportAddress geohash for location filtered feed
+
+Revision ID: c6d2a8e41f95
+Revises: b3e91f0c2a47
+Create Date: 2025-05-21 17:44:36.902114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.geo import encodeGeohash
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c6d2a8e41f95"
+down_revision: Union[str, None] = "b3e91f0c2a47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "reportaddresses", sa.Column("geohash", sa.String(length=12), nullable=True)
+    )
+
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, latitude, longitude FROM reportaddresses "
+                "WHERE id > :last_id AND latitude IS NOT NULL "
+                "AND longitude IS NOT NULL ORDER BY id LIMIT :batch"
+            ),
+            {"last_id": last_id, "batch": BACKFILL_BATCH},
+        ).fetchall()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("UPDATE reportaddresses SET geohash = :geohash WHERE id = :id"),
+            [
+                {
+                    "id": row.id,
+                    "geohash": encodeGeohash(float(row.latitude), float(row.longitude)),
+                }
+                for row in rows
+            ],
+        )
+        last_id = rows[-1].id
+
+    op.create_index(
+        "ix_reportaddresses_geohash",
+        "reportaddresses",
+        ["geohash"],
+        unique=False,
+        postgresql_ops={"geohash": "text_pattern_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_reportaddresses_geohash", table_name="reportaddresses")
+    op.drop_column("reportaddresses", "geohash")
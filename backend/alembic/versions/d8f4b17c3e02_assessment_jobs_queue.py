@@ -0,0 +1,76 @@
+"""Assessment jobs queue
+
+Revision ID: d8f4b17c3e02
+Revises: c6d2a8e41f95
+Create Date: 2025-05-22 19:12:48.530117
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d8f4b17c3e02"
+down_revision: Union[str, None] = "c6d2a8e41f95"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "assessmentjobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("report_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("pending", "running", "done", "failed", name="jobstatus"),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "run_after",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column(
+            "created_datetime",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.Column("finished_datetime", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["report_id"], ["reports.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_assessmentjobs_id"), "assessmentjobs", ["id"], unique=False
+    )
+    op.create_index(
+        "ix_assessmentjobs_claim",
+        "assessmentjobs",
+        ["status", "run_after"],
+        unique=False,
+    )
+    # Queue the reports whose photos were never scored
+    op.execute(
+        """
+        INSERT INTO assessmentjobs (report_id, status, attempts)
+        SELECT DISTINCT report_id, 'pending', 0
+        FROM reportphotos
+        WHERE ai_score IS NULL AND report_id IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_assessmentjobs_claim", table_name="assessmentjobs")
+    op.drop_index(op.f("ix_assessmentjobs_id"), table_name="assessmentjobs")
+    op.drop_table("assessmentjobs")
+    sa.Enum(name="jobstatus").drop(op.get_bind(), checkfirst=True)
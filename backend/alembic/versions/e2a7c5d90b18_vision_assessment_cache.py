@@ -0,0 +1,51 @@
+"""Vision assessment cache keyed by image hash
+
+Revision ID: e2a7c5d90b18
+Revises: d8f4b17c3e02
+Create Date: 2025-05-23 16:27:05.114362
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a7c5d90b18"
+down_revision: Union[str, None] = "d8f4b17c3e02"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "visionassessments",
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("labels", sa.JSON(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("is_inappropriate", sa.Boolean(), nullable=False),
+        sa.Column(
+            "created_datetime",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("sha256"),
+    )
+    op.create_index(
+        op.f("ix_visionassessments_created_datetime"),
+        "visionassessments",
+        ["created_datetime"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        op.f("ix_visionassessments_created_datetime"), table_name="visionassessments"
+    )
+    op.drop_table("visionassessments")
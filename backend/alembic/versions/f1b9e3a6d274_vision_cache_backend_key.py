@@ -0,0 +1,43 @@
+"""Key vision assessment cache by classifier backend
+
+Revision ID: f1b9e3a6d274
+Revises: e2a7c5d90b18
+Create Date: 2025-05-24 13:50:41.287390
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1b9e3a6d274"
+down_revision: Union[str, None] = "e2a7c5d90b18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Everything cached so far came from Google Vision
+    op.add_column(
+        "visionassessments",
+        sa.Column(
+            "backend", sa.String(length=16), nullable=False, server_default="google"
+        ),
+    )
+    op.alter_column("visionassessments", "backend", server_default=None)
+    op.drop_constraint("visionassessments_pkey", "visionassessments", type_="primary")
+    op.create_primary_key(
+        "visionassessments_pkey", "visionassessments", ["sha256", "backend"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM visionassessments WHERE backend != 'google'")
+    op.drop_constraint("visionassessments_pkey", "visionassessments", type_="primary")
+    op.create_primary_key("visionassessments_pkey", "visionassessments", ["sha256"])
+    op.drop_column("visionassessments", "backend")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -9,6 +9,7 @@ from app.db.crud.address_crud import getAddress, createAddress, updateAddress
 
 from app.db.models.user import User
 from app.dependencies.auth import getUser
+from app.tasks.background_geocode_address import geocodeUserAddress
 
 router = APIRouter()
 
@@ -42,11 +43,14 @@ async def getAddressMeRoute(
 )
 async def updateAddressRoute(
     address_update: UserAddressUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
 ):
     try:
         address = await updateAddress(db, user.id, address_update)
+        if address.latitude is None:
+            background_tasks.add_task(geocodeUserAddress, user_id=user.id, db=db)
         return address
     except AssertionError as e:
         if "Address not found" in e.args[0]:
@@ -90,6 +94,7 @@ async def getAddressRoute(
 async def updateAddressRoute(
     user_id: int,
     address_update: UserAddressUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
 ):
@@ -97,6 +102,8 @@ async def updateAddressRoute(
         if not user.is_admin:
             assert user.id == user_id, "Permission denied"
         address = await updateAddress(db, user_id, address_update)
+        if address.latitude is None:
+            background_tasks.add_task(geocodeUserAddress, user_id=user_id, db=db)
         return address
     except AssertionError as e:
         if "Address not found" in e.args[0]:
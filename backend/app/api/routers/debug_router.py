@@ -8,6 +8,8 @@ from functools import lru_cache
 from app.core import config
 
 from app.dependencies.common import getSettings
+from app.db.base import getSession
+from app.db.crud.vision_crud import getVisionCacheStats
 
 router = APIRouter()
 
@@ -16,3 +18,17 @@ router = APIRouter()
 async def getSettingsRoute():
     settings = getSettings()
     return settings.model_dump()
+
+
+@router.get("/vision-cache", summary="Get Vision assessment cache hit/miss counters")
+async def getVisionCacheStatsRoute(db: AsyncSession = Depends(getSession)):
+    # Counters of every assessment worker, per classifier backend
+    stats = {}
+    for row in await getVisionCacheStats(db):
+        total = row.hits + row.misses
+        stats[row.backend] = {
+            "hits": row.hits,
+            "misses": row.misses,
+            "hit_ratio": row.hits / total if total else 0.0,
+        }
+    return stats
@@ -7,12 +7,16 @@ from app.db.models.user import User
 from app.db.schemas.notification_schema import (
     Notification as NotificationSchema,  # Name conflict with SQLAlchemy model
     NotificationCreate,
+    NotificationIds,
+    NotificationSelection,
 )
 from app.db.crud.notifications_crud import (
     createNotification,
     getNotification,
     markNotificationAsRead,
     deleteNotification,
+    markNotificationsAsRead,
+    deleteNotifications,
 )
 from app.dependencies.auth import getUser, getAdmin
 
@@ -40,6 +44,44 @@ async def createNotificationRoute(
     )
 
 
+@router.post(
+    "/read",
+    summary="Mark many Notifications as read",
+    response_model=NotificationIds,
+)
+async def markNotificationsAsReadRoute(
+    selection: NotificationSelection,
+    user: User = Depends(getUser),
+    db: AsyncSession = Depends(getSession),
+):
+    try:
+        ids = await markNotificationsAsRead(
+            db, user.id, ids=selection.ids, before=selection.before
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return NotificationIds(ids=ids)
+
+
+@router.post(
+    "/delete",
+    summary="Delete many Notifications",
+    response_model=NotificationIds,
+)
+async def deleteNotificationsRoute(
+    selection: NotificationSelection,
+    user: User = Depends(getUser),
+    db: AsyncSession = Depends(getSession),
+):
+    try:
+        ids = await deleteNotifications(
+            db, user.id, ids=selection.ids, before=selection.before
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return NotificationIds(ids=ids)
+
+
 @router.get(
     "/{notification_id}",
     summary="Retrieve Notification",
@@ -1,11 +1,12 @@
-from app.utils.vision import get_photo_label_and_score
 from fastapi import (
     APIRouter,
     Depends,
     Form,
     File,
+    Query,
     UploadFile,
     HTTPException,
+    Request,
     Response,
     BackgroundTasks,
 )
@@ -24,6 +25,7 @@ from app.db.schemas.report_schema import (
     ReportReadFull,
     ReportUpdate,
     FeedReports,
+    ReportClusters,
 )
 from app.db.crud.report_crud import (
     createReport,
@@ -34,23 +36,38 @@ from app.db.crud.report_crud import (
     deleteReport,
     getReportPhoto,
     getFeedReports,
+    getReportClusters,
 )
+from app.db.crud.job_crud import enqueueAssessment
 from app.dependencies.auth import getUser
-from app.dependencies.common import getSettings
+from app.utils.geo import countGeohashesInBBox, geohashesInBBox
+from app.utils.uploads import UploadTooLarge
+from app.utils.blob_storage import BlobStorage, getReportStorage
+from app.utils.photo_store import releasePhoto, storePhoto
+from app.utils.renditions import renditionFilename
+from app.utils.http_cache import blobResponse
+from app.utils.photo_urls import verifyPhotoSignature
+from app.utils.map_clusters import (
+    MAX_ZOOM,
+    MIN_ZOOM,
+    cache as clusterCache,
+    zoomPrecision,
+)
 
 from app.websockets.update_report import manager as updateReportManager
-from app.tasks.background_assess_report import assessReport
 from app.tasks.background_notify_report import notifyReport
 
-import os
 import json
-import uuid
+import time
+import asyncio
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Literal, Optional
 
 
 router = APIRouter()
 
+MAX_CLUSTER_CELLS = 256  # per viewport
+
 
 @router.post("/create", response_model=ReportReadFull, summary="Create Report")
 async def createReportRoute(
@@ -61,6 +78,7 @@ async def createReportRoute(
     photos: Annotated[list[UploadFile], File()],
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
+    storage: BlobStorage = Depends(getReportStorage),
 ) -> Report:
     try:  # Creating report + address + photos must be atomic, nocommit=True is obligatory
         # because the data is sent in mutlipart (not application/json)
@@ -76,58 +94,39 @@ async def createReportRoute(
         created_address = await createReportAddress(
             db, reportcreate.address, created_report.id, nocommit=True
         )
-        settings = getSettings()
-        inappropriate_found = False
-
-        for photo in photos:
-            file_extension = Path(photo.filename).suffix
-            # TODO: CHECK THE EXTENSIONS (PHOTOS ONLY)
-
-            file_path = f"{uuid.uuid4()}{file_extension}"
-            # file_path = settings.REPORT_PHOTOS / filename
-            # The problem occured here. When you run locally (in dev env),
-            # It stores absolute path in the database, but this absolute path
-            # Is not the same for the isolated env (e.g. docker), and it cannot
-            # Locate the files anymore. so we save only name of the file
-            # And re-build absolute path (env-wise) when writings/retrieving photos
-
-            with (settings.REPORT_PHOTOS / file_path).open("wb") as f:
-                f.write(await photo.read())
-
-            labels, score, is_inappropriate = await get_photo_label_and_score(
-                str(settings.REPORT_PHOTOS / file_path)
-            )
-            print(
-                f"Labels: {labels}\nScore: {score}\nIs inappropriate: {is_inappropriate}"
-            )
+        # TODO: CHECK THE EXTENSIONS (PHOTOS ONLY)
 
-            if is_inappropriate:
-                inappropriate_found = True
+        # The problem occured here. When you run locally (in dev env),
+        # It stores absolute path in the database, but this absolute path
+        # Is not the same for the isolated env (e.g. docker), and it cannot
+        # Locate the files anymore. so we save only the name relative to the
+        # storage (the content address, see app/utils/photo_store.py)
+        # And re-build the location (env-wise) when writings/retrieving photos
 
+        # thumbnail/medium sizes for the feed are resized in the process pool,
+        # the photos are processed concurrently
+        stored_photos = await asyncio.gather(
+            *(storePhoto(photo, storage, renditions=True) for photo in photos)
+        )
+        for stored in stored_photos:
             await createReportPhoto(
                 db,
                 ReportPhotoCreate(
                     report_id=created_report.id,
-                    filename_path=str(file_path),
-                    # ai_score=score,
-                    # ai_labels=labels,
+                    filename_path=stored.name,
                 ),
                 nocommit=True,
             )
 
-        # If any photo was inappropriate, update the report status and admin note
-        if inappropriate_found:
-            created_report.status = ReportStatus.cancelled
-            created_report.admin_note = "Jeden z vložených obrázkov bol automaticky ohodnotený ako nevhodný. Čaká sa na kontrolu správcom."
-            await db.flush()
+        # Photos are scored (and inappropriate ones cancel the report)
+        # by app.tasks.assessment_worker, the job is committed with the report
+        await enqueueAssessment(db, created_report.id, nocommit=True)
 
         await db.commit()  # Commit only after all the operations completed
         # to obtain full info, we have to make one more request to DB
         report = await getReportByID(db, created_report.id, full=True)
 
-        ## COMMENTED OUT FOR THE SAKE OF THE TESTS, UNCOMMENT IN FUTURE
         if report:
-            # background_tasks.add_task(assessReport, report=report, db=db)
             background_tasks.add_task(notifyReport, report=report, db=db)
 
         return report
@@ -137,8 +136,11 @@ async def createReportRoute(
         raise HTTPException(status_code=400, detail="Invalid user_id")
     except ValidationError:
         raise HTTPException(status_code=422, detail="Invalid ReportCreate Form")
+    except UploadTooLarge:
+        await db.rollback()
+        raise HTTPException(status_code=413, detail="Photo is too large")
     except Exception as e:
-        # TODO: Remove photos from directory if failed sql query
+        # Stored photos of a failed creation are removed by app.tasks.photo_gc
         print(e)
         await db.rollback()
         raise HTTPException(status_code=500, detail="Error creating Report")
@@ -146,13 +148,85 @@ async def createReportRoute(
 
 @router.get("/feed", response_model=FeedReports, summary="Retrieve Reports Feed")
 async def getReportsFeedRoute(
-    db: AsyncSession = Depends(getSession), user: User = Depends(getUser)
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    cursor: Optional[str] = None,  # next_cursor of the previous page
+    # reports within radius (metres) of (lat, lon)
+    lat: Annotated[Optional[float], Query(ge=-90, le=90)] = None,
+    lon: Annotated[Optional[float], Query(ge=-180, le=180)] = None,
+    radius: Annotated[Optional[float], Query(gt=0, le=50_000)] = None,
+    # reports inside the bounding box
+    min_lat: Annotated[Optional[float], Query(ge=-90, le=90)] = None,
+    min_lon: Annotated[Optional[float], Query(ge=-180, le=180)] = None,
+    max_lat: Annotated[Optional[float], Query(ge=-90, le=90)] = None,
+    max_lon: Annotated[Optional[float], Query(ge=-180, le=180)] = None,
+    db: AsyncSession = Depends(getSession),
+    user: User = Depends(getUser),
+):
+    near = (lat, lon, radius)
+    if all(v is None for v in near):
+        near = None
+    elif any(v is None for v in near):
+        raise HTTPException(400, detail="lat, lon and radius must be given together")
+
+    bbox = (min_lat, min_lon, max_lat, max_lon)
+    if all(v is None for v in bbox):
+        bbox = None
+    elif any(v is None for v in bbox) or min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(400, detail="Invalid bounding box")
+
+    try:
+        reports, next_cursor = await getFeedReports(
+            db,
+            admin_view=user.is_admin,
+            limit=limit,
+            cursor=cursor,
+            near=near,
+            bbox=bbox,
+            viewer_id=user.id,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"data": reports, "next_cursor": next_cursor}
+
+
+@router.get(
+    "/map/clusters",
+    response_model=ReportClusters,
+    summary="Retrieve Report marker clusters for the map viewport",
+)
+async def getReportClustersRoute(
+    zoom: Annotated[int, Query(ge=MIN_ZOOM, le=MAX_ZOOM)],
+    min_lat: Annotated[float, Query(ge=-90, le=90)],
+    min_lon: Annotated[float, Query(ge=-180, le=180)],
+    max_lat: Annotated[float, Query(ge=-90, le=90)],
+    max_lon: Annotated[float, Query(ge=-180, le=180)],
+    db: AsyncSession = Depends(getSession),
+    user: User = Depends(getUser),
 ):
-    if user.is_admin:
-        reports = await getFeedReports(db, admin_view=True)
-    else:
-        reports = await getFeedReports(db, admin_view=False)
-    return {"data": reports}
+    if min_lat > max_lat or min_lon > max_lon:
+        raise HTTPException(400, detail="Invalid bounding box")
+    bbox = (min_lat, min_lon, max_lat, max_lon)
+    precision = zoomPrecision(zoom)
+    if countGeohashesInBBox(*bbox, precision) > MAX_CLUSTER_CELLS:
+        raise HTTPException(400, detail="Viewport too large for the zoom level")
+
+    clusters, missing = [], []
+    for cell in geohashesInBBox(*bbox, precision):
+        hit, cluster = clusterCache.get(zoom, cell)
+        if not hit:
+            missing.append(cell)
+        elif cluster is not None:
+            clusters.append(cluster)
+    if missing:
+        generation = clusterCache.generation
+        fetched = {
+            cluster["cell"]: cluster
+            for cluster in await getReportClusters(db, missing, precision)
+        }
+        for cell in missing:
+            clusterCache.set(zoom, cell, fetched.get(cell), generation)
+        clusters.extend(fetched.values())
+    return {"zoom": zoom, "data": clusters}
 
 
 @router.get("/{report_id}", response_model=ReportReadFull, summary="Retrieve Report")
@@ -161,7 +235,7 @@ async def getReportRoute(
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
 ):
-    report = await getReportByID(db, report_id, full=True)
+    report = await getReportByID(db, report_id, full=True, viewer_id=user.id)
     if not report:
         raise HTTPException(status_code=404, detail="Report not found")
     return report
@@ -196,9 +270,12 @@ async def deleteReportRoute(
     report_id: int,
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
+    storage: BlobStorage = Depends(getReportStorage),
 ):
     try:
-        await deleteReport(db, report_id, user.id)
+        photo_names = await deleteReport(db, report_id, user.id)
+        for name in photo_names:
+            await releasePhoto(db, storage, name)
         return Response(status_code=200)
     except AssertionError as e:
         if "Report not found" in e.args:
@@ -210,17 +287,56 @@ async def deleteReportRoute(
             raise HTTPException(status_code=500)
 
 
+async def _photoOrOriginal(storage: BlobStorage, filename: str, size: str):
+    info = await storage.stat(renditionFilename(filename, size))
+    if info is None:  # no rendition (e.g. not an image)
+        info = await storage.stat(filename)
+    return info
+
+
 @router.get(
     "/photo/{photo_id}", response_class=FileResponse, summary="Retrieve Report Photo"
 )
 async def getReportPhotoRoute(
-    photo_id: int, db: AsyncSession = Depends(getSession), user: User = Depends(getUser)
+    request: Request,
+    photo_id: int,
+    size: Literal["thumbnail", "medium", "original"] = "original",
+    db: AsyncSession = Depends(getSession),
+    user: User = Depends(getUser),
+    storage: BlobStorage = Depends(getReportStorage),
 ):
     photo = await getReportPhoto(db, photo_id)
     if photo is None:
         raise HTTPException(404, "Photo not found")
-    settings = getSettings()
-    full_path = settings.REPORT_PHOTOS / photo.filename_path
-    if not os.path.exists(full_path):
+    info = await _photoOrOriginal(storage, photo.filename_path, size)
+    if info is None:
         raise HTTPException(500)
-    return FileResponse(full_path)
+    return blobResponse(request, storage, info)
+
+
+@router.get(
+    "/photo/signed/{filename:path}",
+    response_class=FileResponse,
+    summary="Retrieve Report Photo by a signed URL",
+)
+async def getSignedReportPhotoRoute(
+    request: Request,
+    filename: str,
+    expires: int,
+    signature: str,
+    size: Literal["thumbnail", "medium", "original"] = "original",
+    storage: BlobStorage = Depends(getReportStorage),
+):
+    # No DB session and no getUser, the signature proves the URL was issued
+    # to an authenticated user (see ReportPhotoRead.url)
+    if ".." in Path(filename).parts or not verifyPhotoSignature(
+        filename, expires, signature
+    ):
+        raise HTTPException(403, "Invalid or expired photo URL")
+    info = await _photoOrOriginal(storage, filename, size)
+    if info is None:
+        raise HTTPException(404, "Photo not found")
+    max_age = max(int(expires - time.time()), 0)  # not past the URL's expiry
+    return blobResponse(
+        request, storage, info, f"private, max-age={max_age}, immutable"
+    )
@@ -1,14 +1,14 @@
-from pathlib import Path
-from typing import Annotated
-import uuid
+from typing import Annotated, Optional
 from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
     status,
+    Request,
     Response,
     File,
     UploadFile,
+    Query,
 )
 from fastapi.responses import FileResponse
 from fastapi.security import OAuth2PasswordRequestForm
@@ -29,21 +29,26 @@ from app.db.schemas.user_schema import (
 from app.db.schemas.report_schema import UserReports
 from app.db.schemas.tokens_schema import TokenSchema, AccessTokenSchema
 from app.db.schemas.notification_schema import (
+    UnreadNotifications,
     UserNotifications,
 )
 from app.db.crud.user_crud import *
 from app.db.crud.report_crud import getUserReports
 from app.db.crud.settings_crud import createSettings
 from app.db.crud.address_crud import createAddress
-from app.db.crud.notifications_crud import getNotificationAll
+from app.db.crud.notifications_crud import (
+    countUnreadNotifications,
+    getNotificationPage,
+)
 
 from app.utils.passwords import verifyPassword
 from app.utils.auth import getAccessToken, getRefreshToken
+from app.utils.uploads import UploadTooLarge
+from app.utils.photo_store import releasePhoto, storePhoto
+from app.utils.http_cache import REVALIDATE, blobResponse
+from app.utils.blob_storage import BlobStorage, getUserStorage
 from app.dependencies.auth import getUser, refreshUser
 
-from app.dependencies.common import getSettings
-import os
-
 router = APIRouter()
 
 
@@ -139,16 +144,18 @@ async def getMeStatisticsRoute(
     "/me/photo", summary="Get profile picture of the User", response_class=FileResponse
 )
 async def getMePhotoRoute(
+    request: Request,
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
+    storage: BlobStorage = Depends(getUserStorage),
 ):
     if user.picture_path is None:
         return Response(status_code=204)  # No picture
-    settings = getSettings()
-    full_path = settings.USER_PHOTOS / user.picture_path
-    if not os.path.exists(full_path):
+    info = await storage.stat(user.picture_path)
+    if info is None:
         raise HTTPException(500)
-    return FileResponse(full_path)
+    # The URL stays the same when the picture changes, clients revalidate
+    return blobResponse(request, storage, info, REVALIDATE)
 
 
 @router.put("/me/photo", summary="Update profile picture of the User")
@@ -156,34 +163,35 @@ async def putMePhotoRoute(
     photo: Annotated[UploadFile, File()],
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
+    storage: BlobStorage = Depends(getUserStorage),
 ):
-    file_extension = Path(photo.filename).suffix
     # TODO: CHECK THE EXTENSIONS (PHOTOS ONLY)
 
-    file_path = f"{uuid.uuid4()}{file_extension}"
-    settings = getSettings()
-    with (settings.USER_PHOTOS / file_path).open("wb") as f:
-        f.write(await photo.read())
+    try:
+        stored = await storePhoto(photo, storage)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="Photo is too large")
+    old_picture_path = user.picture_path
     await updateUserPhoto(
-        db, UserPhotoUpdate(user_id=user.id, picture_path=str(file_path))
+        db, UserPhotoUpdate(user_id=user.id, picture_path=stored.name)
     )
+    await releasePhoto(db, storage, old_picture_path)
     return Response(status_code=200)
 
 
 @router.delete("/me/photo", summary="Delete profile picture of the User")
 async def deleteMePhotoRoute(
-    db: AsyncSession = Depends(getSession), user: User = Depends(getUser)
+    db: AsyncSession = Depends(getSession),
+    user: User = Depends(getUser),
+    storage: BlobStorage = Depends(getUserStorage),
 ):
     if user.picture_path is None:
         return Response(status_code=200)
 
-    # TODO: remove the profile picture locally
-    # Is it actually a problem if we leave it there?
-    # settings = getSettings()
-    # filepath = settings.USER_PHOTOS / user.picture_path
-    # os.remove(filepath)
-
+    old_picture_path = user.picture_path
     await updateUserPhoto(db, UserPhotoUpdate(user_id=user.id, picture_path=None))
+    # The file is shared with other users/reports uploading the same content
+    await releasePhoto(db, storage, old_picture_path)
     return Response(status_code=200)
 
 
@@ -269,7 +277,27 @@ async def getUserReportsRoute(
     response_model=UserNotifications,
 )
 async def getUserNotificationsRoute(
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: Optional[str] = None,  # next_cursor of the previous page
+    since: Optional[datetime] = None,  # only notifications sent after
+    db: AsyncSession = Depends(getSession),
+    user: User = Depends(getUser),
+):
+    try:
+        notifications, next_cursor = await getNotificationPage(
+            db, user.id, limit=limit, cursor=cursor, since=since
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return UserNotifications(data=notifications, next_cursor=next_cursor)
+
+
+@router.get(
+    "/me/notifications/unread",
+    summary="Count User's unread notifications",
+    response_model=UnreadNotifications,
+)
+async def getUserUnreadNotificationsRoute(
     db: AsyncSession = Depends(getSession), user: User = Depends(getUser)
 ):
-    notifications = await getNotificationAll(db, user.id)
-    return UserNotifications(data=notifications)
+    return UnreadNotifications(count=await countUnreadNotifications(db, user.id))
@@ -2,12 +2,14 @@ from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 import asyncpg
+from typing import Optional
 
 from app.db.base import getSession
 from app.db.models.user import User
 from app.db.schemas.vote_schema import VoteCreate, VoteRead, VoteUpdate
 from app.db.crud.vote_crud import createVote, getVote, updateVote, deleteVote
 from app.dependencies.auth import getUser
+from app.utils.vote_buffer import VoteCounterBuffer, getVoteBuffer
 from app.websockets.update_report import manager as updateReportManager
 from app.tasks.background_notify_report import notifyVote
 
@@ -21,11 +23,12 @@ async def createVoteRoute(
     background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
+    vote_buffer: Optional[VoteCounterBuffer] = Depends(getVoteBuffer),
 ):
     try:
         if not user.is_admin and (not vote_create.user_id == user.id):
             raise HTTPException(status_code=403, detail="No permission to create")
-        created_vote = await createVote(db, vote_create)
+        created_vote = await createVote(db, vote_create, vote_buffer)
         if created_vote:
             background_tasks.add_task(
                 notifyVote, report_id=vote_create.report_id, db=db
@@ -74,11 +77,12 @@ async def patchVoteRoute(
     vote_update: VoteUpdate,
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
+    vote_buffer: Optional[VoteCounterBuffer] = Depends(getVoteBuffer),
 ):
     try:
         if not user.is_admin:
             assert user.id == vote_update.user_id, "user ids do not match"
-        updated_vote = await updateVote(db, vote_update)
+        updated_vote = await updateVote(db, vote_update, vote_buffer)
         try:
             await updateReportManager.broadcastUpdateReport(
                 {"report_id": vote_update.report_id}
@@ -102,11 +106,12 @@ async def deleteVoteRoute(
     report_id: int,
     db: AsyncSession = Depends(getSession),
     user: User = Depends(getUser),
+    vote_buffer: Optional[VoteCounterBuffer] = Depends(getVoteBuffer),
 ):
     try:
         if not user.is_admin:
             assert user.id == user_id, "user ids do not match"
-        await deleteVote(db, user_id, report_id)
+        await deleteVote(db, user_id, report_id, vote_buffer)
         try:
             await updateReportManager.broadcastUpdateReport({"report_id": report_id})
         except Exception as e:
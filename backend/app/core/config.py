@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -10,6 +11,22 @@ class Settings(BaseSettings):
 
     GOOGLE_APPLICATION_CREDENTIALS: str | None = None
 
+    # Photo classifier, see app/utils/vision_backends.py
+    VISION_BACKEND: Literal["google", "stub", "onnx"] = "google"
+    VISION_ONNX_MODEL_PATH: Path | None = None
+    VISION_ONNX_LABELS_PATH: Path | None = None  # one label per line
+    VISION_MAX_WORKERS: int = 4  # concurrent blocking classifier calls per process
+    VISION_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30  # 30 days
+    VISION_CACHE_MAX_ENTRIES: int = 100_000
+    VISION_CACHE_PRUNE_INTERVAL_SECONDS: int = 60 * 60  # by assessment workers
+
+    # Photo assessment worker (python -m app.tasks.assessment_worker)
+    ASSESSMENT_POLL_INTERVAL: float = 2.0  # seconds, when the queue is empty
+    ASSESSMENT_BATCH_SIZE: int = 10
+    ASSESSMENT_LEASE_SECONDS: int = 5 * 60
+    ASSESSMENT_MAX_ATTEMPTS: int = 5
+    ASSESSMENT_RETRY_BACKOFF_SECONDS: int = 30  # doubled on every attempt
+
     # JWT TOKEN SETTINGS
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # 30 minutes
     REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
@@ -17,10 +34,70 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str  # Ensure .env holds the value
     JWT_REFRESH_SECRET_KEY: str  # Ensure .env holds the value
 
+    # Signed report photo URLs (served without a DB lookup)
+    PHOTO_URL_SECRET_KEY: str | None = None  # JWT_SECRET_KEY when unset
+    PHOTO_URL_EXPIRE_SECONDS: int = 60 * 60  # 1-2 hours of validity per URL
+
+    # Photo storage, see app/utils/blob_storage.py
+    PHOTO_STORAGE: Literal["local", "s3"] = "local"
+    S3_BUCKET: str | None = None
+    S3_ENDPOINT_URL: str | None = None  # e.g. http://minio:9000, None for AWS
+    S3_REGION: str | None = None
+    S3_ACCESS_KEY_ID: str | None = None
+    S3_SECRET_ACCESS_KEY: str | None = None
+    # Same prefix by default, like REPORT_PHOTOS/USER_PHOTOS below
+    S3_REPORT_PHOTOS_PREFIX: str = "photos/"
+    S3_USER_PHOTOS_PREFIX: str = "photos/"
+
     # Directories
     REPORT_PHOTOS: Path = Path(__file__).resolve().parent.parent.parent / "photos"
     USER_PHOTOS: Path = Path(__file__).resolve().parent.parent.parent / "photos"
 
+    # Uploads
+    MAX_UPLOAD_SIZE: int = 20 * 1024 * 1024  # 20 MB per photo
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1 MB
+    RENDITION_WORKERS: int = 2  # processes resizing report photos
+    # Unreferenced photos younger than this are kept (see app/utils/photo_store.py)
+    PHOTO_DELETE_GRACE_SECONDS: int = 60 * 60
+    PHOTO_GC_BATCH_SIZE: int = 1000  # files checked per DB query
+    PHOTO_GC_INTERVAL_SECONDS: int = 6 * 60 * 60
+
+    # "buffered": report vote counters are written by app.tasks.vote_flusher
+    # in coalesced batches instead of in the statement of every vote
+    VOTE_COUNTER_MODE: Literal["immediate", "buffered"] = "immediate"
+    VOTE_FLUSH_INTERVAL_MS: int = 500
+
+    # Notifications of a new report are inserted in batches of this many users
+    NOTIFY_FANOUT_BATCH_SIZE: int = 10_000
+    # New reports notify users with is_local_notification living this close
+    LOCAL_NOTIFICATION_RADIUS: float = 5_000  # metres
+
+    # Weekly digest (python -m app.tasks.weekly_digest), same radius as above
+    WEEKLY_DIGEST_BATCH_SIZE: int = 1000  # users per INSERT ... SELECT
+    WEEKLY_DIGEST_CHECK_INTERVAL_SECONDS: int = 60 * 60  # for a new week to start
+
+    # Notifications are partitioned by month of sent_datetime, partitions are
+    # created and dropped by python -m app.tasks.notification_retention.
+    # Lookups by id scan the index of every retained partition, so keep the
+    # retention in months, not years
+    NOTIFICATION_RETENTION_MONTHS: int = 12  # full months kept, 0 keeps everything
+    NOTIFICATION_PARTITIONS_AHEAD: int = 3  # future months created in advance
+    NOTIFICATION_RETENTION_INTERVAL_SECONDS: int = 24 * 60 * 60
+
+    # User address geocoding, see app/utils/geocoding.py
+    # Opt-in, "nominatim" sends users' addresses to GEOCODER_URL
+    GEOCODER: Literal["nominatim", "none"] = "none"
+    GEOCODER_URL: str = "https://nominatim.openstreetmap.org/search"
+    GEOCODER_USER_AGENT: str = "ActiveResident"
+    GEOCODER_MIN_INTERVAL_SECONDS: float = 1.0  # between requests of a process
+
+    # Vote counter reconciliation (python -m app.tasks.vote_reconcile)
+    VOTE_RECONCILE_BATCH_SIZE: int = 1000  # reports checked per transaction
+    VOTE_RECONCILE_INTERVAL_SECONDS: int = 15 * 60
+    # buffered mode: drifted reports are corrected only if nothing moved for this
+    # long, has to be well above VOTE_FLUSH_INTERVAL_MS
+    VOTE_RECONCILE_SETTLE_SECONDS: float = 10.0
+
     # tricky stuff here
     # it looks for the env_file in current working dir (cwd)
     # and it happens to be whereever you launch code from
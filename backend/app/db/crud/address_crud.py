@@ -1,11 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import or_
 from app.db.models.user import UserAddress, UserAddress
 from app.db.schemas.address_schema import (
     UserAddressCreate,
     UserAddressUpdate,
 )
-from typing import Optional
+from typing import List, Optional
 
 
 async def getAddress(db: AsyncSession, user_id: int) -> Optional[UserAddress]:
@@ -36,8 +37,27 @@ async def updateAddress(
     address = await getAddress(db, user_id)
     assert address is not None, "Address not found"
     new_data = user_address.model_dump(exclude_none=True)
+    moved = any(getattr(address, key) != value for key, value in new_data.items())
     for key, value in new_data.items():
         setattr(address, key, value)
+    if moved:  # resolved again by app.tasks.background_geocode_address
+        address.latitude = address.longitude = address.geohash = None
     await db.commit()
     await db.refresh(address)
     return address
+
+
+async def getUngeocodedAddresses(
+    db: AsyncSession, after_id: int, limit: int
+) -> List[UserAddress]:
+    stmt = (
+        select(UserAddress)
+        .where(
+            UserAddress.id > after_id,
+            UserAddress.latitude.is_(None),
+            or_(UserAddress.city.isnot(None), UserAddress.postal_code.isnot(None)),
+        )
+        .order_by(UserAddress.id)
+        .limit(limit)
+    )
+    return (await db.scalars(stmt)).all()
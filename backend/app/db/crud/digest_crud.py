@@ -0,0 +1,146 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy import Float, String, cast, func, insert as insert_into, literal
+from app.db.crud.notifications_crud import notifiableUsers
+from app.db.crud.report_crud import PUBLIC_STATUSES
+from app.db.models.job import DigestRun
+from app.db.models.report import Report, ReportAddress
+from app.db.models.user import Notification, User, UserAddress, UserSetting
+from app.utils.geo import EARTH_RADIUS_M
+from datetime import datetime, timedelta
+from typing import Tuple
+import math
+
+DIGEST_PERIOD = timedelta(days=7)
+DIGEST_TITLE = "Týždenný prehľad vášho okolia"
+DIGEST_NOTE = "Nové správy vo vašom okolí za posledný týždeň: "
+
+
+async def lockDigestRun(db: AsyncSession, period_start: datetime) -> DigestRun:
+    """Creates the period's run if missing and locks it against parallel passes"""
+    await db.execute(
+        insert(DigestRun)
+        .values(period_start=period_start, last_user_id=0, digests=0)
+        .on_conflict_do_nothing(index_elements=[DigestRun.period_start])
+    )
+    stmt = (
+        select(DigestRun)
+        .where(DigestRun.period_start == period_start)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return (await db.scalars(stmt)).one()
+
+
+def _distanceBetween(lat1, lon1, lat2, lon2):
+    """Haversine in metres between two pairs of latitude/longitude columns"""
+    phi1 = func.radians(cast(lat1, Float))
+    phi2 = func.radians(cast(lat2, Float))
+    sin_d_phi = func.sin((phi2 - phi1) * 0.5)
+    sin_d_lambda = func.sin(
+        (func.radians(cast(lon2, Float)) - func.radians(cast(lon1, Float))) * 0.5
+    )
+    a = sin_d_phi * sin_d_phi + func.cos(phi1) * func.cos(phi2) * (
+        sin_d_lambda * sin_d_lambda
+    )
+    return 2 * EARTH_RADIUS_M * func.asin(func.least(func.sqrt(a), 1.0))
+
+
+async def insertWeeklyDigests(
+    db: AsyncSession,
+    period_start: datetime,
+    radius: float,
+    after_user_id: int,
+    batch_size: int,
+) -> Tuple[int, int]:
+    """
+    One statement for the next batch_size opted-in users after after_user_id:
+    matches them with the period's public reports within radius metres and
+    inserts one digest notification per user with any (pointing to the top
+    ranked report). No commit.
+    Returns the last user id of the batch (0 when none left) and the number
+    of digests inserted.
+    """
+    users = (
+        notifiableUsers()
+        .add_columns(UserAddress.latitude, UserAddress.longitude)
+        .join(UserAddress, UserAddress.user_id == User.id)
+        .where(
+            UserSetting.is_weekly_notification.is_(True),
+            UserAddress.latitude.isnot(None),
+            UserAddress.longitude.isnot(None),
+            User.id > after_user_id,
+        )
+        .order_by(User.id)
+        .limit(batch_size)
+        .cte("users_batch")
+    )
+    reports = (
+        select(
+            Report.id,
+            Report.feed_score,
+            ReportAddress.latitude,
+            ReportAddress.longitude,
+        )
+        .join(ReportAddress, ReportAddress.report_id == Report.id)
+        .where(
+            Report.status.in_(PUBLIC_STATUSES),
+            Report.published_datetime >= period_start,
+            Report.published_datetime < period_start + DIGEST_PERIOD,
+            ReportAddress.latitude.isnot(None),
+            ReportAddress.longitude.isnot(None),
+        )
+        .cte("period_reports")
+    )
+    # the latitude band is a cheap prefilter before the exact distance
+    band = math.degrees(radius / EARTH_RADIUS_M)
+    count = func.count(reports.c.id)
+    top_report = func.array_agg(
+        aggregate_order_by(reports.c.id, reports.c.feed_score.desc())
+    )[1]
+    nearby = (
+        select(
+            users.c.id.label("user_id"),
+            top_report.label("report_id"),
+            count.label("count"),
+        )
+        .join(
+            reports,
+            cast(reports.c.latitude, Float).between(
+                cast(users.c.latitude, Float) - band,
+                cast(users.c.latitude, Float) + band,
+            ),
+        )
+        .where(
+            _distanceBetween(
+                users.c.latitude,
+                users.c.longitude,
+                reports.c.latitude,
+                reports.c.longitude,
+            )
+            <= radius
+        )
+        .group_by(users.c.id)
+        .cte("nearby")
+    )
+    inserted = (
+        insert_into(Notification)
+        .from_select(
+            ["user_id", "report_id", "title", "note"],
+            select(
+                nearby.c.user_id,
+                nearby.c.report_id,
+                literal(DIGEST_TITLE, Notification.title.type),
+                literal(DIGEST_NOTE, String) + cast(nearby.c.count, String),
+            ),
+        )
+        .returning(Notification.id)
+        .cte("inserted")
+    )
+    stmt = select(
+        select(func.coalesce(func.max(users.c.id), 0)).scalar_subquery(),
+        select(func.count()).select_from(inserted).scalar_subquery(),
+    )
+    last_user_id, digests = (await db.execute(stmt)).one()
+    return last_user_id, digests
@@ -0,0 +1,20 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from app.db.models.geocode import GeocodeCache
+from typing import Optional, Tuple
+
+
+async def getGeocodeCache(db: AsyncSession, query: str) -> Optional[GeocodeCache]:
+    return await db.get(GeocodeCache, query)
+
+
+async def saveGeocodeCache(
+    db: AsyncSession, query: str, coordinates: Optional[Tuple[float, float]]
+) -> None:
+    """None coordinates store a not found result, no commit"""
+    latitude, longitude = coordinates if coordinates is not None else (None, None)
+    stmt = insert(GeocodeCache).values(
+        query=query, latitude=latitude, longitude=longitude
+    )
+    # a concurrent request may have resolved the same address already
+    await db.execute(stmt.on_conflict_do_nothing(index_elements=[GeocodeCache.query]))
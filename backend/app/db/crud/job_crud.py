@@ -0,0 +1,78 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func
+from app.db.models.job import AssessmentJob, JobStatus
+from datetime import timedelta
+from typing import Optional
+
+
+async def enqueueAssessment(
+    db: AsyncSession, report_id: int, nocommit: bool = True
+) -> AssessmentJob:
+    new_job = AssessmentJob(report_id=report_id)
+    db.add(new_job)
+    if not nocommit:
+        await db.commit()
+        await db.refresh(new_job)
+        return new_job
+    await db.flush()
+    return new_job
+
+
+async def claimAssessmentJobs(
+    db: AsyncSession, batch_size: int, lease_seconds: int
+) -> list[AssessmentJob]:
+    """
+    Lock up to batch_size due jobs and lease them to the caller.
+    SKIP LOCKED lets any number of workers poll concurrently without blocking
+    each other, expired leases make jobs of crashed workers claimable again.
+    """
+    stmt = (
+        select(AssessmentJob)
+        .where(
+            AssessmentJob.status.in_([JobStatus.pending, JobStatus.running]),
+            AssessmentJob.run_after <= func.now(),
+        )
+        .order_by(AssessmentJob.run_after, AssessmentJob.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = (await db.scalars(stmt)).all()
+    for job in jobs:
+        job.status = JobStatus.running
+        job.attempts += 1
+        job.run_after = func.now() + timedelta(seconds=lease_seconds)
+    await db.commit()
+    return jobs
+
+
+async def completeAssessmentJob(db: AsyncSession, job_id: int) -> None:
+    job = await db.get(AssessmentJob, job_id)
+    assert job is not None, "Job not found"
+    job.status = JobStatus.done
+    job.last_error = None
+    job.finished_datetime = func.now()
+    await db.commit()
+
+
+async def failAssessmentJob(
+    db: AsyncSession,
+    job_id: int,
+    error: str,
+    max_attempts: int,
+    backoff_seconds: int,
+) -> Optional[AssessmentJob]:
+    """Schedule a retry with exponential backoff, or give up after max_attempts"""
+    job = await db.get(AssessmentJob, job_id)
+    assert job is not None, "Job not found"
+    job.last_error = error
+    if job.attempts >= max_attempts:
+        job.status = JobStatus.failed
+        job.finished_datetime = func.now()
+    else:
+        job.status = JobStatus.pending
+        delay = backoff_seconds * 2 ** (job.attempts - 1)
+        job.run_after = func.now() + timedelta(seconds=delay)
+    await db.commit()
+    await db.refresh(job)
+    return job
@@ -1,11 +1,35 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, update
-from app.db.models.user import Notification
+from sqlalchemy import (
+    Select,
+    and_,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    not_,
+    or_,
+    text,
+    true,
+    update,
+)
+from app.db.models.user import Notification, User, UserAddress, UserSetting
+from app.db.crud.report_crud import distanceFrom, withinBBox
 from app.db.schemas.notification_schema import (
     NotificationCreate,
 )
-from typing import Optional, List
+from app.utils.geo import bboxAroundPoint
+from app.utils.pagination import decodeCursor, encodeCursor
+from app.utils.partitions import (
+    NOTIFICATION_DEFAULT_PARTITION,
+    addMonths,
+    notificationPartitionMonth,
+    notificationPartitionName,
+    notificationRetentionStart,
+)
+from datetime import datetime
+from typing import Optional, List, Tuple
 
 
 async def createNotification(
@@ -19,23 +43,80 @@ async def createNotification(
     return new_notification
 
 
+def _retained():
+    """
+    Skips expired notifications, whose partitions are about to be dropped.
+    Only a lower bound on the partition key: queries by id (the API doesn't
+    know when a notification was sent) still probe every retained partition.
+    """
+    retention_start = notificationRetentionStart()
+    if retention_start is None:
+        return true()
+    return Notification.sent_datetime >= retention_start
+
+
 async def getNotification(
     db: AsyncSession, notification_id: int, user_id: int
 ) -> Optional[Notification]:
     stmt = select(Notification).where(
         Notification.id == notification_id,
         Notification.user_id == user_id,
+        _retained(),
     )
     return (await db.scalars(stmt)).one_or_none()
 
 
-async def getNotificationAll(db: AsyncSession, user_id: int) -> List[Notification]:
+def _notificationKeysetAfter(cursor: str):
+    # Rows are ordered by (sent_datetime DESC, id DESC)
+    try:
+        key = decodeCursor(cursor)
+        last_sent, last_id = datetime.fromisoformat(key["t"]), int(key["i"])
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    return or_(
+        Notification.sent_datetime < last_sent,
+        and_(Notification.sent_datetime == last_sent, Notification.id < last_id),
+    )
+
+
+async def getNotificationPage(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+) -> Tuple[List[Notification], Optional[str]]:
+    """
+    Newest first page of the user's notifications, optionally only the ones
+    sent after since (incremental polling). Raises ValueError on a bad cursor.
+    """
     stmt = (
         select(Notification)
-        .where(Notification.user_id == user_id)
-        .order_by(Notification.sent_datetime.desc())
+        .where(Notification.user_id == user_id, _retained())
+        .order_by(Notification.sent_datetime.desc(), Notification.id.desc())
+        .limit(limit + 1)  # one extra row tells whether there is a next page
     )
-    return (await db.scalars(stmt)).all()
+    if cursor:
+        stmt = stmt.where(_notificationKeysetAfter(cursor))
+    if since is not None:
+        stmt = stmt.where(Notification.sent_datetime > since)
+    notifications = (await db.scalars(stmt)).all()
+
+    next_cursor = None
+    if len(notifications) > limit:
+        notifications = notifications[:limit]
+        last = notifications[-1]
+        next_cursor = encodeCursor({"t": last.sent_datetime.isoformat(), "i": last.id})
+    return notifications, next_cursor
+
+
+async def countUnreadNotifications(db: AsyncSession, user_id: int) -> int:
+    stmt = select(func.count()).where(
+        Notification.user_id == user_id,
+        Notification.read_datetime.is_(None),
+        _retained(),
+    )
+    return await db.scalar(stmt)
 
 
 async def markNotificationAsRead(
@@ -43,19 +124,220 @@ async def markNotificationAsRead(
 ) -> Optional[Notification]:
     stmt = (
         update(Notification)
-        .where(Notification.id == notification_id, Notification.user_id == user_id)
+        .where(
+            Notification.id == notification_id,
+            Notification.user_id == user_id,
+            _retained(),
+        )
         .values(read_datetime=func.now())
+        .returning(Notification)
+        .execution_options(synchronize_session=False, populate_existing=True)
     )
-    await db.execute(stmt)
+    notification = (await db.scalars(stmt)).one_or_none()
     await db.commit()
-    return await getNotification(db, notification_id, user_id)
+    return notification
 
 
 async def deleteNotification(
     db: AsyncSession, notification_id: int
 ) -> Optional[Notification]:
-    notification = await db.get(Notification, notification_id)
+    stmt = select(Notification).where(Notification.id == notification_id, _retained())
+    notification = (await db.scalars(stmt)).one_or_none()
     assert notification is not None, "Notification not found"
     await db.delete(notification)
     await db.commit()
     return notification
+
+
+def _selectNotifications(
+    user_id: int, ids: Optional[List[int]], before: Optional[str]
+) -> list:
+    """WHERE clause of a bulk operation, see NotificationSelection"""
+    conditions = [Notification.user_id == user_id, _retained()]
+    if ids is not None:
+        conditions.append(Notification.id.in_(ids))
+    if before is not None:
+        # the rows a newest first listing showed before reaching the cursor
+        conditions.append(not_(_notificationKeysetAfter(before)))
+    return conditions
+
+
+async def markNotificationsAsRead(
+    db: AsyncSession,
+    user_id: int,
+    ids: Optional[List[int]] = None,
+    before: Optional[str] = None,
+) -> List[int]:
+    """
+    One UPDATE ... RETURNING, already read notifications keep their read time.
+    Returns ids of the notifications marked, raises ValueError on a bad cursor.
+    """
+    stmt = (
+        update(Notification)
+        .where(
+            *_selectNotifications(user_id, ids, before),
+            Notification.read_datetime.is_(None),
+        )
+        .values(read_datetime=func.now())
+        .returning(Notification.id)
+        .execution_options(synchronize_session=False)
+    )
+    marked = (await db.scalars(stmt)).all()
+    await db.commit()
+    return list(marked)
+
+
+async def deleteNotifications(
+    db: AsyncSession,
+    user_id: int,
+    ids: Optional[List[int]] = None,
+    before: Optional[str] = None,
+) -> List[int]:
+    """One DELETE ... RETURNING, returns ids of the deleted notifications"""
+    stmt = (
+        delete(Notification)
+        .where(*_selectNotifications(user_id, ids, before))
+        .returning(Notification.id)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = (await db.scalars(stmt)).all()
+    await db.commit()
+    return list(deleted)
+
+
+def notifiableUsers() -> Select:
+    """ids of active users with notifications allowed, a base for fan-out filters"""
+    return (
+        select(User.id)
+        .join(UserSetting, UserSetting.user_id == User.id)
+        .where(User.is_active.is_(True), UserSetting.is_notification_allowed.is_(True))
+    )
+
+
+def localUsers(latitude: float, longitude: float, radius: float) -> Select:
+    """
+    notifiableUsers() opted into local notifications whose geocoded address
+    is within radius metres, found through the useraddresses geohash index
+    """
+    return (
+        notifiableUsers()
+        .join(UserAddress, UserAddress.user_id == User.id)
+        .where(
+            UserSetting.is_local_notification.is_(True),
+            withinBBox(
+                *bboxAroundPoint(latitude, longitude, radius), address=UserAddress
+            ),
+            distanceFrom(latitude, longitude, address=UserAddress) <= radius,
+        )
+    )
+
+
+async def fanOutNotifications(
+    db: AsyncSession,
+    recipients: Select,
+    report_id: Optional[int],
+    title: str,
+    note: str,
+    after_user_id: int,
+    batch_size: int,
+) -> Tuple[int, Optional[int]]:
+    """
+    INSERT ... SELECT of one notification per recipient, for the next
+    batch_size recipients (a select of User.id) after after_user_id, no commit.
+    Returns how many were inserted and the last user id (None when done).
+    """
+    batch = (
+        recipients.where(User.id > after_user_id)
+        .order_by(User.id)
+        .limit(batch_size)
+        .cte("batch")
+    )
+    inserted = (
+        insert(Notification)
+        .from_select(
+            ["user_id", "report_id", "title", "note"],
+            select(
+                batch.c.id,
+                literal(report_id, Notification.report_id.type),
+                literal(title, Notification.title.type),
+                literal(note, Notification.note.type),
+            ),
+        )
+        .returning(Notification.user_id)
+        .cte("inserted")
+    )
+    stmt = select(func.count(), func.max(inserted.c.user_id))
+    count, last_user_id = (await db.execute(stmt)).one()
+    return count, last_user_id
+
+
+async def getNotificationPartitions(db: AsyncSession) -> List[str]:
+    stmt = text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'notifications'::regclass"
+    )
+    return list((await db.scalars(stmt)).all())
+
+
+async def createNotificationPartition(db: AsyncSession, month: datetime) -> None:
+    """
+    Partition of the month starting at month (a monthStart()), rows already
+    in the default partition for that month are moved into it. No commit.
+    """
+    start, end = month, addMonths(month, 1)
+    create = text(
+        f"CREATE TABLE IF NOT EXISTS {notificationPartitionName(month)} "
+        "PARTITION OF notifications "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+    # No partition covers the month yet, this only looks at the default one
+    stray = await db.scalar(
+        select(
+            exists().where(
+                Notification.sent_datetime >= start, Notification.sent_datetime < end
+            )
+        )
+    )
+    if not stray:
+        await db.execute(create)
+        return
+
+    # Postgres refuses a partition overlapping rows of the default partition
+    default = NOTIFICATION_DEFAULT_PARTITION
+    await db.execute(text(f"ALTER TABLE notifications DETACH PARTITION {default}"))
+    await db.execute(create)
+    await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {default} "
+            "WHERE sent_datetime >= :start AND sent_datetime < :end RETURNING *) "
+            "INSERT INTO notifications SELECT * FROM moved"
+        ),
+        {"start": start, "end": end},
+    )
+    await db.execute(
+        text(f"ALTER TABLE notifications ATTACH PARTITION {default} DEFAULT")
+    )
+
+
+async def dropNotificationPartitions(
+    db: AsyncSession, before: datetime
+) -> Tuple[List[str], int]:
+    """
+    Drops monthly partitions older than before and deletes the few expired
+    rows of the default partition. Returns the dropped partitions and the
+    number of deleted rows. No commit.
+    """
+    dropped = []
+    for name in sorted(await getNotificationPartitions(db)):
+        month = notificationPartitionMonth(name)
+        if month is not None and month < before:
+            await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+            dropped.append(name)
+    # Old monthly partitions are gone, this only looks at the default one
+    stmt = (
+        delete(Notification)
+        .where(Notification.sent_datetime < before)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = (await db.execute(stmt)).rowcount
+    return dropped, deleted
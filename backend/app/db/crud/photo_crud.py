@@ -0,0 +1,29 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, union_all
+from app.db.models.report import ReportPhoto
+from app.db.models.user import User
+
+
+def photoReferences():
+    """Every stored photo name still in use, one row per reference"""
+    return union_all(
+        select(ReportPhoto.filename_path.label("name")),
+        select(User.picture_path.label("name")).where(User.picture_path.is_not(None)),
+    ).subquery()
+
+
+async def countPhotoReferences(db: AsyncSession, name: str) -> int:
+    """Reference count of a stored blob: report photos + profile pictures"""
+    references = photoReferences()
+    stmt = select(func.count()).select_from(references).where(references.c.name == name)
+    return await db.scalar(stmt)
+
+
+async def getReferencedPhotos(db: AsyncSession, names: list[str]) -> set[str]:
+    """The subset of names that is still referenced by any row"""
+    if not names:
+        return set()
+    references = photoReferences()
+    stmt = select(references.c.name).where(references.c.name.in_(names)).distinct()
+    return set((await db.scalars(stmt)).all())
@@ -1,20 +1,63 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from sqlalchemy import desc, func
+from sqlalchemy.orm import joinedload, selectinload, with_expression
+from sqlalchemy import Float, and_, bindparam, cast, desc, func, or_, update
 from app.db.models.report import Report, ReportStatus, ReportAddress, ReportPhoto
 from app.db.models.user import User
+from app.db.models.vote import Vote
 from app.db.schemas.report_schema import (
     ReportCreate,
     ReportAddressCreate,
     ReportPhotoCreate,
     ReportUpdate,
 )
+from app.utils.pagination import encodeCursor, decodeCursor
+from app.utils.map_clusters import cache as clusterCache
+from app.utils.geo import (
+    EARTH_RADIUS_M,
+    bboxAroundPoint,
+    coveringGeohashes,
+    geohashOrNone,
+)
+import math
+from datetime import datetime
 from typing import Optional
 
+# Statuses visible to regular users (feed, map)
+PUBLIC_STATUSES = (ReportStatus.published, ReportStatus.in_progress)
+
+
+def _isPublic():
+    # Rendered as literals, a generic plan of a prepared statement (asyncpg)
+    # could not prove the partial ix_reports_feed_public applies to parameters
+    return Report.status.in_(
+        bindparam(
+            "public_statuses",
+            list(PUBLIC_STATUSES),
+            expanding=True,
+            literal_execute=True,
+            type_=Report.status.type,
+        )
+    )
+
+
+def _withViewerVote(stmt, viewer_id: Optional[int]):
+    """
+    Loads Report.viewer_vote with a left join on the viewer's vote (at most
+    one row per report, unique_user_vote), clients need no request per report
+    """
+    if viewer_id is None:
+        return stmt
+    return stmt.outerjoin(
+        Vote, and_(Vote.report_id == Report.id, Vote.user_id == viewer_id)
+    ).options(with_expression(Report.viewer_vote, Vote.is_positive))
+
 
 async def getReportByID(
-    db: AsyncSession, report_id: int, full: bool = False
+    db: AsyncSession,
+    report_id: int,
+    full: bool = False,
+    viewer_id: Optional[int] = None,
 ) -> Optional[Report]:
     if not full:
         return await db.get(Report, report_id)
@@ -27,6 +70,7 @@ async def getReportByID(
         )
         .where(Report.id == report_id)
     )
+    stmt = _withViewerVote(stmt, viewer_id)
     return (await db.execute(stmt)).scalars().unique().one_or_none()
 
 
@@ -67,15 +111,22 @@ async def updateReport(
     assert report is not None, "Report not found"
     if check_user_id:
         assert report.user_id == check_user_id, "user ids do not match"
+    old_geohash = report.address.geohash if report.address else None
     new_data = report_update.model_dump(exclude_none=True)
     for key, value in new_data.items():
         if key == "address":
             for addr_key, addr_value in value.items():
                 setattr(report.address, addr_key, addr_value)
+            report.address.geohash = geohashOrNone(
+                report.address.latitude, report.address.longitude
+            )
         else:
             setattr(report, key, value)
     await db.commit()
     await db.refresh(report)
+    clusterCache.invalidate(
+        [old_geohash, report.address.geohash if report.address else None]
+    )
     return report
 
 
@@ -83,13 +134,18 @@ async def deleteReport(
     db: AsyncSession,
     report_id: int,
     check_user_id: int = None,
-) -> None:
+) -> list[str]:
+    """Returns filename_path of the deleted photos, for photo_store.releasePhoto"""
     report = await db.get(Report, report_id)
     assert report is not None, "Report not found"
     if check_user_id:
         assert report.user_id == check_user_id, "user ids do not match"
+    address = await report.awaitable_attrs.address
+    photo_names = [photo.filename_path for photo in await report.awaitable_attrs.photos]
     await db.delete(report)
     await db.commit()
+    clusterCache.invalidate([address.geohash if address else None])
+    return photo_names
 
 
 async def createReportAddress(
@@ -99,7 +155,11 @@ async def createReportAddress(
     nocommit: bool = True,
 ):
     data = address_create.model_dump(exclude_none=True)
-    new_address = ReportAddress(report_id=report_id, **data)
+    new_address = ReportAddress(
+        report_id=report_id,
+        geohash=geohashOrNone(address_create.latitude, address_create.longitude),
+        **data,
+    )
     db.add(new_address)
     if not nocommit:
         await db.commit()
@@ -115,35 +175,163 @@ async def createReportPhoto(
     data = photo_create.model_dump(exclude_none=True)
     new_photo = ReportPhoto(**data)
     db.add(new_photo)
+    await db.flush()
+    if new_photo.ai_score:
+        await refreshReportFeedScore(db, new_photo.report_id)
     if not nocommit:
         await db.commit()
         await db.refresh(new_photo)
-        return new_photo
-    await db.flush()
     return new_photo
 
 
+async def refreshReportFeedScore(db: AsyncSession, report_id: int) -> None:
+    """Recompute Report.feed_score after any of its photos' ai_score changed"""
+    photo_scores = (
+        select(func.coalesce(func.sum(ReportPhoto.ai_score), 0))
+        .where(ReportPhoto.report_id == report_id)
+        .scalar_subquery()
+    )
+    await db.execute(
+        update(Report).where(Report.id == report_id).values(feed_score=photo_scores)
+    )
+
+
 async def getReportPhoto(db: AsyncSession, photo_id: int):
     return await db.get(ReportPhoto, photo_id)
 
 
-async def getFeedReports(db: AsyncSession, admin_view: bool = False) -> list[Report]:
+def _feedKeysetAfter(cursor: str):
+    # Rows are ordered by (feed_score DESC, published_datetime ASC NULLS LAST,
+    # id ASC), so "after the cursor" has to be spelled out for each key part
+    try:
+        key = decodeCursor(cursor)
+        last_score, last_id = int(key["s"]), int(key["i"])
+        last_published = (
+            datetime.fromisoformat(key["p"]) if key["p"] is not None else None
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    if last_published is None:
+        tie = and_(Report.published_datetime.is_(None), Report.id > last_id)
+    else:
+        tie = or_(
+            Report.published_datetime > last_published,
+            and_(Report.published_datetime == last_published, Report.id > last_id),
+            Report.published_datetime.is_(None),
+        )
+    return or_(
+        Report.feed_score < last_score,
+        and_(Report.feed_score == last_score, tie),
+    )
+
+
+def withinBBox(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    address=ReportAddress,  # or UserAddress, any model with latitude/longitude/geohash
+):
+    # geohash prefixes hit the index, the exact bounds drop the cells' overhang
+    conditions = [
+        address.latitude.between(min_lat, max_lat),
+        address.longitude.between(min_lon, max_lon),
+    ]
+    cells = coveringGeohashes(min_lat, min_lon, max_lat, max_lon)
+    if cells:  # empty when the bbox is too large for a useful prefilter
+        conditions.append(or_(*(address.geohash.like(f"{cell}%") for cell in cells)))
+    return and_(*conditions)
+
+
+def distanceFrom(latitude: float, longitude: float, address=ReportAddress):
+    # haversine in SQL, so the page LIMIT applies after the exact filter
+    lat1 = math.radians(latitude)
+    lat2 = func.radians(cast(address.latitude, Float))
+    lon2 = func.radians(cast(address.longitude, Float))
+    sin_d_lat = func.sin((lat2 - lat1) * 0.5)
+    sin_d_lon = func.sin((lon2 - math.radians(longitude)) * 0.5)
+    a = sin_d_lat * sin_d_lat + math.cos(lat1) * func.cos(lat2) * sin_d_lon * sin_d_lon
+    # least() guards asin against rounding pushing the argument above 1
+    return 2 * EARTH_RADIUS_M * func.asin(func.least(func.sqrt(a), 1.0))
+
+
+async def getFeedReports(
+    db: AsyncSession,
+    admin_view: bool = False,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    # (lat, lon, radius in metres) and (min_lat, min_lon, max_lat, max_lon)
+    near: Optional[tuple[float, float, float]] = None,
+    bbox: Optional[tuple[float, float, float, float]] = None,
+    viewer_id: Optional[int] = None,
+) -> tuple[list[Report], Optional[str]]:
     stmt = (
         select(Report)
-        .outerjoin(ReportPhoto, Report.id == ReportPhoto.report_id)
         .options(
             joinedload(Report.address),
             joinedload(Report.user).joinedload(User.settings),
-            joinedload(Report.photos),
+            selectinload(Report.photos),  # joined collections do not mix with LIMIT
         )
-        .group_by(Report.id)
         .order_by(
-            desc(func.coalesce(func.sum(ReportPhoto.ai_score), 0)),
-            Report.published_datetime,
+            desc(Report.feed_score),
+            Report.published_datetime.asc().nulls_last(),
+            Report.id,
         )
+        .limit(limit + 1)  # one extra row tells whether there is a next page
     )
     if not admin_view:
+        stmt = stmt.where(_isPublic())
+    if cursor:
+        stmt = stmt.where(_feedKeysetAfter(cursor))
+    if near or bbox:
+        stmt = stmt.join(ReportAddress, ReportAddress.report_id == Report.id)
+    if near:
+        latitude, longitude, radius = near
         stmt = stmt.where(
-            Report.status.in_([ReportStatus.published, ReportStatus.in_progress])
+            withinBBox(*bboxAroundPoint(latitude, longitude, radius)),
+            distanceFrom(latitude, longitude) <= radius,
         )
-    return (await db.execute(stmt)).scalars().unique().all()
+    if bbox:
+        stmt = stmt.where(withinBBox(*bbox))
+    stmt = _withViewerVote(stmt, viewer_id)
+    reports = (await db.scalars(stmt)).all()
+
+    next_cursor = None
+    if len(reports) > limit:
+        reports = reports[:limit]
+        last = reports[-1]
+        next_cursor = encodeCursor(
+            {
+                "s": last.feed_score,
+                "p": (
+                    last.published_datetime.isoformat()
+                    if last.published_datetime
+                    else None
+                ),
+                "i": last.id,
+            }
+        )
+    return reports, next_cursor
+
+
+async def getReportClusters(
+    db: AsyncSession, cells: list[str], precision: int
+) -> list[dict]:
+    """Marker clusters of public reports for geohash cells of one precision"""
+    cell = func.substr(ReportAddress.geohash, 1, precision).label("cell")
+    stmt = (
+        select(
+            cell,
+            func.count().label("count"),
+            func.avg(ReportAddress.latitude).label("latitude"),
+            func.avg(ReportAddress.longitude).label("longitude"),
+            func.mode().within_group(Report.status).label("status"),
+        )
+        .join(Report, Report.id == ReportAddress.report_id)
+        .where(
+            Report.status.in_(PUBLIC_STATUSES),
+            or_(*(ReportAddress.geohash.like(f"{c}%") for c in cells)),
+        )
+        .group_by("cell")
+    )
+    return [row._asdict() for row in (await db.execute(stmt)).all()]
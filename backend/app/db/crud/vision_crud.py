@@ -0,0 +1,74 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import delete, func, or_, tuple_
+from app.db.models.vision import VisionAssessment, VisionCacheStats
+from datetime import timedelta
+
+
+async def getVisionAssessments(
+    db: AsyncSession, hashes: list[str], backend: str, ttl_seconds: int
+) -> dict[str, VisionAssessment]:
+    stmt = select(VisionAssessment).where(
+        VisionAssessment.sha256.in_(hashes),
+        VisionAssessment.backend == backend,
+        VisionAssessment.created_datetime > func.now() - timedelta(seconds=ttl_seconds),
+    )
+    return {row.sha256: row for row in (await db.scalars(stmt)).all()}
+
+
+async def saveVisionAssessments(db: AsyncSession, rows: list[dict]) -> None:
+    """Upsert rows of {sha256, backend, labels, score, is_inappropriate}, no commit"""
+    if not rows:
+        return
+    stmt = insert(VisionAssessment).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VisionAssessment.sha256, VisionAssessment.backend],
+        set_={
+            "labels": stmt.excluded.labels,
+            "score": stmt.excluded.score,
+            "is_inappropriate": stmt.excluded.is_inappropriate,
+            "created_datetime": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def pruneVisionAssessments(
+    db: AsyncSession, ttl_seconds: int, max_entries: int
+) -> int:
+    """Drop expired entries and the oldest ones above max_entries, no commit"""
+    overflow = (
+        select(VisionAssessment.sha256, VisionAssessment.backend)
+        .order_by(VisionAssessment.created_datetime.desc())
+        .offset(max_entries)
+    )
+    stmt = delete(VisionAssessment).where(
+        or_(
+            VisionAssessment.created_datetime
+            <= func.now() - timedelta(seconds=ttl_seconds),
+            tuple_(VisionAssessment.sha256, VisionAssessment.backend).in_(overflow),
+        )
+    )
+    return (await db.execute(stmt)).rowcount
+
+
+async def countVisionCacheLookups(
+    db: AsyncSession, backend: str, hits: int, misses: int
+) -> None:
+    """Adds to the backend's hit/miss counters, no commit"""
+    stmt = insert(VisionCacheStats).values(backend=backend, hits=hits, misses=misses)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VisionCacheStats.backend],
+        set_={
+            "hits": VisionCacheStats.hits + stmt.excluded.hits,
+            "misses": VisionCacheStats.misses + stmt.excluded.misses,
+            "updated_datetime": func.now(),
+        },
+    )
+    await db.execute(stmt)
+
+
+async def getVisionCacheStats(db: AsyncSession) -> list[VisionCacheStats]:
+    stmt = select(VisionCacheStats).order_by(VisionCacheStats.backend)
+    return list((await db.scalars(stmt)).all())
@@ -1,9 +1,42 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import select
+from sqlalchemy import (
+    Integer,
+    bindparam,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from app.db.models.report import Report
 from app.db.models.vote import Vote
 from app.db.schemas.vote_schema import VoteCreate, VoteUpdate
-from typing import Optional
+from app.utils.vote_buffer import VoteCounterBuffer, VoteDeltas
+from typing import Optional, Tuple
+
+
+def _asInt(flag):
+    return cast(flag, Integer)
+
+
+def _adjustCounters(report_id, pos_delta, neg_delta):
+    """
+    In-place UPDATE of the report's vote counters, meant to run as a CTE of
+    the statement changing the vote. The increment happens under the row lock,
+    concurrent votes on the same report never overwrite each other.
+    """
+    return (
+        update(Report)
+        .where(Report.id == report_id)
+        .values(
+            votes_pos=Report.votes_pos + pos_delta,
+            votes_neg=Report.votes_neg + neg_delta,
+        )
+    )
 
 
 async def getVote(db: AsyncSession, user_id: int, report_id: int) -> Optional[Vote]:
@@ -17,55 +50,217 @@ async def getVote(db: AsyncSession, user_id: int, report_id: int) -> Optional[Vo
     return vote
 
 
-async def createVote(db: AsyncSession, vote_create: VoteCreate) -> Vote:
+async def createVote(
+    db: AsyncSession,
+    vote_create: VoteCreate,
+    counters: Optional[VoteCounterBuffer] = None,
+) -> Vote:
+    """Report counters are updated in the same statement unless counters is given"""
     data = vote_create.model_dump(exclude_none=True)
-    new_vote = Vote(**data)
-    db.add(new_vote)
-    await db.flush()
-    report = await new_vote.awaitable_attrs.report
-    if vote_create.is_positive:
-        report.votes_pos += 1
-    else:
-        report.votes_neg += 1
+    positive = int(vote_create.is_positive)
+    stmt = insert(Vote).values(**data).returning(Vote)
+    if counters is None:
+        # A duplicate vote or a missing report fails the whole statement,
+        # counters are only bumped together with the insert
+        stmt = stmt.add_cte(
+            _adjustCounters(vote_create.report_id, positive, 1 - positive).cte(
+                "counters"
+            )
+        )
+    new_vote = (await db.scalars(stmt)).one()
     await db.commit()
-    await db.refresh(new_vote)
+    if counters is not None:
+        counters.add(vote_create.report_id, positive, 1 - positive)
     return new_vote
 
 
-async def updateVote(db: AsyncSession, vote_update: VoteUpdate) -> Vote:
-    result = await db.execute(
-        select(Vote).where(
+async def updateVote(
+    db: AsyncSession,
+    vote_update: VoteUpdate,
+    counters: Optional[VoteCounterBuffer] = None,
+) -> Vote:
+    old = (
+        select(Vote.id, Vote.report_id, Vote.is_positive)
+        .where(
             Vote.report_id == vote_update.report_id,
             Vote.user_id == vote_update.user_id,
         )
+        .with_for_update()
+        .cte("old")
     )
-    vote = result.scalar_one_or_none()
-    assert vote is not None, "Vote not found"
-
-    new_data = vote_update.model_dump(exclude=["report_id"], exclude_none=True)
-    for key, value in new_data.items():
-        if key == "is_positive" and value and not vote.is_positive:
-            report = await vote.awaitable_attrs.report
-            report.votes_pos += 1
-            report.votes_neg -= 1
-        elif key == "is_positive" and not value and vote.is_positive:
-            report = await vote.awaitable_attrs.report
-            report.votes_pos -= 1
-            report.votes_neg += 1
-        setattr(vote, key, value)
+    stmt = (
+        update(Vote)
+        .where(Vote.id == old.c.id)
+        .values(is_positive=vote_update.is_positive)
+        .returning(Vote, old.c.is_positive)
+        .execution_options(synchronize_session=False, populate_existing=True)
+    )
+    if counters is None:
+        change = _asInt(literal(vote_update.is_positive)) - _asInt(old.c.is_positive)
+        stmt = stmt.add_cte(
+            _adjustCounters(old.c.report_id, change, -change)
+            .where(old.c.is_positive != vote_update.is_positive)
+            .cte("counters")
+        )
+    row = (await db.execute(stmt)).one_or_none()
+    assert row is not None, "Vote not found"
     await db.commit()
-    await db.refresh(vote)
+    vote, was_positive = row
+    if counters is not None and was_positive != vote.is_positive:
+        change = int(vote.is_positive) - int(was_positive)
+        counters.add(vote.report_id, change, -change)
     return vote
 
 
-async def deleteVote(db: AsyncSession, user_id: int, report_id: int) -> None:
-    vote = await getVote(db, user_id, report_id)
-    assert vote is not None, "Vote not found"
-    report = await vote.awaitable_attrs.report
-    if vote.is_positive:
-        report.votes_pos -= 1
+async def deleteVote(
+    db: AsyncSession,
+    user_id: int,
+    report_id: int,
+    counters: Optional[VoteCounterBuffer] = None,
+) -> None:
+    deleted = (
+        delete(Vote)
+        .where(Vote.report_id == report_id, Vote.user_id == user_id)
+        .returning(Vote.report_id, Vote.is_positive)
+    )
+    if counters is None:
+        deleted = deleted.cte("deleted")
+        positive = _asInt(deleted.c.is_positive)
+        stmt = (
+            _adjustCounters(deleted.c.report_id, -positive, positive - 1)
+            .returning(Report.id)
+            .execution_options(synchronize_session=False)
+        )
     else:
-        report.votes_neg += 1
-
-    await db.delete(vote)
+        stmt = deleted.execution_options(synchronize_session=False)
+    row = (await db.execute(stmt)).first()
+    assert row is not None, "Vote not found"
     await db.commit()
+    if counters is not None:
+        positive = int(row.is_positive)
+        counters.add(report_id, -positive, positive - 1)
+
+
+async def applyVoteCounterDeltas(db: AsyncSession, deltas: VoteDeltas) -> None:
+    """One in-place UPDATE per report (executemany), no commit"""
+    reports = Report.__table__
+    stmt = (
+        update(reports)
+        .where(reports.c.id == bindparam("report_id"))
+        .values(
+            votes_pos=reports.c.votes_pos + bindparam("pos_delta"),
+            votes_neg=reports.c.votes_neg + bindparam("neg_delta"),
+        )
+    )
+    # Same lock order in every process, concurrent flushes cannot deadlock
+    params = [
+        {"report_id": report_id, "pos_delta": pos, "neg_delta": neg}
+        for report_id, (pos, neg) in sorted(deltas.items())
+    ]
+    await db.execute(stmt, params)
+
+
+def _countVotes(report_id, is_positive: bool):
+    return (
+        select(func.count(Vote.id))
+        .where(Vote.report_id == report_id, Vote.is_positive.is_(is_positive))
+        .scalar_subquery()
+    )
+
+
+async def checkVoteCounters(
+    db: AsyncSession, after_id: int, batch_size: int
+) -> list[Tuple[int, bool]]:
+    """
+    Compares counters of the next batch_size reports after after_id with the
+    votes table, without locking anything. Returns (report_id, drifted) pairs.
+    """
+    batch = (
+        select(Report.id, Report.votes_pos, Report.votes_neg)
+        .where(Report.id > after_id)
+        .order_by(Report.id)
+        .limit(batch_size)
+        .subquery()
+    )
+    drifted = or_(
+        batch.c.votes_pos != _countVotes(batch.c.id, True),
+        batch.c.votes_neg != _countVotes(batch.c.id, False),
+    )
+    stmt = select(batch.c.id, drifted).order_by(batch.c.id)
+    return [tuple(row) for row in (await db.execute(stmt)).all()]
+
+
+async def fixVoteCounters(db: AsyncSession, report_ids: list[int]) -> int:
+    """
+    Recounts votes of the reports, returns how many were corrected, no commit.
+    Only safe when counters are updated by the vote statements (immediate mode).
+    """
+    if not report_ids:
+        return 0
+    # With VOTE_COUNTER_MODE="immediate" votes change the counters under the
+    # report row lock, once it is held the recount below (a new snapshot)
+    # cannot race with a vote in flight. Buffered votes do not touch the
+    # report row, see settleVoteCounters for those.
+    await db.execute(
+        select(Report.id)
+        .where(Report.id.in_(report_ids))
+        .order_by(Report.id)
+        .with_for_update()
+    )
+    pos = _countVotes(Report.id, True)
+    neg = _countVotes(Report.id, False)
+    stmt = (
+        update(Report)
+        .where(
+            Report.id.in_(report_ids),
+            or_(Report.votes_pos != pos, Report.votes_neg != neg),
+        )
+        .values(votes_pos=pos, votes_neg=neg)
+        .execution_options(synchronize_session=False)
+    )
+    return (await db.execute(stmt)).rowcount
+
+
+async def getVoteCounters(
+    db: AsyncSession, report_ids: list[int]
+) -> dict[int, Tuple[int, int, int, int]]:
+    """
+    report_id -> (votes_pos, votes_neg, positive votes, negative votes),
+    without locking anything
+    """
+    if not report_ids:
+        return {}
+    stmt = select(
+        Report.id,
+        Report.votes_pos,
+        Report.votes_neg,
+        _countVotes(Report.id, True),
+        _countVotes(Report.id, False),
+    ).where(Report.id.in_(report_ids))
+    return {row[0]: tuple(row[1:]) for row in (await db.execute(stmt)).all()}
+
+
+async def settleVoteCounters(
+    db: AsyncSession, observed: dict[int, Tuple[int, int, int, int]]
+) -> int:
+    """
+    Sets counters to the vote counts of getVoteCounters(), only where the
+    counters still hold the observed values. Votes committed after the
+    observation have their deltas in a VoteCounterBuffer, the flusher adds
+    them on top of the corrected counters. Returns how many were corrected,
+    no commit.
+    """
+    corrected = 0
+    for report_id, (pos, neg, counted_pos, counted_neg) in sorted(observed.items()):
+        stmt = (
+            update(Report)
+            .where(
+                Report.id == report_id,
+                Report.votes_pos == pos,
+                Report.votes_neg == neg,
+            )
+            .values(votes_pos=counted_pos, votes_neg=counted_neg)
+            .execution_options(synchronize_session=False)
+        )
+        corrected += (await db.execute(stmt)).rowcount
+    return corrected
@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime, Numeric, String, func
+
+from app.db.base import Base
+
+
+class GeocodeCache(Base):
+    """Geocoder results by normalized address query, None coordinates: not found"""
+
+    __tablename__ = "geocodecache"
+    query = Column(String, primary_key=True)
+    latitude = Column(Numeric(8, 6), nullable=True)
+    longitude = Column(Numeric(9, 6), nullable=True)
+    created_datetime = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,57 @@
+from sqlalchemy import (
+    Column,
+    Integer,
+    Text,
+    ForeignKey,
+    Enum,
+    DateTime,
+    Index,
+    func,
+)
+from sqlalchemy.orm import relationship
+import enum
+
+from app.db.base import Base
+
+
+class JobStatus(enum.Enum):
+    pending = "pending"
+    running = "running"  # claimed by a worker until run_after (lease)
+    done = "done"
+    failed = "failed"  # gave up after ASSESSMENT_MAX_ATTEMPTS
+
+
+class AssessmentJob(Base):
+    __tablename__ = "assessmentjobs"
+    id = Column(Integer, primary_key=True, index=True)
+    report_id = Column(
+        Integer, ForeignKey("reports.id", ondelete="CASCADE"), nullable=False
+    )
+    status = Column(Enum(JobStatus), default=JobStatus.pending, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    # pending: not before this time (retry backoff)
+    # running: lease expiry, after it the job is claimable again (worker died)
+    run_after = Column(DateTime(timezone=True), server_default=func.now())
+    created_datetime = Column(DateTime(timezone=True), server_default=func.now())
+    finished_datetime = Column(DateTime(timezone=True), default=None)
+
+    report = relationship("Report")
+
+    __table_args__ = (Index("ix_assessmentjobs_claim", status, run_after),)
+
+
+class DigestRun(Base):
+    """
+    Progress of the weekly digest for one period, users up to last_user_id
+    already got theirs (app.tasks.weekly_digest resumes after it)
+    """
+
+    __tablename__ = "digestruns"
+    # digests cover reports published in [period_start, period_start + 7 days)
+    period_start = Column(DateTime(timezone=True), primary_key=True)
+    last_user_id = Column(Integer, default=0, nullable=False)
+    digests = Column(Integer, default=0, nullable=False)
+    created_datetime = Column(DateTime(timezone=True), server_default=func.now())
+    finished_datetime = Column(DateTime(timezone=True), default=None)
@@ -10,10 +10,11 @@ from sqlalchemy import (
     Text,
     DateTime,
     func,
+    Index,
     UniqueConstraint,
     JSON
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import query_expression, relationship
 import enum
 
 # from sqlalchemy.orm import relationship
@@ -46,6 +47,14 @@ class Report(Base):
     votes_pos = Column(Integer, default=0, nullable=False)
     votes_neg = Column(Integer, default=0, nullable=False)
 
+    # Denormalized sum of the photos' ai_score, feed is ranked by it
+    # Kept in sync by report_crud.refreshReportFeedScore
+    feed_score = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # is_positive of the requesting user's vote, None when not voted
+    # Only loaded by queries given a viewer_id (see report_crud._withViewerVote)
+    viewer_vote = query_expression()
+
     user = relationship("User", back_populates="reports")
     address = relationship(
         "ReportAddress", back_populates="report", uselist=False, cascade="all, delete"
@@ -54,6 +63,26 @@ class Report(Base):
     votes = relationship("Vote", back_populates="report", cascade="all, delete")
     notifications = relationship("Notification", back_populates="report")
 
+    __table_args__ = (  # match the feed's ORDER BY, so pages are index range scans
+        # public feed, the predicate matches report_crud.PUBLIC_STATUSES
+        Index(
+            "ix_reports_feed_public",
+            feed_score.desc(),
+            published_datetime,
+            id,
+            postgresql_where=status.in_(
+                [ReportStatus.published, ReportStatus.in_progress]
+            ),
+        ),
+        # admin feed (every status)
+        Index(
+            "ix_reports_feed",
+            feed_score.desc(),
+            published_datetime,
+            id,
+        ),
+    )
+
 
 class ReportAddress(Base):
     __tablename__ = "reportaddresses"
@@ -71,15 +100,27 @@ class ReportAddress(Base):
 
     latitude = Column(Numeric(8, 6), default=None)  # precision up to 10cm
     longitude = Column(Numeric(9, 6), default=None)  # precision up to 10cm
+    # Derived from latitude/longitude (app.utils.geo), B-tree prefix lookups
+    # make the feed's radius/bbox filters cheap
+    geohash = Column(String(12), nullable=True)
 
     report = relationship("Report", back_populates="address")
 
+    __table_args__ = (
+        Index(
+            "ix_reportaddresses_geohash",
+            geohash,
+            postgresql_ops={"geohash": "text_pattern_ops"},  # LIKE 'prefix%'
+        ),
+    )
+
 
 class ReportPhoto(Base):
     __tablename__ = "reportphotos"
     id = Column(Integer, primary_key=True, index=True)
     report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"))
-    filename_path = Column(String, nullable=False)
+    # Content address (app/utils/photo_store.py), indexed for reference counting
+    filename_path = Column(String, nullable=False, index=True)
 
     ai_score = Column(Integer, nullable=True)
     ai_labels = Column(JSON, nullable=True)
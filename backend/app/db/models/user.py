@@ -11,7 +11,11 @@ from sqlalchemy import (
     Boolean,
     Enum,
     func,
+    Index,
+    Numeric,
     UniqueConstraint,
+    DDL,
+    event,
 )
 from sqlalchemy.orm import relationship
 
@@ -27,7 +31,7 @@ class User(Base):
     email = Column(Text, unique=True, nullable=False)
     phone_number = Column(Text, unique=True, nullable=True)
     hashed_password = Column(String, nullable=False)
-    picture_path = Column(String, nullable=True)
+    picture_path = Column(String, nullable=True, index=True)
 
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
@@ -52,8 +56,21 @@ class UserAddress(Base):
     state = Column(String, nullable=True)
     postal_code = Column(String, nullable=True)
     country = Column(String, nullable=True)
+
+    # Geocoded from the fields above (app.utils.geocoding), None until resolved
+    latitude = Column(Numeric(8, 6), default=None)
+    longitude = Column(Numeric(9, 6), default=None)
+    geohash = Column(String(12), nullable=True)
     
     user = relationship("User", back_populates="address")
+
+    __table_args__ = (
+        Index(
+            "ix_useraddresses_geohash",
+            geohash,
+            postgresql_ops={"geohash": "text_pattern_ops"},  # LIKE 'prefix%'
+        ),
+    )
     
 class UserSetting(Base):
     __tablename__ = "usersettings"
@@ -73,13 +90,41 @@ class UserSetting(Base):
     
 class Notification(Base):
     __tablename__ = "notifications"
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"))
     title = Column(String)
     note = Column(String)
-    sent_datetime = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key, a partitioned table's primary key has to include it
+    sent_datetime = Column(
+        DateTime(timezone=True), primary_key=True, server_default=func.now()
+    )
     read_datetime = Column(DateTime(timezone=True), nullable=True, default=None)
     
     user = relationship("User", back_populates="notifications")
     report = relationship("Report", back_populates="notifications")
+
+    __table_args__ = (
+        # newest first listing and its cursor pages
+        Index("ix_notifications_user_sent", user_id, sent_datetime, id),
+        # unread counts only touch unread rows
+        Index(
+            "ix_notifications_user_unread",
+            user_id,
+            postgresql_where=read_datetime.is_(None),
+        ),
+        # monthly partitions, see app.tasks.notification_retention
+        {"postgresql_partition_by": "RANGE (sent_datetime)"},
+    )
+    # ids alone are unique (one sequence), sent_datetime is only in the table key
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# Catches rows outside of the monthly partitions, and all of them in tables
+# made by create_all (tests) where no monthly partitions are created
+event.listen(
+    Notification.__table__,
+    "after_create",
+    DDL("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT")
+    .execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,38 @@
+from sqlalchemy import (
+    Column,
+    String,
+    Integer,
+    BigInteger,
+    Boolean,
+    DateTime,
+    JSON,
+    func,
+)
+
+from app.db.base import Base
+
+
+class VisionAssessment(Base):
+    """Vision results cached by the SHA-256 of the image bytes"""
+
+    __tablename__ = "visionassessments"
+    sha256 = Column(String(64), primary_key=True)
+    backend = Column(String(16), primary_key=True)  # Settings.VISION_BACKEND
+    labels = Column(JSON, nullable=False)
+    score = Column(Integer, nullable=False)
+    is_inappropriate = Column(Boolean, nullable=False)
+    created_datetime = Column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
+
+
+class VisionCacheStats(Base):
+    """Cache hit/miss counters of all assessment workers, one row per backend"""
+
+    __tablename__ = "visioncachestats"
+    backend = Column(String(16), primary_key=True)  # Settings.VISION_BACKEND
+    hits = Column(BigInteger, nullable=False, default=0)
+    misses = Column(BigInteger, nullable=False, default=0)
+    updated_datetime = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -22,7 +22,9 @@ class Vote(Base):
     __tablename__ = "votes"
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
-    report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"))
+    report_id = Column(
+        Integer, ForeignKey("reports.id", ondelete="CASCADE"), index=True
+    )
     is_positive = Column(Boolean, nullable=False)
     created_datetime = Column(DateTime(timezone=True), server_default=func.now())
 
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional
+import decimal
 
 
 class UserAddress(BaseModel):
@@ -13,6 +14,10 @@ class UserAddress(BaseModel):
     postal_code: Optional[str] = None
     country: Optional[str] = None
 
+    # geocoded from the address, None until resolved
+    latitude: Optional[decimal.Decimal] = None
+    longitude: Optional[decimal.Decimal] = None
+
 
 class UserAddressCreate(BaseModel):
     user_id: int
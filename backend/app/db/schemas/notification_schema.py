@@ -1,6 +1,6 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 import datetime
-from typing import Optional
+from typing import Optional, Self
 
 
 class Notification(BaseModel):
@@ -34,3 +34,32 @@ class NotificationUpdate(BaseModel):
 
 class UserNotifications(BaseModel):
     data: list[Notification]
+    next_cursor: Optional[str] = None  # None when the last page was returned
+
+
+class UnreadNotifications(BaseModel):
+    count: int
+
+
+class NotificationSelection(BaseModel):
+    """
+    Notifications of a bulk operation, exactly one of: the listed ids,
+    everything the listing returned before the cursor (cursor's row
+    included), or the whole inbox with all=true
+    """
+
+    ids: Optional[list[int]] = Field(default=None, min_length=1, max_length=1000)
+    # next_cursor of GET /user/me/notifications
+    before: Optional[str] = Field(default=None, min_length=1)
+    all: bool = False
+
+    @model_validator(mode="after")
+    def checkSingleSelection(self) -> Self:
+        given = [self.ids is not None, self.before is not None, self.all]
+        if given.count(True) != 1:
+            raise ValueError("Give exactly one of ids, before or all")
+        return self
+
+
+class NotificationIds(BaseModel):
+    ids: list[int]
@@ -1,10 +1,11 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 import datetime
 import decimal
 from typing import Optional
 
 from app.db.models.report import ReportStatus
 from app.db.schemas.user_schema import UserRead, UserReadFeed
+from app.utils.photo_urls import signPhotoUrl
 
 
 class ReportPhoto(BaseModel):
@@ -23,7 +24,14 @@ class ReportPhotoCreate(BaseModel):
 class ReportPhotoRead(BaseModel):
     id: int
     report_id: int
-    # filename is unneccessary
+    # filename is only used to sign the url
+    filename_path: str = Field(exclude=True)
+
+    @computed_field
+    @property
+    def url(self) -> str:
+        """Signed, expiring URL, fetching it needs no Authorization header"""
+        return signPhotoUrl(self.filename_path)
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -100,6 +108,8 @@ class ReportReadFull(BaseModel):
 
     votes_pos: int
     votes_neg: int
+    # requesting user's vote (True positive, False negative), None if not voted
+    viewer_vote: Optional[bool] = None
 
     user: UserRead
     address: ReportAddressRead
@@ -149,3 +159,19 @@ class UserReports(BaseModel):
 
 class FeedReports(BaseModel):
     data: list[ReportReadFullFeed]
+    next_cursor: Optional[str] = None  # None when the last page was returned
+
+
+class ReportCluster(BaseModel):
+    cell: str  # geohash prefix
+    count: int
+    latitude: decimal.Decimal  # centroid
+    longitude: decimal.Decimal
+    status: ReportStatus  # most common status in the cluster
+
+    model_config = ConfigDict(use_enum_values=True)
+
+
+class ReportClusters(BaseModel):
+    zoom: int
+    data: list[ReportCluster]
@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from contextlib import asynccontextmanager
+import asyncio
 from app.dependencies.common import getSettings
 
 from app.api.routers.report_router import router as report_router
@@ -14,6 +15,10 @@ from app.api.routers.settings_router import router as settings_router
 from app.api.routers.address_router import router as address_router
 
 from app.websockets import update_report
+from app.utils.renditions import shutdownRenditionPool
+from app.utils.blob_storage import closeStorages
+from app.utils.vote_buffer import getVoteBuffer
+from app.tasks.vote_flusher import runVoteFlusher
 
 
 def setupDirs():  # Creating dirs (to store photos)
@@ -25,7 +30,16 @@ def setupDirs():  # Creating dirs (to store photos)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setupDirs()
+    vote_buffer = getVoteBuffer()
+    if vote_buffer is not None:
+        stop_flusher = asyncio.Event()
+        flusher = asyncio.create_task(runVoteFlusher(vote_buffer, stop_flusher))
     yield
+    if vote_buffer is not None:
+        stop_flusher.set()
+        await flusher
+    shutdownRenditionPool()
+    await closeStorages()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -0,0 +1,89 @@
+"""
+Worker draining the assessment queue (assessmentjobs table).
+Run as a separate process: python -m app.tasks.assessment_worker
+Any number of workers may run side by side.
+Every VISION_CACHE_PRUNE_INTERVAL_SECONDS a worker also trims the vision
+assessment cache to its TTL and VISION_CACHE_MAX_ENTRIES.
+"""
+
+import asyncio
+import time
+
+from app.db.base import async_session
+from app.db.crud.job_crud import (
+    claimAssessmentJobs,
+    completeAssessmentJob,
+    failAssessmentJob,
+)
+from app.db.crud.vision_crud import pruneVisionAssessments
+from app.dependencies.common import getSettings
+from app.utils.blob_storage import closeStorages
+from app.tasks.background_assess_report import assessReport
+
+# models referenced by relationships have to be registered
+import app.db.models.report
+import app.db.models.user
+import app.db.models.vote
+
+
+async def runAssessmentJob(job_id: int, report_id: int) -> bool:
+    settings = getSettings()
+    async with async_session() as db:
+        try:
+            await assessReport(report_id, db)
+            await completeAssessmentJob(db, job_id)
+            return True
+        except Exception as e:
+            print(f"[ASSESSMENT WORKER] job {job_id} failed: {e!r}")
+            await db.rollback()
+            await failAssessmentJob(
+                db,
+                job_id,
+                repr(e),
+                max_attempts=settings.ASSESSMENT_MAX_ATTEMPTS,
+                backoff_seconds=settings.ASSESSMENT_RETRY_BACKOFF_SECONDS,
+            )
+            return False
+
+
+async def pruneVisionCache() -> int:
+    settings = getSettings()
+    async with async_session() as db:
+        pruned = await pruneVisionAssessments(
+            db, settings.VISION_CACHE_TTL_SECONDS, settings.VISION_CACHE_MAX_ENTRIES
+        )
+        await db.commit()
+    return pruned
+
+
+async def runAssessmentWorker(stop: asyncio.Event | None = None):
+    settings = getSettings()
+    stop = stop or asyncio.Event()
+    print("[ASSESSMENT WORKER] started")
+    next_prune = time.monotonic()
+    while not stop.is_set():
+        if time.monotonic() >= next_prune:
+            next_prune = time.monotonic() + settings.VISION_CACHE_PRUNE_INTERVAL_SECONDS
+            try:
+                pruned = await pruneVisionCache()
+                print(f"[ASSESSMENT WORKER] pruned {pruned} vision cache entries")
+            except Exception as e:
+                print(f"[ASSESSMENT WORKER] vision cache prune failed: {e!r}")
+        async with async_session() as db:
+            jobs = await claimAssessmentJobs(
+                db, settings.ASSESSMENT_BATCH_SIZE, settings.ASSESSMENT_LEASE_SECONDS
+            )
+        for job in jobs:
+            await runAssessmentJob(job.id, job.report_id)
+        if not jobs:
+            try:
+                await asyncio.wait_for(
+                    stop.wait(), timeout=settings.ASSESSMENT_POLL_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                pass
+    await closeStorages()
+
+
+if __name__ == "__main__":
+    asyncio.run(runAssessmentWorker())
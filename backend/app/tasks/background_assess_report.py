@@ -1,21 +1,30 @@
+from contextlib import AsyncExitStack
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.utils.vision import get_photo_label_and_score
-from app.dependencies.common import getSettings
-from app.db.models.report import Report, ReportStatus
-from app.db.base import getSession
+from app.utils.vision import assess_photos
+from app.utils.blob_storage import getReportStorage
+from app.db.models.report import ReportStatus
+from app.db.crud.report_crud import getReportByID, refreshReportFeedScore
 
 
-async def assessReport(report: Report, db: AsyncSession):
-    print("Asses report started")
-    settings = getSettings()
+async def assessReport(report_id: int, db: AsyncSession):
+    report = await getReportByID(db, report_id, full=True)
+    if report is None:  # deleted while the job was queued
+        return
+    storage = getReportStorage()
     inappropriate_found = False
-    for photo in report.photos:
-        labels, score, is_inappropriate = await get_photo_label_and_score(
-            str(settings.REPORT_PHOTOS / photo.filename_path)
+    async with AsyncExitStack() as stack:
+        # Local files as they are, remote blobs downloaded for the classifier
+        paths = [
+            await stack.enter_async_context(storage.localCopy(photo.filename_path))
+            for photo in report.photos
+        ]
+        assessments = await assess_photos(  # one Vision round trip per 16 photos
+            [str(path) for path in paths],
+            db=db,  # previously assessed images are served from the cache
         )
+    for photo, (labels, score, is_inappropriate) in zip(report.photos, assessments):
         photo.ai_score = score
         photo.ai_labels = labels
-        db.add(photo)
 
         print(
             f"[PHOTO {photo.id}] Labels: {labels}\nScore: {score}\nIs inappropriate: {is_inappropriate}"
@@ -25,5 +34,6 @@ async def assessReport(report: Report, db: AsyncSession):
     if inappropriate_found:
         report.status = ReportStatus.cancelled
         report.admin_note = "Jeden z vložených obrázkov bol automaticky ohodnotený ako nevhodný. Čaká sa na kontrolu správcom."
-        db.add(report)
+    await db.flush()
+    await refreshReportFeedScore(db, report.id)
     await db.commit()
@@ -0,0 +1,21 @@
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud.address_crud import getAddress
+from app.utils.geocoding import geocodeAddress, getGeocoder
+
+
+async def geocodeUserAddress(user_id: int, db: AsyncSession):
+    geocoder = getGeocoder()
+    if geocoder is None:
+        return
+    address = await getAddress(db, user_id)
+    if address is None or address.latitude is not None:
+        return
+    try:
+        await geocodeAddress(db, address, geocoder)
+    except httpx.HTTPError as e:
+        print("Error while geocoding address: ", e)
+        await db.rollback()
+        return
+    await db.commit()
@@ -4,25 +4,48 @@ from app.dependencies.common import getSettings
 from app.db.models.report import Report, ReportStatus
 from app.db.models.vote import Vote
 from app.db.base import getSession
-from app.db.crud.user_crud import getAllUsers, getUserByID
+from app.db.crud.user_crud import getUserByID
 from app.db.crud.report_crud import getReportByID
-from app.db.crud.notifications_crud import createNotification
+from app.db.crud.notifications_crud import (
+    createNotification,
+    fanOutNotifications,
+    localUsers,
+)
 from app.db.schemas.notification_schema import NotificationCreate
 
 
 async def notifyReport(report: Report, db: AsyncSession):
-    users = await getAllUsers(db, True)
-    for user in users:
-        if user.settings.is_notification_allowed:
-            notification = await createNotification(
-                db,
-                NotificationCreate(
-                    user_id=user.id,
-                    report_id=report.id,
-                    title="Nová správa vo vašom okolí!",
-                    note="Pozrite si správy vo svojej oblasti na domovskej obrazovke.",
-                ),
-            )
+    """
+    Notifies users living near the report (is_local_notification), with
+    one set-based INSERT ... SELECT and commit per batch of users
+    """
+    settings = getSettings()
+    address = report.address
+    if address is None or address.latitude is None or address.longitude is None:
+        return
+    recipients = localUsers(
+        float(address.latitude),
+        float(address.longitude),
+        settings.LOCAL_NOTIFICATION_RADIUS,
+    )
+    batch_size = settings.NOTIFY_FANOUT_BATCH_SIZE
+    sent, after_user_id = 0, 0
+    while True:
+        inserted, last_user_id = await fanOutNotifications(
+            db,
+            recipients,
+            report.id,
+            title="Nová správa vo vašom okolí!",
+            note="Pozrite si správy vo svojej oblasti na domovskej obrazovke.",
+            after_user_id=after_user_id,
+            batch_size=batch_size,
+        )
+        await db.commit()
+        if last_user_id is None:
+            break
+        sent += inserted
+        after_user_id = last_user_id
+        print(f"[NOTIFY] report {report.id}: {sent} notifications sent")
 
 
 async def notifyVote(report_id: int, db: AsyncSession):
@@ -0,0 +1,68 @@
+"""
+Geocodes user addresses saved without coordinates (the ones existing before
+local notifications, or whose background geocoding failed).
+Run once after the migration: python -m app.tasks.geocode_addresses
+Requests to the geocoder are spaced by GEOCODER_MIN_INTERVAL_SECONDS.
+Needs GEOCODER set (it is "none" by default).
+"""
+
+import asyncio
+from dataclasses import dataclass
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import async_session
+from app.db.crud.address_crud import getUngeocodedAddresses
+from app.utils.geocoding import Geocoder, geocodeAddress, getGeocoder
+
+# models referenced by relationships have to be registered
+import app.db.models.report
+import app.db.models.user
+import app.db.models.vote
+
+BATCH_SIZE = 100
+
+
+@dataclass
+class GeocodeStats:
+    resolved: int = 0
+    not_found: int = 0
+    failed: int = 0
+
+
+async def geocodeMissingAddresses(
+    db: AsyncSession, geocoder: Geocoder, batch_size: int = BATCH_SIZE
+) -> GeocodeStats:
+    stats = GeocodeStats()
+    after_id = 0
+    while addresses := await getUngeocodedAddresses(db, after_id, batch_size):
+        for address in addresses:
+            try:
+                if await geocodeAddress(db, address, geocoder):
+                    stats.resolved += 1
+                else:
+                    stats.not_found += 1
+            except httpx.HTTPError as e:
+                print(f"[GEOCODE] address {address.id} failed: {e}")
+                stats.failed += 1
+        await db.commit()
+        after_id = addresses[-1].id
+        print(
+            f"[GEOCODE] resolved {stats.resolved}, not found {stats.not_found}, "
+            f"failed {stats.failed}"
+        )
+    return stats
+
+
+async def main():
+    geocoder = getGeocoder()  # throttled, see app/utils/geocoding.py
+    if geocoder is None:
+        print("[GEOCODE] GEOCODER is none, nothing to do")
+        return
+    async with async_session() as db:
+        await geocodeMissingAddresses(db, geocoder)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
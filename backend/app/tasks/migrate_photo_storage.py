@@ -0,0 +1,78 @@
+"""
+Move photos stored under flat uuid names in REPORT_PHOTOS / USER_PHOTOS
+into the content-addressed layout of app/utils/photo_store.py (on the
+configured PHOTO_STORAGE) and point the DB rows at the new names.
+Run once after deploying: python -m app.tasks.migrate_photo_storage
+Safe to interrupt and re-run, blobs are stored first, old files are only
+removed after the rows pointing to them were committed.
+"""
+
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import distinct, update
+from sqlalchemy.future import select
+from starlette.concurrency import run_in_threadpool
+
+from app.db.base import async_session
+from app.db.models.report import ReportPhoto
+from app.db.models.user import User
+from app.dependencies.common import getSettings
+from app.utils.blob_storage import (
+    BlobStorage,
+    closeStorages,
+    getReportStorage,
+    getUserStorage,
+)
+from app.utils.photo_store import isBlobName, storeExistingFile
+from app.utils.renditions import RENDITION_SIZES, renditionFilename
+
+# models referenced by relationships have to be registered
+import app.db.models.vote
+
+
+def _removeLegacyFiles(root: Path, name: str) -> None:
+    for size in ["original", *RENDITION_SIZES]:
+        (root / renditionFilename(name, size)).unlink(missing_ok=True)
+
+
+async def migrateColumn(
+    column, root: Path, storage: BlobStorage, batch_size: int = 500
+) -> dict:
+    stats = {"migrated": 0, "missing": 0}
+    async with async_session() as db:
+        names = (await db.scalars(select(distinct(column)))).all()
+        legacy = [name for name in names if name and not isBlobName(name)]
+        for start in range(0, len(legacy), batch_size):
+            moved = {}
+            for name in legacy[start : start + batch_size]:
+                new_name = await storeExistingFile(root, name, storage)
+                if new_name is None:
+                    print(f"[PHOTO MIGRATION] {root / name} does not exist")
+                    stats["missing"] += 1
+                    continue
+                moved[name] = new_name
+                await db.execute(
+                    update(column.class_)
+                    .where(column == name)
+                    .values({column.key: new_name})
+                )
+            await db.commit()
+            for name in moved:
+                await run_in_threadpool(_removeLegacyFiles, root, name)
+            stats["migrated"] += len(moved)
+            print(f"[PHOTO MIGRATION] {column}: {stats}")
+    return stats
+
+
+async def migratePhotoStorage() -> None:
+    settings = getSettings()
+    await migrateColumn(
+        ReportPhoto.filename_path, settings.REPORT_PHOTOS, getReportStorage()
+    )
+    await migrateColumn(User.picture_path, settings.USER_PHOTOS, getUserStorage())
+    await closeStorages()
+
+
+if __name__ == "__main__":
+    asyncio.run(migratePhotoStorage())
@@ -0,0 +1,97 @@
+"""
+Monthly partitions of the notifications table. Run as a separate process:
+python -m app.tasks.notification_retention
+Add --once to do a single pass (e.g. from cron) instead of looping.
+
+Every pass creates the partitions of the current month and the next
+NOTIFICATION_PARTITIONS_AHEAD months, so new notifications never land in the
+default partition, and drops whole partitions older than
+NOTIFICATION_RETENTION_MONTHS instead of deleting expired rows one by one.
+"""
+
+import asyncio
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import async_session
+from app.db.crud.notifications_crud import (
+    createNotificationPartition,
+    dropNotificationPartitions,
+    getNotificationPartitions,
+)
+from app.dependencies.common import getSettings
+from app.utils.partitions import (
+    addMonths,
+    monthStart,
+    notificationPartitionName,
+    notificationRetentionStart,
+)
+
+# models referenced by relationships have to be registered
+import app.db.models.report
+import app.db.models.user
+import app.db.models.vote
+
+
+@dataclass
+class RetentionStats:
+    created: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+    expired: int = 0  # rows deleted from the default partition
+
+
+async def maintainNotificationPartitions(
+    db: AsyncSession, now: datetime, months_ahead: int
+) -> RetentionStats:
+    """One transaction per partition change, DDL locks the whole table"""
+    stats = RetentionStats()
+    existing = set(await getNotificationPartitions(db))
+    current = monthStart(now)
+    for offset in range(months_ahead + 1):
+        month = addMonths(current, offset)
+        if notificationPartitionName(month) in existing:
+            continue
+        await createNotificationPartition(db, month)
+        await db.commit()
+        stats.created.append(notificationPartitionName(month))
+
+    retention_start = notificationRetentionStart(now)
+    if retention_start is not None:
+        stats.dropped, stats.expired = await dropNotificationPartitions(
+            db, retention_start
+        )
+        await db.commit()
+    return stats
+
+
+async def runNotificationRetention(
+    once: bool = False, stop: asyncio.Event | None = None
+):
+    settings = getSettings()
+    stop = stop or asyncio.Event()
+    print("[NOTIFICATION RETENTION] started")
+    while not stop.is_set():
+        async with async_session() as db:
+            stats = await maintainNotificationPartitions(
+                db, datetime.now(timezone.utc), settings.NOTIFICATION_PARTITIONS_AHEAD
+            )
+        print(
+            f"[NOTIFICATION RETENTION] created {stats.created}, "
+            f"dropped {stats.dropped}, deleted {stats.expired} expired rows"
+        )
+        if once:
+            break
+        try:
+            await asyncio.wait_for(
+                stop.wait(), timeout=settings.NOTIFICATION_RETENTION_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+if __name__ == "__main__":
+    asyncio.run(runNotificationRetention(once="--once" in sys.argv))
@@ -0,0 +1,164 @@
+"""
+Sweeper deleting photo blobs nothing references any more (failed report
+creations, replaced profile pictures, deleted reports, pre-dedup leftovers).
+Run as a separate process: python -m app.tasks.photo_gc
+Add --once to do a single pass (e.g. from cron) instead of looping.
+
+The storage listing is streamed in batches of PHOTO_GC_BATCH_SIZE blobs,
+each batch is checked against the DB with a single query, the full listing
+is never held in memory.
+"""
+
+import asyncio
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.db.base import async_session
+from app.db.crud.photo_crud import getReferencedPhotos
+from app.dependencies.common import getSettings
+from app.utils.blob_storage import (
+    BlobInfo,
+    BlobStorage,
+    closeStorages,
+    getReportStorage,
+    getUserStorage,
+)
+from app.utils.renditions import renditionOwner
+
+# models referenced by relationships have to be registered
+import app.db.models.report
+import app.db.models.user
+import app.db.models.vote
+
+
+@dataclass
+class GCStats:
+    scanned: int = 0
+    deleted: int = 0
+    bytes_reclaimed: int = 0
+
+
+async def _batches(
+    blobs: AsyncIterator[BlobInfo], batch_size: int
+) -> AsyncIterator[list[BlobInfo]]:
+    batch = []
+    async for blob in blobs:
+        batch.append(blob)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _sweepIncoming(incoming: Path, grace_seconds: int, dry_run: bool) -> GCStats:
+    """Local temp files of uploads interrupted before they were stored"""
+    stats = GCStats()
+    if not incoming.is_dir():
+        return stats
+    now = time.time()
+    for path in incoming.iterdir():
+        stat_result = path.stat()
+        stats.scanned += 1
+        if now - stat_result.st_mtime < grace_seconds:
+            continue
+        if not dry_run:
+            path.unlink(missing_ok=True)
+        stats.deleted += 1
+        stats.bytes_reclaimed += stat_result.st_size
+    return stats
+
+
+async def _lastWrite(storage: BlobStorage, blob: BlobInfo) -> float:
+    """mtime of the blob, a rendition is kept while its original is fresh"""
+    mtime = blob.mtime
+    owner = renditionOwner(blob.name)
+    if owner != blob.name:
+        owner_info = await storage.stat(owner)
+        if owner_info is not None:
+            mtime = max(mtime, owner_info.mtime)
+    return mtime
+
+
+async def collectPhotoGarbage(
+    db: AsyncSession,
+    storage: BlobStorage,
+    batch_size: int,
+    grace_seconds: int,
+    dry_run: bool = False,
+) -> GCStats:
+    """Delete unreferenced blobs older than grace_seconds"""
+    stats = GCStats()
+    async for batch in _batches(storage.list(), batch_size):
+        stats.scanned += len(batch)
+        referenced = await getReferencedPhotos(
+            db, list({renditionOwner(blob.name) for blob in batch})
+        )
+        await db.rollback()  # do not keep a transaction open while deleting
+        now = time.time()
+        for blob in batch:
+            owner = renditionOwner(blob.name)
+            if owner in referenced:
+                continue
+            if now - await _lastWrite(storage, blob) < grace_seconds:
+                continue
+            # The listing is older than the reference query, a dedup upload
+            # (storage.touch) whose reference was committed after it shows
+            # only in a fresh stat, like in photo_store.releasePhoto
+            fresh = await storage.stat(blob.name)
+            if fresh is None:
+                continue
+            if time.time() - await _lastWrite(storage, fresh) < grace_seconds:
+                continue
+            if not dry_run:
+                await storage.delete(blob.name)
+            stats.deleted += 1
+            stats.bytes_reclaimed += blob.size
+
+    incoming = await run_in_threadpool(
+        _sweepIncoming, storage.incoming, grace_seconds, dry_run
+    )
+    stats.scanned += incoming.scanned
+    stats.deleted += incoming.deleted
+    stats.bytes_reclaimed += incoming.bytes_reclaimed
+    return stats
+
+
+async def runPhotoGC(once: bool = False, stop: asyncio.Event | None = None):
+    settings = getSettings()
+    stop = stop or asyncio.Event()
+    print("[PHOTO GC] started")
+    while not stop.is_set():
+        # report and user photos may share the same storage
+        storages = {s.location: s for s in (getReportStorage(), getUserStorage())}
+        for location, storage in storages.items():
+            async with async_session() as db:
+                stats = await collectPhotoGarbage(
+                    db,
+                    storage,
+                    settings.PHOTO_GC_BATCH_SIZE,
+                    settings.PHOTO_DELETE_GRACE_SECONDS,
+                )
+            print(
+                f"[PHOTO GC] {location}: scanned {stats.scanned} files, deleted "
+                f"{stats.deleted}, reclaimed {stats.bytes_reclaimed} bytes"
+            )
+        if once:
+            break
+        try:
+            await asyncio.wait_for(
+                stop.wait(), timeout=settings.PHOTO_GC_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+    await closeStorages()
+
+
+if __name__ == "__main__":
+    asyncio.run(runPhotoGC(once="--once" in sys.argv))
@@ -0,0 +1,49 @@
+"""
+Writes the vote counter deltas collected in app.utils.vote_buffer to the
+reports table, used when VOTE_COUNTER_MODE is "buffered". Runs inside every
+API process (the buffer is per process), started by the app lifespan.
+
+A burst of votes on one report turns into a single UPDATE of its row per
+VOTE_FLUSH_INTERVAL_MS instead of every vote queueing for the row lock.
+Counters read by the feed and report endpoints lag behind by at most one
+interval.
+"""
+
+import asyncio
+
+from app.db.base import async_session
+from app.db.crud.vote_crud import applyVoteCounterDeltas
+from app.dependencies.common import getSettings
+from app.utils.vote_buffer import VoteCounterBuffer
+from app.websockets.update_report import manager as updateReportManager
+
+
+async def flushVoteCounters(buffer: VoteCounterBuffer) -> int:
+    """Returns how many reports were updated"""
+    deltas = buffer.drain()
+    if not deltas:
+        return 0
+    try:
+        async with async_session() as db:
+            await applyVoteCounterDeltas(db, deltas)
+            await db.commit()
+    except Exception as e:
+        print("[VOTE FLUSHER] flush failed, retrying on the next one: ", e)
+        buffer.restore(deltas)
+        return 0
+    for report_id in deltas:
+        try:
+            await updateReportManager.broadcastUpdateReport({"report_id": report_id})
+        except Exception as e:
+            print("Error while broadcasting report to WS: ", e)
+    return len(deltas)
+
+
+async def runVoteFlusher(buffer: VoteCounterBuffer, stop: asyncio.Event):
+    interval = getSettings().VOTE_FLUSH_INTERVAL_MS / 1000
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        await flushVoteCounters(buffer)  # a last flush on shutdown too
@@ -0,0 +1,121 @@
+"""
+Reconciliation of the denormalized reports.votes_pos / votes_neg counters
+with the votes table. Run as a separate process:
+python -m app.tasks.vote_reconcile
+Add --once to do a single pass (e.g. from cron) instead of looping.
+
+Reports are walked by id in batches of VOTE_RECONCILE_BATCH_SIZE. Each batch
+is compared with the vote counts without taking locks, only the drifted
+reports are locked and rewritten, one short transaction per batch.
+
+With VOTE_COUNTER_MODE="buffered" a report with deltas still waiting in an
+API process' buffer looks drifted too. Drifted reports are then measured
+again after VOTE_RECONCILE_SETTLE_SECONDS (many flush intervals), only the
+ones whose counters and votes did not move in between are lost deltas, and
+those are corrected with a compare-and-set instead of a recount.
+"""
+
+import asyncio
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import async_session
+from app.db.crud.vote_crud import (
+    checkVoteCounters,
+    fixVoteCounters,
+    getVoteCounters,
+    settleVoteCounters,
+)
+from app.dependencies.common import getSettings
+
+# models referenced by relationships have to be registered
+import app.db.models.report
+import app.db.models.user
+import app.db.models.vote
+
+
+@dataclass
+class ReconcileStats:
+    checked: int = 0
+    corrected: int = 0
+
+
+async def reconcileVoteCounters(
+    db: AsyncSession,
+    batch_size: int,
+    dry_run: bool = False,
+    settle_seconds: Optional[float] = None,
+) -> ReconcileStats:
+    """settle_seconds is required when counters are buffered, see above"""
+    stats = ReconcileStats()
+    observed = {}  # drifted reports waiting for the settle check
+    after_id = 0
+    while True:
+        checked = await checkVoteCounters(db, after_id, batch_size)
+        if not checked:
+            break
+        stats.checked += len(checked)
+        drifted = [report_id for report_id, is_drifted in checked if is_drifted]
+        if settle_seconds is not None:
+            observed.update(await getVoteCounters(db, drifted))
+            await db.rollback()
+        elif dry_run:
+            stats.corrected += len(drifted)
+            await db.rollback()
+        else:
+            stats.corrected += await fixVoteCounters(db, drifted)
+            await db.commit()
+        after_id = checked[-1][0]
+
+    if not observed:
+        return stats
+    # Buffered deltas of votes before the first look are flushed by now
+    await asyncio.sleep(settle_seconds)
+    report_ids = sorted(observed)
+    for start in range(0, len(report_ids), batch_size):
+        current = await getVoteCounters(db, report_ids[start : start + batch_size])
+        stable = {
+            report_id: counters
+            for report_id, counters in current.items()
+            if observed[report_id] == counters
+        }
+        if dry_run:
+            stats.corrected += len(stable)
+            await db.rollback()
+        else:
+            stats.corrected += await settleVoteCounters(db, stable)
+            await db.commit()
+    return stats
+
+
+async def runVoteReconcile(once: bool = False, stop: asyncio.Event | None = None):
+    settings = getSettings()
+    stop = stop or asyncio.Event()
+    settle_seconds = None
+    if settings.VOTE_COUNTER_MODE == "buffered":
+        settle_seconds = settings.VOTE_RECONCILE_SETTLE_SECONDS
+    print("[VOTE RECONCILE] started")
+    while not stop.is_set():
+        async with async_session() as db:
+            stats = await reconcileVoteCounters(
+                db, settings.VOTE_RECONCILE_BATCH_SIZE, settle_seconds=settle_seconds
+            )
+        print(
+            f"[VOTE RECONCILE] checked {stats.checked} reports, "
+            f"corrected {stats.corrected}"
+        )
+        if once:
+            break
+        try:
+            await asyncio.wait_for(
+                stop.wait(), timeout=settings.VOTE_RECONCILE_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+if __name__ == "__main__":
+    asyncio.run(runVoteReconcile(once="--once" in sys.argv))
@@ -0,0 +1,107 @@
+"""
+Weekly digest of new nearby reports for users with is_weekly_notification.
+Run as a separate process: python -m app.tasks.weekly_digest
+Add --once to do a single pass (e.g. from a weekly cron) instead of looping.
+
+Every pass covers the last full week (Monday to Monday, UTC). Users are
+walked by id in batches of WEEKLY_DIGEST_BATCH_SIZE, each batch is a single
+INSERT ... SELECT matching users with the week's reports. The last user id
+is committed with the batch (digestruns table), an interrupted pass resumes
+where it stopped and a finished week is never sent twice.
+"""
+
+import asyncio
+import sys
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.base import async_session
+from app.db.crud.digest_crud import DIGEST_PERIOD, insertWeeklyDigests, lockDigestRun
+from app.dependencies.common import getSettings
+
+# models referenced by relationships have to be registered
+import app.db.models.report
+import app.db.models.user
+import app.db.models.vote
+
+
+@dataclass
+class DigestStats:
+    last_user_id: int = 0
+    digests: int = 0
+    already_finished: bool = False
+
+
+def digestPeriodStart(now: datetime) -> datetime:
+    """Monday 00:00 UTC starting the last full week before now"""
+    now = now.astimezone(timezone.utc)
+    monday = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(
+        days=now.weekday()
+    )
+    return monday - DIGEST_PERIOD
+
+
+async def sendWeeklyDigests(
+    db: AsyncSession, period_start: datetime, radius: float, batch_size: int
+) -> DigestStats:
+    stats = DigestStats()
+    while True:
+        run = await lockDigestRun(db, period_start)
+        stats.last_user_id = run.last_user_id
+        if run.finished_datetime is not None:
+            await db.rollback()
+            stats.already_finished = True
+            return stats
+        last_user_id, digests = await insertWeeklyDigests(
+            db, period_start, radius, run.last_user_id, batch_size
+        )
+        if last_user_id == 0:
+            run.finished_datetime = func.now()
+        else:
+            run.last_user_id = last_user_id
+            run.digests += digests
+            stats.last_user_id = last_user_id
+            stats.digests += digests
+        await db.commit()  # digests and progress go in together
+        if last_user_id == 0:
+            return stats
+        print(
+            f"[WEEKLY DIGEST] {period_start:%Y-%m-%d}: users up to id "
+            f"{last_user_id} done, {stats.digests} digests sent"
+        )
+
+
+async def runWeeklyDigest(once: bool = False, stop: asyncio.Event | None = None):
+    settings = getSettings()
+    stop = stop or asyncio.Event()
+    print("[WEEKLY DIGEST] started")
+    while not stop.is_set():
+        period_start = digestPeriodStart(datetime.now(timezone.utc))
+        async with async_session() as db:
+            stats = await sendWeeklyDigests(
+                db,
+                period_start,
+                settings.LOCAL_NOTIFICATION_RADIUS,
+                settings.WEEKLY_DIGEST_BATCH_SIZE,
+            )
+        if not stats.already_finished:
+            print(
+                f"[WEEKLY DIGEST] {period_start:%Y-%m-%d}: finished, "
+                f"{stats.digests} digests sent"
+            )
+        if once:
+            break
+        # a finished week is skipped, the check is cheap
+        try:
+            await asyncio.wait_for(
+                stop.wait(), timeout=settings.WEEKLY_DIGEST_CHECK_INTERVAL_SECONDS
+            )
+        except asyncio.TimeoutError:
+            pass
+
+
+if __name__ == "__main__":
+    asyncio.run(runWeeklyDigest(once="--once" in sys.argv))
@@ -0,0 +1,381 @@
+"""
+Where photo blobs live, selected by Settings.PHOTO_STORAGE:
+- "local": files under REPORT_PHOTOS / USER_PHOTOS, a single node's disk
+- "s3": an S3-compatible bucket (AWS, MinIO, ...), shared by every replica,
+  needs the S3_* settings. aiobotocore is in requirements.txt (docker-compose
+  runs MinIO), it is only imported when this storage is used.
+Blob names are the relative names saved in the DB (see app/utils/photo_store.py).
+"""
+
+import asyncio
+import os
+import tempfile
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+
+from app.dependencies.common import getSettings
+
+INCOMING_DIR = ".incoming"  # uploads in progress, never listed as blobs
+
+
+@dataclass
+class BlobInfo:
+    name: str
+    size: int
+    mtime: float  # unix timestamp of the last write (or touch)
+
+
+class BlobStorage(ABC):
+    # Local directory for files on their way in (must be on the same
+    # filesystem as the blobs for LocalBlobStorage, see put)
+    incoming: Path
+
+    @property
+    @abstractmethod
+    def location(self) -> str:
+        """Identifies where the blobs are, equal for storages sharing them"""
+
+    def localPath(self, name: str) -> Optional[Path]:
+        """Path of the blob on this node's disk, None when it is remote"""
+        return None
+
+    @abstractmethod
+    async def stat(self, name: str) -> Optional[BlobInfo]:
+        """None when the blob does not exist"""
+
+    @abstractmethod
+    async def put(self, name: str, source: Path) -> None:
+        """Store the local file source as name, source is consumed"""
+
+    @abstractmethod
+    async def touch(self, name: str) -> None:
+        """Refresh the mtime (see photo_store.releasePhoto)"""
+
+    @abstractmethod
+    async def delete(self, name: str) -> None:
+        """No error when the blob does not exist"""
+
+    @abstractmethod
+    def read(
+        self, name: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream bytes start..end (inclusive, None for the rest) of the blob"""
+
+    @abstractmethod
+    def list(self) -> AsyncIterator[BlobInfo]:
+        """Every blob, streamed (the listing is never held in memory)"""
+
+    async def close(self) -> None: ...
+
+    @asynccontextmanager
+    async def localCopy(self, name: str) -> AsyncIterator[Path]:
+        """A local file with the blob's content, for code that needs a path"""
+        self.incoming.mkdir(parents=True, exist_ok=True)
+        path = self.incoming / f"{uuid.uuid4().hex}{Path(name).suffix}"
+        try:
+            async with await anyio.open_file(path, "wb") as f:
+                async for chunk in self.read(name):
+                    await f.write(chunk)
+            yield path
+        finally:
+            path.unlink(missing_ok=True)
+
+
+def _walkFiles(root: Path, directory: Path) -> Iterator[BlobInfo]:
+    """Depth-first over root, one directory handle open per level"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if directory == root and entry.name == INCOMING_DIR:
+                    continue
+                yield from _walkFiles(root, Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                stat_result = entry.stat(follow_symlinks=False)
+                yield BlobInfo(
+                    name=Path(entry.path).relative_to(root).as_posix(),
+                    size=stat_result.st_size,
+                    mtime=stat_result.st_mtime,
+                )
+
+
+def _nextBatch(files: Iterator[BlobInfo], batch_size: int) -> list[BlobInfo]:
+    return list(islice(files, batch_size))
+
+
+def _putFile(source: Path, target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(source, target)  # atomic within the filesystem
+
+
+class LocalBlobStorage(BlobStorage):
+    def __init__(self, root: Path, chunk_size: int = 1024 * 1024):
+        self.root = root
+        self.incoming = root / INCOMING_DIR
+        self.chunk_size = chunk_size
+
+    @property
+    def location(self) -> str:
+        return str(self.root.resolve())
+
+    def localPath(self, name: str) -> Path:
+        return self.root / name
+
+    async def stat(self, name: str) -> Optional[BlobInfo]:
+        try:
+            stat_result = await run_in_threadpool(os.stat, self.localPath(name))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return BlobInfo(name=name, size=stat_result.st_size, mtime=stat_result.st_mtime)
+
+    async def put(self, name: str, source: Path) -> None:
+        await run_in_threadpool(_putFile, source, self.localPath(name))
+
+    async def touch(self, name: str) -> None:
+        await run_in_threadpool(os.utime, self.localPath(name))
+
+    async def delete(self, name: str) -> None:
+        await run_in_threadpool(self.localPath(name).unlink, missing_ok=True)
+
+    async def read(
+        self, name: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        remaining = None if end is None else end - start + 1
+        async with await anyio.open_file(self.localPath(name), "rb") as f:
+            await f.seek(start)
+            while remaining is None or remaining > 0:
+                size = (
+                    self.chunk_size
+                    if remaining is None
+                    else min(self.chunk_size, remaining)
+                )
+                chunk = await f.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    async def list(self) -> AsyncIterator[BlobInfo]:
+        if not self.root.is_dir():
+            return
+        files = _walkFiles(self.root, self.root)
+        while batch := await run_in_threadpool(_nextBatch, files, 1000):
+            for info in batch:
+                yield info
+
+    @asynccontextmanager
+    async def localCopy(self, name: str) -> AsyncIterator[Path]:
+        yield self.localPath(name)  # already local, nothing to copy
+
+
+class S3BlobStorage(BlobStorage):
+    """
+    Blobs are objects under prefix in bucket. Works against AWS S3 and
+    S3-compatible servers (MinIO for local development, see docker-compose).
+    """
+
+    # S3 multipart parts must be at least 5 MB (except the last one)
+    PART_SIZE = 8 * 1024 * 1024
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        chunk_size: int = 1024 * 1024,
+    ):
+        # botocore is slow to import, processes using local storage skip it
+        from aiobotocore.session import get_session
+        from botocore.exceptions import ClientError
+
+        self._session = get_session()
+        self._client_error = ClientError
+        self._client_options = dict(
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+        )
+        self._client_context = None
+        self._client = None
+        self._client_lock = asyncio.Lock()
+        self.bucket = bucket
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.incoming = Path(tempfile.gettempdir()) / "photo-uploads"
+
+    @property
+    def location(self) -> str:
+        return f"s3://{self.bucket}/{self.prefix}"
+
+    async def _getClient(self):
+        # One client (and connection pool) per process, created on first use
+        async with self._client_lock:
+            if self._client is None:
+                context = self._session.create_client("s3", **self._client_options)
+                client = await context.__aenter__()
+                try:
+                    await client.head_bucket(Bucket=self.bucket)
+                except self._client_error:  # fresh MinIO without the bucket
+                    await client.create_bucket(Bucket=self.bucket)
+                self._client_context, self._client = context, client
+        return self._client
+
+    def _key(self, name: str) -> str:
+        return self.prefix + name
+
+    def _isMissing(self, error) -> bool:
+        code = error.response.get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    async def stat(self, name: str) -> Optional[BlobInfo]:
+        client = await self._getClient()
+        try:
+            head = await client.head_object(Bucket=self.bucket, Key=self._key(name))
+        except self._client_error as e:
+            if self._isMissing(e):
+                return None
+            raise
+        return BlobInfo(
+            name=name,
+            size=head["ContentLength"],
+            mtime=head["LastModified"].timestamp(),
+        )
+
+    async def put(self, name: str, source: Path) -> None:
+        client = await self._getClient()
+        key = self._key(name)
+        try:
+            async with await anyio.open_file(source, "rb") as f:
+                chunk = await f.read(self.PART_SIZE)
+                next_chunk = await f.read(self.PART_SIZE)
+                if not next_chunk:  # fits into a single request
+                    await client.put_object(Bucket=self.bucket, Key=key, Body=chunk)
+                    return
+                upload = await client.create_multipart_upload(
+                    Bucket=self.bucket, Key=key
+                )
+                parts = []
+                try:
+                    while chunk:
+                        part = await client.upload_part(
+                            Bucket=self.bucket,
+                            Key=key,
+                            UploadId=upload["UploadId"],
+                            PartNumber=len(parts) + 1,
+                            Body=chunk,
+                        )
+                        parts.append(
+                            {"ETag": part["ETag"], "PartNumber": len(parts) + 1}
+                        )
+                        chunk, next_chunk = next_chunk, await f.read(self.PART_SIZE)
+                    await client.complete_multipart_upload(
+                        Bucket=self.bucket,
+                        Key=key,
+                        UploadId=upload["UploadId"],
+                        MultipartUpload={"Parts": parts},
+                    )
+                except BaseException:
+                    await client.abort_multipart_upload(
+                        Bucket=self.bucket, Key=key, UploadId=upload["UploadId"]
+                    )
+                    raise
+        finally:
+            source.unlink(missing_ok=True)
+
+    async def touch(self, name: str) -> None:
+        # Copying an object onto itself is the only way to bump LastModified
+        client = await self._getClient()
+        key = self._key(name)
+        await client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE",
+        )
+
+    async def delete(self, name: str) -> None:
+        client = await self._getClient()
+        await client.delete_object(Bucket=self.bucket, Key=self._key(name))
+
+    async def read(
+        self, name: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        client = await self._getClient()
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = await client.get_object(
+            Bucket=self.bucket, Key=self._key(name), Range=byte_range
+        )
+        async with response["Body"] as body:
+            while chunk := await body.read(self.chunk_size):
+                yield chunk
+
+    async def list(self) -> AsyncIterator[BlobInfo]:
+        client = await self._getClient()
+        paginator = client.get_paginator("list_objects_v2")  # 1000 keys a page
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                yield BlobInfo(
+                    name=item["Key"].removeprefix(self.prefix),
+                    size=item["Size"],
+                    mtime=item["LastModified"].timestamp(),
+                )
+
+    async def close(self) -> None:
+        if self._client_context is not None:
+            await self._client_context.__aexit__(None, None, None)
+            self._client_context, self._client = None, None
+
+
+_s3_storages: dict[str, S3BlobStorage] = {}  # one client per prefix and process
+
+
+def _getStorage(root: Path, prefix: str) -> BlobStorage:
+    settings = getSettings()
+    if settings.PHOTO_STORAGE == "local":
+        # Cheap to create, and follows REPORT_PHOTOS / USER_PHOTOS changes
+        return LocalBlobStorage(root, settings.UPLOAD_CHUNK_SIZE)
+    if settings.PHOTO_STORAGE == "s3":
+        if not settings.S3_BUCKET:
+            raise RuntimeError("PHOTO_STORAGE=s3 needs S3_BUCKET")
+        if prefix not in _s3_storages:
+            _s3_storages[prefix] = S3BlobStorage(
+                settings.S3_BUCKET,
+                prefix,
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                region=settings.S3_REGION,
+                access_key_id=settings.S3_ACCESS_KEY_ID,
+                secret_access_key=settings.S3_SECRET_ACCESS_KEY,
+                chunk_size=settings.UPLOAD_CHUNK_SIZE,
+            )
+        return _s3_storages[prefix]
+    raise RuntimeError(f"Unknown PHOTO_STORAGE: {settings.PHOTO_STORAGE}")
+
+
+def getReportStorage() -> BlobStorage:
+    """Storage of reportphotos.filename_path, usable as a dependency"""
+    settings = getSettings()
+    return _getStorage(settings.REPORT_PHOTOS, settings.S3_REPORT_PHOTOS_PREFIX)
+
+
+def getUserStorage() -> BlobStorage:
+    """Storage of users.picture_path, usable as a dependency"""
+    settings = getSettings()
+    return _getStorage(settings.USER_PHOTOS, settings.S3_USER_PHOTOS_PREFIX)
+
+
+async def closeStorages() -> None:
+    for storage in _s3_storages.values():
+        await storage.close()
+    _s3_storages.clear()
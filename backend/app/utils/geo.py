@@ -0,0 +1,134 @@
+import math
+from typing import Optional
+
+EARTH_RADIUS_M = 6_371_008.8
+GEOHASH_PRECISION = 9  # ~4.8m x 4.8m cells, enough to narrow down any query
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encodeGeohash(
+    latitude: float, longitude: float, precision: int = GEOHASH_PRECISION
+) -> str:
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        # bits alternate between longitude (even) and latitude (odd)
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            rng[0] = mid
+        else:
+            bits = bits * 2
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohashCellSize(precision: int) -> tuple[float, float]:
+    """(latitude, longitude) size of a geohash cell in degrees"""
+    bits = 5 * precision
+    lat_bits, lon_bits = bits // 2, (bits + 1) // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def _cellGrid(
+    min_lat: float, min_lon: float, max_lat: float, max_lon: float, precision: int
+) -> tuple[range, range]:
+    """Row and column indexes of the cells of given precision touching the bbox"""
+    lat_step, lon_step = geohashCellSize(precision)
+    rows = range(
+        math.floor((min_lat + 90) / lat_step),
+        min(math.floor((max_lat + 90) / lat_step), round(180 / lat_step) - 1) + 1,
+    )
+    cols = range(
+        math.floor((min_lon + 180) / lon_step),
+        min(math.floor((max_lon + 180) / lon_step), round(360 / lon_step) - 1) + 1,
+    )
+    return rows, cols
+
+
+def countGeohashesInBBox(
+    min_lat: float, min_lon: float, max_lat: float, max_lon: float, precision: int
+) -> int:
+    rows, cols = _cellGrid(min_lat, min_lon, max_lat, max_lon, precision)
+    return len(rows) * len(cols)
+
+
+def geohashesInBBox(
+    min_lat: float, min_lon: float, max_lat: float, max_lon: float, precision: int
+) -> list[str]:
+    """All geohash cells of given precision touching the bbox"""
+    lat_step, lon_step = geohashCellSize(precision)
+    rows, cols = _cellGrid(min_lat, min_lon, max_lat, max_lon, precision)
+    return sorted(
+        {
+            encodeGeohash(
+                -90 + (row + 0.5) * lat_step,
+                -180 + (col + 0.5) * lon_step,
+                precision,
+            )
+            for row in rows
+            for col in cols
+        }
+    )
+
+
+def coveringGeohashes(
+    min_lat: float,
+    min_lon: float,
+    max_lat: float,
+    max_lon: float,
+    max_cells: int = 16,
+) -> list[str]:
+    """
+    Geohash prefixes (all of one length) whose cells together cover the bbox.
+    Uses the longest prefixes that still fit into max_cells, returns an empty
+    list when even single-character cells are too many (no useful prefilter).
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        bbox = (min_lat, min_lon, max_lat, max_lon)
+        if countGeohashesInBBox(*bbox, precision) <= max_cells:
+            return geohashesInBBox(*bbox, precision)
+    return []
+
+
+def bboxAroundPoint(
+    latitude: float, longitude: float, radius: float
+) -> tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle of radius metres"""
+    d_lat = math.degrees(radius / EARTH_RADIUS_M)
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)  # poles
+    d_lon = math.degrees(radius / (EARTH_RADIUS_M * cos_lat))
+    return (
+        max(latitude - d_lat, -90.0),
+        max(longitude - d_lon, -180.0),
+        min(latitude + d_lat, 90.0),
+        min(longitude + d_lon, 180.0),
+    )
+
+
+def haversineDistance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def geohashOrNone(
+    latitude: Optional[float], longitude: Optional[float]
+) -> Optional[str]:
+    if latitude is None or longitude is None:
+        return None
+    return encodeGeohash(float(latitude), float(longitude))
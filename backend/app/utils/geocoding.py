@@ -0,0 +1,133 @@
+"""
+Address geocoding for local notifications, selected by Settings.GEOCODER:
+- "none" (default): addresses are never geocoded, users' addresses are not
+  sent anywhere unless a deployment opts in
+- "nominatim": OpenStreetMap Nominatim search API (GEOCODER_URL), at most
+  one request per second by its usage policy. All requests of a process
+  (address updates and the backfill) are spaced by
+  GEOCODER_MIN_INTERVAL_SECONDS.
+
+Results, not found included, are cached in the geocodecache table by the
+normalized address query, every address string hits the service only once.
+"""
+
+import asyncio
+import re
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud.geocode_crud import getGeocodeCache, saveGeocodeCache
+from app.db.models.user import UserAddress
+from app.dependencies.common import getSettings
+from app.utils.geo import geohashOrNone
+
+Coordinates = Tuple[float, float]  # latitude, longitude
+
+
+class Geocoder(ABC):
+    @abstractmethod
+    async def geocode(self, query: str) -> Optional[Coordinates]:
+        """None when the address was not found, raises on service errors"""
+
+
+class NominatimGeocoder(Geocoder):
+    def __init__(self, url: str, user_agent: str, timeout: float = 10.0):
+        self.url = url
+        self.headers = {"User-Agent": user_agent}  # required by the usage policy
+        self.timeout = timeout
+
+    async def geocode(self, query: str) -> Optional[Coordinates]:
+        async with httpx.AsyncClient(
+            headers=self.headers, timeout=self.timeout
+        ) as client:
+            response = await client.get(
+                self.url, params={"q": query, "format": "jsonv2", "limit": 1}
+            )
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+
+
+class ThrottledGeocoder(Geocoder):
+    """Spaces the requests of all its callers by min_interval"""
+
+    def __init__(self, geocoder: Geocoder, min_interval: float):
+        self.geocoder = geocoder
+        self.min_interval = min_interval
+        self._last_request = 0.0
+        self._lock = asyncio.Lock()
+
+    async def geocode(self, query: str) -> Optional[Coordinates]:
+        async with self._lock:  # concurrent callers take turns
+            wait = self._last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_request = time.monotonic()
+        return await self.geocoder.geocode(query)
+
+
+@lru_cache
+def _nominatimGeocoder(
+    url: str, user_agent: str, min_interval: float
+) -> ThrottledGeocoder:
+    # One instance per process, every background task shares its throttle
+    return ThrottledGeocoder(NominatimGeocoder(url, user_agent), min_interval)
+
+
+def getGeocoder() -> Optional[Geocoder]:
+    settings = getSettings()
+    if settings.GEOCODER == "none":
+        return None
+    if settings.GEOCODER == "nominatim":
+        return _nominatimGeocoder(
+            settings.GEOCODER_URL,
+            settings.GEOCODER_USER_AGENT,
+            settings.GEOCODER_MIN_INTERVAL_SECONDS,
+        )
+    raise RuntimeError(f"Unknown GEOCODER: {settings.GEOCODER}")
+
+
+def addressQuery(address: UserAddress) -> Optional[str]:
+    """Normalized one-line address, None when there is too little to geocode"""
+    if not (address.city or address.postal_code):
+        return None
+    parts = [
+        " ".join(filter(None, [address.street, address.building])),
+        " ".join(filter(None, [address.postal_code, address.city])),
+        address.state,
+        address.country,
+    ]
+    query = ", ".join(part.strip() for part in parts if part and part.strip())
+    return re.sub(r"\s+", " ", query).lower()
+
+
+async def geocodeAddress(
+    db: AsyncSession, address: UserAddress, geocoder: Geocoder
+) -> bool:
+    """
+    Fills address coordinates from the cache or the geocoder, no commit.
+    Returns False when the address could not be resolved.
+    """
+    query = addressQuery(address)
+    if query is None:
+        return False
+    cached = await getGeocodeCache(db, query)
+    if cached is not None:
+        coordinates = (
+            (cached.latitude, cached.longitude) if cached.latitude is not None else None
+        )
+    else:
+        coordinates = await geocoder.geocode(query)
+        await saveGeocodeCache(db, query, coordinates)
+    if coordinates is None:
+        return False
+    address.latitude, address.longitude = coordinates
+    address.geohash = geohashOrNone(*coordinates)
+    return True
@@ -0,0 +1,132 @@
+import mimetypes
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.utils.blob_storage import BlobInfo, BlobStorage
+
+# Stored photos are never rewritten (every upload gets a new file name)
+IMMUTABLE = "private, max-age=31536000, immutable"
+# Same URL, different file after an update (e.g. /user/me/photo)
+REVALIDATE = "private, no-cache"
+
+
+class RangeNotSatisfiable(Exception): ...
+
+
+def blobETag(name: str) -> str:
+    """Strong validator, the stored file name is unique per content"""
+    return f'"{Path(name).name}"'
+
+
+def _etagMatches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def _notModifiedSince(if_modified_since: str, mtime: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False  # malformed dates are ignored
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    modified = datetime.fromtimestamp(int(mtime), timezone.utc)
+    return modified <= since
+
+
+def _isNotModified(request: Request, etag: str, mtime: float) -> bool:
+    # If-Modified-Since is ignored when If-None-Match is present (RFC 9110)
+    if_none_match: Optional[str] = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etagMatches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    return bool(if_modified_since) and _notModifiedSince(if_modified_since, mtime)
+
+
+def parseRange(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    (start, end) of a single "bytes=" range, end inclusive. None when the
+    whole blob should be sent, multiple ranges and malformed headers are
+    ignored as RFC 9110 allows. Raises RangeNotSatisfiable.
+    """
+    unit, _, ranges = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in ranges:
+        return None
+    first, _, last = ranges.strip().partition("-")
+    try:
+        if not first:  # suffix range, the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def _streamBlob(
+    request: Request, storage: BlobStorage, info: BlobInfo, headers: dict
+) -> Response:
+    media_type = mimetypes.guess_type(info.name)[0] or "application/octet-stream"
+    headers["accept-ranges"] = "bytes"
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and if_range in (None, headers["etag"], headers["last-modified"]):
+        try:
+            byte_range = parseRange(range_header, info.size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416, headers={"content-range": f"bytes */{info.size}"}
+            )
+    if byte_range is None:
+        headers["content-length"] = str(info.size)
+        return StreamingResponse(
+            storage.read(info.name), media_type=media_type, headers=headers
+        )
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{info.size}"
+    headers["content-length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.read(info.name, start, end),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def blobResponse(
+    request: Request,
+    storage: BlobStorage,
+    info: BlobInfo,
+    cache_control: str = IMMUTABLE,
+) -> Response:
+    """
+    Serve a stored blob with ETag / Last-Modified / Cache-Control.
+    Conditional requests get a 304 without the blob being opened. Local
+    blobs are sent by FileResponse, remote ones streamed from the storage,
+    both honour Range / If-Range against the same validators.
+    """
+    headers = {
+        "etag": blobETag(info.name),
+        "last-modified": formatdate(info.mtime, usegmt=True),
+        "cache-control": cache_control,
+    }
+    if _isNotModified(request, headers["etag"], info.mtime):
+        return Response(status_code=304, headers=headers)
+    path = storage.localPath(info.name)
+    if path is not None:
+        return FileResponse(path, headers=headers)
+    return _streamBlob(request, storage, info, headers)
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+MIN_ZOOM = 0
+MAX_ZOOM = 20
+MAX_CLUSTER_PRECISION = 8  # ~38m x 19m cells, markers are shown one by one past it
+
+
+def zoomPrecision(zoom: int) -> int:
+    """
+    Geohash precision used to cluster markers at a map zoom level.
+    A tile at zoom z is 360 / 2**z degrees wide, the cells are aimed at a
+    quarter of that.
+    """
+    return min(max(round(2 * (zoom + 2) / 5), 1), MAX_CLUSTER_PRECISION)
+
+
+class ClusterCache:
+    """
+    Clusters of publicly visible reports keyed by (zoom, geohash cell).
+    None is cached too, empty cells are the most common ones on the map.
+    """
+
+    def __init__(self, max_entries: int = 50_000):
+        self.max_entries = max_entries
+        self.generation = 0  # bumped by every invalidation
+        self._entries: OrderedDict[tuple[int, str], Optional[dict]] = OrderedDict()
+
+    def get(self, zoom: int, cell: str) -> tuple[bool, Optional[dict]]:
+        key = (zoom, cell)
+        if key not in self._entries:
+            return False, None
+        self._entries.move_to_end(key)
+        return True, self._entries[key]
+
+    def set(
+        self, zoom: int, cell: str, cluster: Optional[dict], generation: int
+    ) -> None:
+        # A report changed while the clusters were being computed,
+        # the result may already be stale
+        if generation != self.generation:
+            return
+        self._entries[(zoom, cell)] = cluster
+        self._entries.move_to_end((zoom, cell))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, geohashes: Iterable[Optional[str]]) -> None:
+        """Drop every zoom level's cell containing any of the geohashes"""
+        self.generation += 1
+        for geohash in geohashes:
+            if not geohash:
+                continue
+            for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+                self._entries.pop((zoom, geohash[: zoomPrecision(zoom)]), None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+
+cache = ClusterCache()
@@ -0,0 +1,22 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+
+def encodeCursor(key: dict[str, Any]) -> str:
+    """Pack the keyset of the last returned row into an opaque url-safe token"""
+    raw = json.dumps(key, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decodeCursor(cursor: str) -> dict[str, Any]:
+    """Reverse of encodeCursor, raises ValueError on malformed tokens"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(key, dict):
+        raise ValueError("Invalid cursor")
+    return key
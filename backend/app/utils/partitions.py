@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.dependencies.common import getSettings
+
+NOTIFICATION_PARTITION_PREFIX = "notifications_p"  # + YYYY_MM of the month
+NOTIFICATION_DEFAULT_PARTITION = "notifications_default"
+
+
+def monthStart(moment: datetime) -> datetime:
+    """First instant (UTC) of the month containing moment"""
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def addMonths(month: datetime, months: int) -> datetime:
+    """month is a monthStart(), may be negative"""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def notificationPartitionName(month: datetime) -> str:
+    return f"{NOTIFICATION_PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def notificationPartitionMonth(name: str) -> Optional[datetime]:
+    """Reverse of notificationPartitionName, None for other tables"""
+    if not name.startswith(NOTIFICATION_PARTITION_PREFIX):
+        return None
+    try:
+        month = datetime.strptime(name[len(NOTIFICATION_PARTITION_PREFIX) :], "%Y_%m")
+    except ValueError:
+        return None
+    return month.replace(tzinfo=timezone.utc)
+
+
+def notificationRetentionStart(now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Oldest sent_datetime still kept: the start of the month
+    NOTIFICATION_RETENTION_MONTHS before now. None when nothing expires.
+    """
+    months = getSettings().NOTIFICATION_RETENTION_MONTHS
+    if months <= 0:
+        return None
+    return addMonths(monthStart(now or datetime.now(timezone.utc)), -months)
@@ -0,0 +1,166 @@
+"""
+Content-addressed photo storage.
+Blobs are named by the sha256 of their content and sharded into two levels
+of directories (ab/cd/abcd...ef.jpg, 65536 leaf directories), so identical
+uploads are stored once. A blob is referenced by reportphotos.filename_path
+and users.picture_path, it is removed when the last reference is gone.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.db.crud.photo_crud import countPhotoReferences
+from app.dependencies.common import getSettings
+from app.utils.blob_storage import BlobStorage
+from app.utils.renditions import RENDITION_SIZES, createRenditions, renditionFilename
+from app.utils.uploads import saveUpload
+
+_BLOB_NAME = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[0-9a-z]+)?$")
+
+
+@dataclass
+class StoredPhoto:
+    name: str  # relative to the storage root, saved in the DB
+    is_new: bool  # False when the same content was already stored
+
+
+def blobName(sha256: str, extension: str = "") -> str:
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{extension.lower()}"
+
+
+def isBlobName(name: str) -> bool:
+    return bool(_BLOB_NAME.match(name))
+
+
+async def _putMissingRenditions(storage: BlobStorage, name: str, source: Path) -> None:
+    missing = [
+        size
+        for size in RENDITION_SIZES
+        if await storage.stat(renditionFilename(name, size)) is None
+    ]
+    if not missing:
+        return
+    for size, path in (await createRenditions(source)).items():
+        if size in missing:
+            await storage.put(renditionFilename(name, size), path)
+        else:
+            path.unlink(missing_ok=True)
+
+
+async def _putPhoto(
+    storage: BlobStorage, name: str, source: Path, renditions: bool
+) -> bool:
+    """Store source (consumed) as name, True if the content was new"""
+    if await storage.stat(name) is not None:
+        if renditions:
+            # The first upload may have been stored without them
+            await _putMissingRenditions(storage, name, source)
+        # Deduplicated, the fresh mtime protects the blob from a concurrent
+        # release until the new reference is committed
+        await storage.touch(name)
+        source.unlink(missing_ok=True)
+        return False
+    if renditions:
+        for size, path in (await createRenditions(source)).items():
+            await storage.put(renditionFilename(name, size), path)
+    # The original goes last, once it exists its renditions do too
+    await storage.put(name, source)
+    return True
+
+
+async def storePhoto(
+    upload: UploadFile,
+    storage: BlobStorage,
+    max_size: Optional[int] = None,
+    renditions: bool = False,
+) -> StoredPhoto:
+    """
+    Stream the upload into storage under its content address,
+    with renditions=True the thumbnail/medium sizes are stored next to it.
+    """
+    storage.incoming.mkdir(parents=True, exist_ok=True)
+    stored = await saveUpload(upload, storage.incoming / uuid.uuid4().hex, max_size)
+    name = blobName(stored.sha256, Path(upload.filename or "").suffix)
+    is_new = await _putPhoto(storage, name, stored.path, renditions)
+    return StoredPhoto(name=name, is_new=is_new)
+
+
+def _hashFile(path: Path, chunk_size: int) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _linkToIncoming(source: Path, incoming: Path) -> Path:
+    incoming.mkdir(parents=True, exist_ok=True)
+    target = incoming / uuid.uuid4().hex
+    try:
+        os.link(source, target)
+    except OSError:  # e.g. another filesystem
+        shutil.copy2(source, target)
+    return target
+
+
+async def storeExistingFile(
+    root: Path, name: str, storage: BlobStorage
+) -> Optional[str]:
+    """
+    Store a legacy (flat, uuid named) local file and its renditions under
+    their content address, the old files are left for the caller to remove.
+    Returns None when the file does not exist.
+    """
+    source = root / name
+    if not source.is_file():
+        return None
+    sha256 = await run_in_threadpool(_hashFile, source, getSettings().UPLOAD_CHUNK_SIZE)
+    new_name = blobName(sha256, source.suffix)
+    for size in [*RENDITION_SIZES, "original"]:  # the original goes last
+        legacy = root / renditionFilename(name, size)
+        target = renditionFilename(new_name, size)
+        if not legacy.is_file():
+            continue
+        if await storage.stat(target) is not None:
+            await storage.touch(target)
+            continue
+        copy = await run_in_threadpool(_linkToIncoming, legacy, storage.incoming)
+        await storage.put(target, copy)
+    return new_name
+
+
+async def removeFiles(storage: BlobStorage, name: str) -> None:
+    """Delete a stored photo and its renditions"""
+    for size in ["original", *RENDITION_SIZES]:
+        await storage.delete(renditionFilename(name, size))
+
+
+async def releasePhoto(
+    db: AsyncSession, storage: BlobStorage, name: Optional[str]
+) -> bool:
+    """
+    Call after the reference to name was deleted and committed.
+    Removes the blob when nothing references it any more, True if removed.
+    """
+    if not name or not isBlobName(name):  # legacy files are left to photo_gc
+        return False
+    if await countPhotoReferences(db, name):
+        return False
+    info = await storage.stat(name)
+    if info is None:
+        return False
+    if time.time() - info.mtime < getSettings().PHOTO_DELETE_GRACE_SECONDS:
+        return False  # just uploaded again, the reference may be uncommitted
+    await removeFiles(storage, name)
+    return True
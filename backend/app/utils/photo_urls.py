@@ -0,0 +1,48 @@
+import hashlib
+import hmac
+import time
+from typing import Optional
+from urllib.parse import quote, urlencode
+
+from app.dependencies.common import getSettings
+
+SIGNED_PHOTO_ROUTE = "/report/photo/signed/{filename}"
+
+
+def _signingKey() -> bytes:
+    settings = getSettings()
+    return (settings.PHOTO_URL_SECRET_KEY or settings.JWT_SECRET_KEY).encode()
+
+
+def photoSignature(filename: str, expires: int) -> str:
+    message = f"{filename}:{expires}".encode()
+    return hmac.new(_signingKey(), message, hashlib.sha256).hexdigest()
+
+
+def photoUrlExpiry(now: Optional[float] = None) -> int:
+    """
+    Expiry rounded up to the end of the next PHOTO_URL_EXPIRE_SECONDS window,
+    so the URL (and the client cache entry behind it) stays the same between
+    feed refreshes instead of changing every second.
+    """
+    ttl = getSettings().PHOTO_URL_EXPIRE_SECONDS
+    now = time.time() if now is None else now
+    return (int(now) // ttl + 2) * ttl
+
+
+def signPhotoUrl(filename: str, now: Optional[float] = None) -> str:
+    """Relative URL of a report photo, valid for at least PHOTO_URL_EXPIRE_SECONDS"""
+    expires = photoUrlExpiry(now)
+    query = urlencode(
+        {"expires": expires, "signature": photoSignature(filename, expires)}
+    )
+    return SIGNED_PHOTO_ROUTE.format(filename=quote(filename)) + "?" + query
+
+
+def verifyPhotoSignature(
+    filename: str, expires: int, signature: str, now: Optional[float] = None
+) -> bool:
+    now = time.time() if now is None else now
+    if expires < now:
+        return False
+    return hmac.compare_digest(photoSignature(filename, expires), signature)
@@ -0,0 +1,73 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+from app.dependencies.common import getSettings
+
+# Longest side in pixels, "original" is the uploaded file itself
+RENDITION_SIZES = {"thumbnail": 256, "medium": 1024}
+
+
+def renditionFilename(filename: str, size: str) -> str:
+    """
+    ab/cd/abcd.png -> ab/cd/abcd.png.thumbnail.jpg (renditions are always JPEG).
+    The full original name is kept so renditionOwner can map it back.
+    """
+    if size == "original":
+        return filename
+    return f"{filename}.{size}.jpg"
+
+
+def renditionOwner(filename: str) -> str:
+    """Name of the original a rendition belongs to, originals map to themselves"""
+    for size in RENDITION_SIZES:
+        suffix = f".{size}.jpg"
+        if filename.endswith(suffix):
+            return filename.removesuffix(suffix)
+    return filename
+
+
+def _renderRenditions(source: str) -> dict[str, str]:
+    # Runs in a worker process, decoding/resizing is CPU bound
+    from PIL import Image, ImageOps
+
+    source_path = Path(source)
+    created = {}
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for size, max_side in RENDITION_SIZES.items():
+            rendition = image.copy()
+            rendition.thumbnail((max_side, max_side))
+            target = source_path.with_name(renditionFilename(source_path.name, size))
+            rendition.save(target, "JPEG", quality=80, optimize=True)
+            created[size] = str(target)
+    return created
+
+
+@lru_cache
+def _getProcessPool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=getSettings().RENDITION_WORKERS)
+
+
+def shutdownRenditionPool() -> None:
+    if _getProcessPool.cache_info().currsize:
+        _getProcessPool().shutdown(wait=False, cancel_futures=True)
+        _getProcessPool.cache_clear()
+
+
+async def createRenditions(photo_path: Path) -> dict[str, Path]:
+    """
+    Write the thumbnail/medium renditions next to photo_path, returns
+    {size: path}. Failures (e.g. not an image) are logged and leave only
+    the original, which the photo routes fall back to.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        created = await loop.run_in_executor(
+            _getProcessPool(), _renderRenditions, str(photo_path)
+        )
+    except Exception as e:
+        print(f"[RENDITIONS] {photo_path.name}: {e!r}")
+        return {}
+    return {size: Path(path) for size, path in created.items()}
@@ -0,0 +1,57 @@
+import hashlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.dependencies.common import getSettings
+
+
+class UploadTooLarge(Exception): ...
+
+
+@dataclass
+class StoredUpload:
+    path: Path
+    size: int
+    sha256: str
+
+
+def _copyUpload(
+    source: BinaryIO, destination: Path, max_size: int, chunk_size: int
+) -> StoredUpload:
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with destination.open("wb") as f:
+            while chunk := source.read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        destination.unlink(missing_ok=True)  # never leave partial files behind
+        raise
+    return StoredUpload(path=destination, size=size, sha256=digest.hexdigest())
+
+
+async def saveUpload(
+    upload: UploadFile, destination: Path, max_size: Optional[int] = None
+) -> StoredUpload:
+    """
+    Copy the upload to destination in bounded chunks, hashing it on the way.
+    The blocking file I/O runs in the threadpool, not on the event loop.
+    Raises UploadTooLarge as soon as more than max_size bytes were read.
+    """
+    settings = getSettings()
+    if max_size is None:
+        max_size = settings.MAX_UPLOAD_SIZE
+    if upload.size is not None and upload.size > max_size:
+        raise UploadTooLarge(f"Upload exceeds {max_size} bytes")
+    await upload.seek(0)
+    return await run_in_threadpool(
+        _copyUpload, upload.file, destination, max_size, settings.UPLOAD_CHUNK_SIZE
+    )
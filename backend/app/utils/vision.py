@@ -1,8 +1,18 @@
-from google.cloud import vision
-from google.cloud.vision_v1 import types
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
 import asyncio
+import hashlib
+
+from app.dependencies.common import getSettings
+from app.db.crud.vision_crud import (
+    countVisionCacheLookups,
+    getVisionAssessments,
+    saveVisionAssessments,
+)
+from app.utils.vision_backends import get_vision_backend
 
 
 load_dotenv()
@@ -22,35 +32,106 @@ HAND_PICKED_LABELS = {
     "sidewalk": 1
 }
 
+PhotoAssessment = Tuple[List[str], int, bool]  # labels, score, is_inappropriate
+
+
 def score_photo_labels(labels: List[str]) -> int:
     return sum(HAND_PICKED_LABELS.get(label.lower(), 0) for label in labels)
 
-async def get_photo_label_and_score(image_path:str):
-    client = vision.ImageAnnotatorClient()
-    with open(image_path, "rb") as image_file:
-        content = image_file.read()
-        
-    image = vision.Image(content=content)
-    response = client.label_detection(image=image)
-    labels = [label.description.lower() for label in response.label_annotations]
-    score = score_photo_labels(labels)
-    
-    response = client.safe_search_detection(image=image)
-    safe = response.safe_search_annotation
-    
-    LIKELY = types.Likelihood.LIKELY
-    
-    is_inappropriate = (
-        getattr(safe, "violence", 0) >= LIKELY or
-        getattr(safe, "adult", 0) >= LIKELY
+
+@lru_cache
+def _get_executor() -> ThreadPoolExecutor:
+    # Bounds the number of blocking classifier calls running at once
+    return ThreadPoolExecutor(
+        max_workers=getSettings().VISION_MAX_WORKERS, thread_name_prefix="vision"
+    )
+
+
+def _annotate_paths(image_paths: List[str]) -> List[PhotoAssessment]:
+    """Blocking, runs the configured backend (Settings.VISION_BACKEND)"""
+    return [
+        (labels, score_photo_labels(labels), is_inappropriate)
+        for labels, is_inappropriate in get_vision_backend().annotate(image_paths)
+    ]
+
+
+def _hash_paths(image_paths: List[str]) -> List[str]:
+    hashes = []
+    for image_path in image_paths:
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as image_file:
+            while chunk := image_file.read(1024 * 1024):
+                digest.update(chunk)
+        hashes.append(digest.hexdigest())
+    return hashes
+
+
+async def assess_photos(
+    image_paths: List[str], db: Optional[AsyncSession] = None
+) -> List[PhotoAssessment]:
+    """
+    (labels, score, is_inappropriate) for each image, in the given order.
+    With a db session, results are looked up in and stored to the
+    content-hash keyed cache (visionassessments), the caller commits, and
+    should do so soon after (the cache hit/miss counter row stays locked).
+    """
+    if not image_paths:
+        return []
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    if db is None:
+        return await loop.run_in_executor(executor, _annotate_paths, image_paths)
+
+    settings = getSettings()
+    hashes = await loop.run_in_executor(executor, _hash_paths, image_paths)
+    cached = await getVisionAssessments(
+        db,
+        list(set(hashes)),
+        settings.VISION_BACKEND,  # results of different classifiers differ
+        settings.VISION_CACHE_TTL_SECONDS,
     )
-    return labels, score, is_inappropriate
-
-### async def main():
-#    test_image_path = 
-#    labels, score, is_inappropriate = await get_photo_label_and_score(test_image_path)
-#    print(labels)
-#    print(score)
-#    print(is_inappropriate)
-    
-### asyncio.run(main())
+    # The same image twice in one report is annotated only once
+    missing = {}
+    for h, path in zip(hashes, image_paths):
+        if h not in cached:
+            missing.setdefault(h, path)
+
+    fresh = {}
+    if missing:
+        annotated = await loop.run_in_executor(
+            executor, _annotate_paths, list(missing.values())
+        )
+        fresh = dict(zip(missing.keys(), annotated))
+        await saveVisionAssessments(
+            db,
+            [
+                {
+                    "sha256": h,
+                    "backend": settings.VISION_BACKEND,
+                    "labels": labels,
+                    "score": score,
+                    "is_inappropriate": is_inappropriate,
+                }
+                for h, (labels, score, is_inappropriate) in fresh.items()
+            ],
+        )
+
+    # Counted in the database, lookups happen in the assessment workers.
+    # The upsert locks the backend's single counter row until the caller
+    # commits, done before the classifier call the workers would queue on it.
+    await countVisionCacheLookups(
+        db, settings.VISION_BACKEND, len(hashes) - len(missing), len(missing)
+    )
+
+    results = []
+    for h in hashes:
+        if h in fresh:
+            results.append(fresh[h])
+        else:
+            row = cached[h]
+            results.append((list(row.labels), row.score, row.is_inappropriate))
+    return results
+
+
+async def get_photo_label_and_score(image_path: str) -> PhotoAssessment:
+    return (await assess_photos([image_path]))[0]
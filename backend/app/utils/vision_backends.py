@@ -0,0 +1,188 @@
+"""
+Image classifier backends behind app.utils.vision, selected by
+Settings.VISION_BACKEND:
+- "google": Google Cloud Vision (label + safe search), the production default
+- "stub": deterministic fake, no network, for tests, load tests and benchmarks
+- "onnx": CPU-only local label model, needs the optional onnxruntime,
+  numpy and Pillow packages plus VISION_ONNX_MODEL_PATH / VISION_ONNX_LABELS_PATH
+"""
+
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Tuple
+import hashlib
+
+from app.dependencies.common import getSettings
+
+BackendResult = Tuple[List[str], bool]  # labels, is_inappropriate
+
+
+class VisionBackend(ABC):
+    @abstractmethod
+    def annotate(self, image_paths: List[str]) -> List[BackendResult]:
+        """Blocking, results in the order of image_paths"""
+
+
+class GoogleVisionBackend(VisionBackend):
+    # Vision accepts at most 16 images in one batch_annotate_images request
+    MAX_BATCH_IMAGES = 16
+
+    def __init__(self):
+        from google.cloud import vision
+        from google.cloud.vision_v1 import types
+
+        self._vision = vision
+        self._likely = types.Likelihood.LIKELY
+        # The client holds a gRPC channel, it is thread-safe and meant to be reused
+        self.client = vision.ImageAnnotatorClient()
+        self.features = [
+            vision.Feature(type_=vision.Feature.Type.LABEL_DETECTION),
+            vision.Feature(type_=vision.Feature.Type.SAFE_SEARCH_DETECTION),
+        ]
+
+    def _parse_response(self, response) -> BackendResult:
+        if response.error.message:
+            raise RuntimeError(f"Vision error: {response.error.message}")
+        labels = [label.description.lower() for label in response.label_annotations]
+        safe = response.safe_search_annotation
+        is_inappropriate = (
+            getattr(safe, "violence", 0) >= self._likely
+            or getattr(safe, "adult", 0) >= self._likely
+        )
+        return labels, is_inappropriate
+
+    def annotate(self, image_paths: List[str]) -> List[BackendResult]:
+        results = []
+        for start in range(0, len(image_paths), self.MAX_BATCH_IMAGES):
+            requests = []
+            for image_path in image_paths[start : start + self.MAX_BATCH_IMAGES]:
+                with open(image_path, "rb") as image_file:
+                    content = image_file.read()
+                requests.append(
+                    self._vision.AnnotateImageRequest(
+                        image=self._vision.Image(content=content),
+                        features=self.features,
+                    )
+                )
+            batch = self.client.batch_annotate_images(requests=requests)
+            results.extend(self._parse_response(r) for r in batch.responses)
+        return results
+
+
+class StubVisionBackend(VisionBackend):
+    """Labels derived from the image hash, same bytes always get the same labels"""
+
+    LABELS = [
+        "pothole",
+        "road",
+        "asphalt",
+        "graffiti",
+        "lamp",
+        "sidewalk",
+        "traffic sign",
+        "tree",
+        "building",
+        "car",
+    ]
+
+    def annotate(self, image_paths: List[str]) -> List[BackendResult]:
+        results = []
+        for image_path in image_paths:
+            with open(image_path, "rb") as image_file:
+                digest = hashlib.sha256(image_file.read()).digest()
+            labels = sorted({self.LABELS[b % len(self.LABELS)] for b in digest[:3]})
+            results.append((labels, False))
+        return results
+
+
+class OnnxVisionBackend(VisionBackend):
+    """
+    ImageNet-style classifier exported to ONNX (NCHW float input, logits output).
+    There is no safe search model, images are never flagged as inappropriate.
+    """
+
+    MEAN = (0.485, 0.456, 0.406)
+    STD = (0.229, 0.224, 0.225)
+
+    def __init__(
+        self,
+        model_path: Path,
+        labels_path: Path,
+        top_k: int = 5,
+        min_probability: float = 0.05,
+    ):
+        try:
+            import numpy
+            import onnxruntime
+            from PIL import Image
+        except ImportError as e:
+            raise RuntimeError(
+                "VISION_BACKEND=onnx needs onnxruntime, numpy and Pillow installed"
+            ) from e
+        self._np = numpy
+        self._image = Image
+        self.session = onnxruntime.InferenceSession(
+            str(model_path), providers=["CPUExecutionProvider"]
+        )
+        self.labels = [
+            line.strip().lower()
+            for line in Path(labels_path).read_text().splitlines()
+            if line.strip()
+        ]
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        height, width = model_input.shape[2:4]
+        # dynamic axes come as strings/None
+        self.size = (
+            width if isinstance(width, int) else 224,
+            height if isinstance(height, int) else 224,
+        )
+        self.top_k = top_k
+        self.min_probability = min_probability
+
+    def _preprocess(self, image_path: str):
+        np = self._np
+        with self._image.open(image_path) as image:
+            pixels = np.asarray(image.convert("RGB").resize(self.size), np.float32)
+        pixels = (pixels / 255.0 - np.array(self.MEAN, np.float32)) / np.array(
+            self.STD, np.float32
+        )
+        return pixels.transpose(2, 0, 1)  # HWC -> CHW
+
+    def annotate(self, image_paths: List[str]) -> List[BackendResult]:
+        np = self._np
+        batch = np.stack([self._preprocess(path) for path in image_paths])
+        logits = self.session.run(None, {self.input_name: batch})[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+        results = []
+        for row in probabilities:
+            top = np.argsort(row)[::-1][: self.top_k]
+            labels = [
+                self.labels[i]
+                for i in top
+                if i < len(self.labels) and row[i] >= self.min_probability
+            ]
+            results.append((labels, False))
+        return results
+
+
+@lru_cache
+def get_vision_backend() -> VisionBackend:
+    """Process-wide backend instance (clients and models are loaded once)"""
+    settings = getSettings()
+    if settings.VISION_BACKEND == "google":
+        return GoogleVisionBackend()
+    if settings.VISION_BACKEND == "stub":
+        return StubVisionBackend()
+    if settings.VISION_BACKEND == "onnx":
+        if not settings.VISION_ONNX_MODEL_PATH or not settings.VISION_ONNX_LABELS_PATH:
+            raise RuntimeError(
+                "VISION_BACKEND=onnx needs VISION_ONNX_MODEL_PATH "
+                "and VISION_ONNX_LABELS_PATH"
+            )
+        return OnnxVisionBackend(
+            settings.VISION_ONNX_MODEL_PATH, settings.VISION_ONNX_LABELS_PATH
+        )
+    raise RuntimeError(f"Unknown VISION_BACKEND: {settings.VISION_BACKEND}")
@@ -0,0 +1,50 @@
+from typing import Optional
+
+from app.dependencies.common import getSettings
+
+VoteDeltas = dict[int, tuple[int, int]]  # report_id -> (votes_pos, votes_neg)
+
+
+class VoteCounterBuffer:
+    """
+    Report counter changes of committed votes not yet written to reports.
+    Deltas of the same report are coalesced, app.tasks.vote_flusher applies
+    them with one UPDATE per report every VOTE_FLUSH_INTERVAL_MS.
+    Lost deltas (a crashed process) are repaired by app.tasks.vote_reconcile,
+    once the counters did not move for VOTE_RECONCILE_SETTLE_SECONDS.
+    """
+
+    def __init__(self):
+        self._deltas: dict[int, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._deltas)
+
+    def add(self, report_id: int, pos_delta: int, neg_delta: int) -> None:
+        deltas = self._deltas.setdefault(report_id, [0, 0])
+        deltas[0] += pos_delta
+        deltas[1] += neg_delta
+
+    def drain(self) -> VoteDeltas:
+        """Takes all pending deltas out of the buffer, votes cancelling out are dropped"""
+        pending, self._deltas = self._deltas, {}
+        return {
+            report_id: (pos, neg)
+            for report_id, (pos, neg) in pending.items()
+            if pos or neg
+        }
+
+    def restore(self, deltas: VoteDeltas) -> None:
+        """Puts back drained deltas that could not be written"""
+        for report_id, (pos, neg) in deltas.items():
+            self.add(report_id, pos, neg)
+
+
+buffer = VoteCounterBuffer()
+
+
+def getVoteBuffer() -> Optional[VoteCounterBuffer]:
+    """The buffer when VOTE_COUNTER_MODE is "buffered", None to update counters inline"""
+    if getSettings().VOTE_COUNTER_MODE == "buffered":
+        return buffer
+    return None
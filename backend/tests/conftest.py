@@ -190,6 +190,16 @@ def override_user_photos(tmp_path: Path):
     settings.USER_PHOTOS = original_path
 
 
+@pytest.fixture(autouse=True)
+def disable_geocoder():
+    # address updates must not reach the real geocoding service
+    settings = getSettings()
+    original_geocoder = settings.GEOCODER
+    settings.GEOCODER = "none"
+    yield
+    settings.GEOCODER = original_geocoder
+
+
 @pytest_asyncio.fixture(scope="function")
 async def client():
     async with AsyncClient(
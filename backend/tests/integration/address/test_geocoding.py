@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud.address_crud import getAddress, updateAddress
+from app.db.models.user import User, UserAddress
+from app.db.schemas.address_schema import UserAddressUpdate
+from app.utils.geocoding import Geocoder, geocodeAddress
+
+
+class FakeGeocoder(Geocoder):
+    def __init__(self, results: dict):
+        self.results = results
+        self.queries = []
+
+    async def geocode(self, query):
+        self.queries.append(query)
+        return self.results.get(query)
+
+
+@pytest.mark.asyncio
+async def test_geocode_address_cached(db_session: AsyncSession, test_user: User):
+    query = "example street 7, 12345 testville, ts, testland"
+    geocoder = FakeGeocoder({query: (48.1486, 17.1077)})
+    address = await getAddress(db_session, test_user.id)
+    address.street, address.building = "Example  Street", "7"
+
+    assert await geocodeAddress(db_session, address, geocoder)
+    await db_session.commit()
+    assert float(address.latitude) == pytest.approx(48.1486)
+    assert address.geohash.startswith("u2s")
+
+    # same address of another user comes from the cache
+    other = UserAddress(
+        street="Example Street",
+        building="7",
+        city="Testville",
+        state="TS",
+        postal_code="12345",
+        country="Testland",
+    )
+    assert await geocodeAddress(db_session, other, geocoder)
+    assert float(other.longitude) == pytest.approx(17.1077)
+
+    nowhere = UserAddress(city="Nowhere")
+    assert not await geocodeAddress(db_session, nowhere, geocoder)
+    assert not await geocodeAddress(db_session, nowhere, geocoder)
+    assert geocoder.queries == [query, "nowhere"]
+
+
+@pytest.mark.asyncio
+async def test_update_address_clears_coordinates(
+    db_session: AsyncSession, test_user: User
+):
+    address = await getAddress(db_session, test_user.id)
+    address.latitude, address.longitude, address.geohash = 48.1, 17.1, "u2s"
+    await db_session.commit()
+
+    address = await updateAddress(
+        db_session, test_user.id, UserAddressUpdate(city=address.city)
+    )
+    assert address.latitude == pytest.approx(48.1)  # nothing changed
+
+    address = await updateAddress(
+        db_session, test_user.id, UserAddressUpdate(city="Othertown")
+    )
+    assert address.latitude is None and address.geohash is None
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.job import AssessmentJob, JobStatus
+from app.db.models.report import Report
+from app.db.crud.job_crud import (
+    enqueueAssessment,
+    claimAssessmentJobs,
+    completeAssessmentJob,
+    failAssessmentJob,
+)
+
+
+@pytest.mark.asyncio
+async def test_claim_and_complete_job(db_session: AsyncSession, test_report: Report):
+    job = await enqueueAssessment(db_session, test_report.id, nocommit=False)
+
+    claimed = await claimAssessmentJobs(db_session, batch_size=10, lease_seconds=60)
+    assert [j.id for j in claimed] == [job.id]
+    assert claimed[0].status == JobStatus.running
+    assert claimed[0].attempts == 1
+
+    # Leased jobs are not handed out twice
+    assert await claimAssessmentJobs(db_session, batch_size=10, lease_seconds=60) == []
+
+    await completeAssessmentJob(db_session, job.id)
+    job = await db_session.get(AssessmentJob, job.id, populate_existing=True)
+    assert job.status == JobStatus.done
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_retried_then_given_up(
+    db_session: AsyncSession, test_report: Report
+):
+    job = await enqueueAssessment(db_session, test_report.id, nocommit=False)
+    await claimAssessmentJobs(db_session, batch_size=10, lease_seconds=60)
+
+    job = await failAssessmentJob(
+        db_session, job.id, "boom", max_attempts=2, backoff_seconds=60
+    )
+    assert job.status == JobStatus.pending
+    assert job.last_error == "boom"
+    # Backoff keeps it out of the next claim
+    assert await claimAssessmentJobs(db_session, batch_size=10, lease_seconds=60) == []
+
+    job = await failAssessmentJob(
+        db_session, job.id, "boom", max_attempts=1, backoff_seconds=60
+    )
+    assert job.status == JobStatus.failed
@@ -0,0 +1,153 @@
+from datetime import datetime, timedelta, timezone
+
+from httpx import AsyncClient
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.user import Notification, User
+from app.dependencies.auth import getUser
+from app.main import app
+
+NOTIFICATIONS_ROUTE = "/user/me/notifications"
+UNREAD_ROUTE = "/user/me/notifications/unread"
+
+
+async def addNotifications(db_session: AsyncSession, user: User, count: int):
+    sent = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(days=1)
+    notifications = [
+        Notification(
+            user_id=user.id,
+            title=f"Notification {i}",
+            note="note",
+            # two notifications per timestamp, the id breaks the tie
+            sent_datetime=sent + timedelta(minutes=i // 2),
+            read_datetime=sent if i % 3 == 0 else None,
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(notifications)
+    await db_session.commit()
+    return notifications
+
+
+@pytest.mark.asyncio
+async def test_notification_pages(
+    client: AsyncClient, db_session: AsyncSession, test_user: User
+):
+    async def override_get_user():
+        return test_user
+
+    app.dependency_overrides[getUser] = override_get_user
+    notifications = await addNotifications(db_session, test_user, 7)
+    expected = [
+        n.id
+        for n in sorted(
+            notifications, key=lambda n: (n.sent_datetime, n.id), reverse=True
+        )
+    ]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3} | ({"cursor": cursor} if cursor else {})
+        response = await client.get(NOTIFICATIONS_ROUTE, params=params)
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["data"]) <= 3
+        seen += [n["id"] for n in data["data"]]
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+    since = notifications[3].sent_datetime
+    response = await client.get(
+        NOTIFICATIONS_ROUTE, params={"since": since.isoformat()}
+    )
+    assert response.status_code == 200
+    assert [n["id"] for n in response.json()["data"]] == expected[:3]
+
+
+@pytest.mark.asyncio
+async def test_notification_pages_invalid_cursor(client: AsyncClient, test_user: User):
+    async def override_get_user():
+        return test_user
+
+    app.dependency_overrides[getUser] = override_get_user
+
+    response = await client.get(NOTIFICATIONS_ROUTE, params={"cursor": "garbage"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_unread_notifications_count(
+    client: AsyncClient, db_session: AsyncSession, test_user: User
+):
+    async def override_get_user():
+        return test_user
+
+    app.dependency_overrides[getUser] = override_get_user
+    await addNotifications(db_session, test_user, 7)  # 0, 3 and 6 are read
+
+    response = await client.get(UNREAD_ROUTE)
+    assert response.status_code == 200
+    assert response.json() == {"count": 4}
+
+
+@pytest.mark.asyncio
+async def test_bulk_mark_notifications_as_read(
+    client: AsyncClient, db_session: AsyncSession, test_user: User
+):
+    async def override_get_user():
+        return test_user
+
+    app.dependency_overrides[getUser] = override_get_user
+    notifications = await addNotifications(db_session, test_user, 7)
+    unread = [n.id for n in notifications if n.read_datetime is None]
+
+    response = await client.post("/notification/read", json={"ids": unread[:2]})
+    assert response.status_code == 200
+    assert sorted(response.json()["ids"]) == sorted(unread[:2])
+
+    # Newest page seen, everything up to its cursor gets marked
+    page = (await client.get(NOTIFICATIONS_ROUTE, params={"limit": 3})).json()
+    response = await client.post(
+        "/notification/read", json={"before": page["next_cursor"]}
+    )
+    assert response.status_code == 200
+    shown = {n["id"] for n in page["data"]}
+    assert set(response.json()["ids"]) == shown & set(unread[2:])
+
+    response = await client.post("/notification/read", json={"all": True})
+    assert response.status_code == 200
+    assert (await client.get(UNREAD_ROUTE)).json() == {"count": 0}
+
+    response = await client.post("/notification/read", json={"before": "garbage"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_notifications(
+    client: AsyncClient, db_session: AsyncSession, test_user: User
+):
+    async def override_get_user():
+        return test_user
+
+    app.dependency_overrides[getUser] = override_get_user
+    notifications = await addNotifications(db_session, test_user, 5)
+    ids = [n.id for n in notifications]
+
+    response = await client.post("/notification/delete", json={"ids": ids[:2]})
+    assert response.status_code == 200
+    assert sorted(response.json()["ids"]) == ids[:2]
+
+    # A body without a selector must not wipe the inbox
+    for body in [{}, {"before": ""}]:
+        response = await client.post("/notification/delete", json=body)
+        assert response.status_code == 422
+
+    response = await client.post("/notification/delete", json={"all": True})
+    assert response.status_code == 200
+    assert sorted(response.json()["ids"]) == ids[2:]
+    page = (await client.get(NOTIFICATIONS_ROUTE)).json()
+    assert page == {"data": [], "next_cursor": None}
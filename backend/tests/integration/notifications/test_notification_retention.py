@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud.notifications_crud import getNotificationPartitions
+from app.db.models.user import Notification, User
+from app.tasks.notification_retention import maintainNotificationPartitions
+from app.utils.partitions import (
+    NOTIFICATION_DEFAULT_PARTITION,
+    addMonths,
+    monthStart,
+    notificationPartitionName,
+    notificationRetentionStart,
+)
+
+
+@pytest.mark.asyncio
+async def test_maintain_notification_partitions(
+    db_session: AsyncSession, test_user: User
+):
+    now = datetime.now(timezone.utc)
+    current = monthStart(now)
+    expired = notificationRetentionStart(now) - timedelta(days=1)
+    # Tables made by create_all only have the default partition
+    for title, sent in [("expired", expired), ("recent", now)]:
+        db_session.add(
+            Notification(
+                user_id=test_user.id, title=title, note="note", sent_datetime=sent
+            )
+        )
+    await db_session.commit()
+
+    stats = await maintainNotificationPartitions(db_session, now, months_ahead=2)
+
+    months = [current, addMonths(current, 1), addMonths(current, 2)]
+    assert stats.created == [notificationPartitionName(m) for m in months]
+    assert stats.dropped == [] and stats.expired == 1
+    partitions = await getNotificationPartitions(db_session)
+    assert set(partitions) == set(stats.created) | {NOTIFICATION_DEFAULT_PARTITION}
+
+    # The recent row was moved out of the default partition
+    titles = (await db_session.scalars(select(Notification.title))).all()
+    assert titles == ["recent"]
+    moved = await db_session.scalars(
+        text(f"SELECT title FROM {notificationPartitionName(current)}")
+    )
+    assert moved.all() == ["recent"]
+
+    stats = await maintainNotificationPartitions(db_session, now, months_ahead=2)
+    assert stats.created == [] and stats.expired == 0
@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud.report_crud import getReportByID
+from app.db.models.report import Report
+from app.db.models.user import Notification, User, UserAddress, UserSetting
+from app.dependencies.common import getSettings
+from app.tasks.background_notify_report import notifyReport
+from app.utils.geo import encodeGeohash
+
+
+@pytest.mark.asyncio
+async def test_notify_report_fan_out(
+    db_session: AsyncSession, test_report: Report, monkeypatch
+):
+    settings = getSettings()
+    monkeypatch.setattr(settings, "NOTIFY_FANOUT_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "LOCAL_NOTIFICATION_RADIUS", 5_000)
+    # test_report is at (48.123456, 17.654321)
+    users = {}
+    for name, is_active, local, latitude, longitude in [
+        ("neighbour", True, True, 48.13, 17.66),
+        ("second", True, True, 48.12, 17.65),
+        ("not_local", True, False, 48.12, 17.65),
+        ("inactive", False, True, 48.12, 17.65),
+        ("far_away", True, True, 49.0, 18.0),
+        ("not_geocoded", True, True, None, None),
+    ]:
+        user = User(
+            email=f"{name}@example.com",
+            first_name=name,
+            hashed_password="hashedpassword",
+            is_active=is_active,
+        )
+        db_session.add(user)
+        await db_session.flush()
+        db_session.add(
+            UserSetting(
+                user_id=user.id,
+                is_notification_allowed=True,
+                is_local_notification=local,
+            )
+        )
+        db_session.add(
+            UserAddress(
+                user_id=user.id,
+                city="Cityville",
+                latitude=latitude,
+                longitude=longitude,
+                geohash=(
+                    encodeGeohash(latitude, longitude) if latitude is not None else None
+                ),
+            )
+        )
+        users[name] = user.id
+    await db_session.commit()
+
+    report = await getReportByID(db_session, test_report.id, full=True)
+    await notifyReport(report, db_session)
+
+    notified = (
+        await db_session.scalars(
+            select(Notification.user_id).where(Notification.report_id == test_report.id)
+        )
+    ).all()
+    assert sorted(notified) == sorted([users["neighbour"], users["second"]])
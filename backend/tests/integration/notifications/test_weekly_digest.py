@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.job import DigestRun
+from app.db.models.report import Report, ReportAddress, ReportStatus
+from app.db.models.user import Notification, User, UserAddress, UserSetting
+from app.tasks.weekly_digest import digestPeriodStart, sendWeeklyDigests
+
+
+def test_digest_period_start():
+    wednesday = datetime(2025, 5, 28, 15, 30, tzinfo=timezone.utc)
+    monday = datetime(2025, 5, 26, tzinfo=timezone.utc)
+    assert digestPeriodStart(wednesday) == datetime(2025, 5, 19, tzinfo=timezone.utc)
+    assert digestPeriodStart(monday) == datetime(2025, 5, 19, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_send_weekly_digests(db_session: AsyncSession, test_user: User):
+    period_start = datetime(2025, 5, 19, tzinfo=timezone.utc)
+    users = {}
+    for name, weekly, latitude in [
+        ("skipped_before", True, 48.1),  # already done by an interrupted pass
+        ("reader", True, 48.1),
+        ("second", True, 48.1),
+        ("not_weekly", False, 48.1),
+        ("far_away", True, 49.5),
+    ]:
+        user = User(
+            email=f"{name}@example.com",
+            first_name=name,
+            hashed_password="hashedpassword",
+        )
+        db_session.add(user)
+        await db_session.flush()
+        db_session.add(
+            UserSetting(
+                user_id=user.id,
+                is_notification_allowed=True,
+                is_weekly_notification=weekly,
+            )
+        )
+        db_session.add(UserAddress(user_id=user.id, latitude=latitude, longitude=17.1))
+        users[name] = user.id
+
+    reports = {}
+    for name, published, score in [
+        ("top", period_start + timedelta(days=2), 10),
+        ("other", period_start + timedelta(days=6), 1),
+        ("last_week", period_start - timedelta(days=1), 50),
+        ("next_week", period_start + timedelta(days=7), 50),
+    ]:
+        report = Report(
+            user_id=test_user.id,
+            note=name,
+            status=ReportStatus.published,
+            published_datetime=published,
+            feed_score=score,
+        )
+        db_session.add(report)
+        await db_session.flush()
+        db_session.add(
+            ReportAddress(report_id=report.id, latitude=48.11, longitude=17.1)
+        )
+        reports[name] = report.id
+    db_session.add(
+        DigestRun(
+            period_start=period_start,
+            last_user_id=users["skipped_before"],
+            digests=1,
+        )
+    )
+    await db_session.commit()
+
+    stats = await sendWeeklyDigests(
+        db_session, period_start, radius=5_000, batch_size=1
+    )
+    assert stats.digests == 2
+
+    digests = (
+        await db_session.execute(
+            select(Notification.user_id, Notification.report_id, Notification.note)
+        )
+    ).all()
+    assert sorted((d.user_id, d.report_id) for d in digests) == [
+        (users["reader"], reports["top"]),
+        (users["second"], reports["top"]),
+    ]
+    assert all(d.note.endswith(": 2") for d in digests)
+
+    run = await db_session.get(DigestRun, period_start, populate_existing=True)
+    assert run.finished_datetime is not None
+    assert run.digests == 3
+
+    stats = await sendWeeklyDigests(
+        db_session, period_start, radius=5_000, batch_size=1
+    )
+    assert stats.already_finished
+    assert stats.digests == 0
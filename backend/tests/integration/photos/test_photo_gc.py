@@ -0,0 +1,106 @@
+import os
+import time
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.report import Report, ReportPhoto
+from app.dependencies.common import getSettings
+from app.tasks import photo_gc
+from app.tasks.photo_gc import collectPhotoGarbage
+from app.utils.blob_storage import INCOMING_DIR, LocalBlobStorage
+from app.utils.photo_store import blobName, releasePhoto
+
+
+def writeFile(path, content: bytes, age: int = 0):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.mark.asyncio
+async def test_collect_photo_garbage(
+    db_session: AsyncSession, test_report: Report, tmp_path
+):
+    day = 24 * 60 * 60
+    db_session.add(
+        ReportPhoto(report_id=test_report.id, filename_path="aa/bb/kept.jpg")
+    )
+    await db_session.commit()
+
+    writeFile(tmp_path / "aa/bb/kept.jpg", b"kept", age=day)
+    writeFile(tmp_path / "aa/bb/kept.jpg.thumbnail.jpg", b"thumb", age=day)
+    writeFile(tmp_path / "aa/bb/orphan.jpg", b"orphan", age=day)
+    writeFile(tmp_path / "aa/bb/orphan.jpg.medium.jpg", b"medium", age=day)
+    writeFile(tmp_path / "cc/dd/fresh.jpg", b"fresh")  # within the grace period
+    writeFile(tmp_path / "legacy-uuid.jpg", b"legacy", age=day)
+    writeFile(tmp_path / INCOMING_DIR / "interrupted", b"partial", age=day)
+
+    storage = LocalBlobStorage(tmp_path)
+    stats = await collectPhotoGarbage(
+        db_session, storage, batch_size=2, grace_seconds=60, dry_run=True
+    )
+    assert stats.deleted == 4
+    assert (tmp_path / "aa/bb/orphan.jpg").exists()
+
+    stats = await collectPhotoGarbage(
+        db_session, storage, batch_size=2, grace_seconds=60
+    )
+    assert stats.scanned == 7
+    assert stats.deleted == 4
+    assert stats.bytes_reclaimed == len(b"orphan" + b"medium" + b"legacy" + b"partial")
+    remaining = sorted(
+        p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("*") if p.is_file()
+    )
+    assert remaining == [
+        "aa/bb/kept.jpg",
+        "aa/bb/kept.jpg.thumbnail.jpg",
+        "cc/dd/fresh.jpg",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_collect_photo_garbage_rechecks_mtime(
+    db_session: AsyncSession, tmp_path, monkeypatch
+):
+    writeFile(tmp_path / "aa/bb/reused.jpg", b"reused", age=24 * 60 * 60)
+    storage = LocalBlobStorage(tmp_path)
+    getReferencedPhotos = photo_gc.getReferencedPhotos
+
+    async def uploadDuringQuery(db, names):
+        # a dedup upload touches the blob, its reference is committed later
+        referenced = await getReferencedPhotos(db, names)
+        await storage.touch("aa/bb/reused.jpg")
+        return referenced
+
+    monkeypatch.setattr(photo_gc, "getReferencedPhotos", uploadDuringQuery)
+    stats = await collectPhotoGarbage(
+        db_session, storage, batch_size=10, grace_seconds=60
+    )
+    assert stats.deleted == 0
+    assert (tmp_path / "aa/bb/reused.jpg").exists()
+
+
+@pytest.mark.asyncio
+async def test_release_photo(
+    db_session: AsyncSession, test_report: Report, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(getSettings(), "PHOTO_DELETE_GRACE_SECONDS", 60)
+    storage = LocalBlobStorage(tmp_path)
+    shared = blobName("a" * 64, ".jpg")
+    orphan = blobName("b" * 64, ".jpg")
+    fresh = blobName("c" * 64, ".jpg")
+    writeFile(tmp_path / shared, b"shared", age=3600)
+    writeFile(tmp_path / orphan, b"orphan", age=3600)
+    writeFile(tmp_path / f"{orphan}.thumbnail.jpg", b"thumb", age=3600)
+    writeFile(tmp_path / fresh, b"fresh")
+    db_session.add(ReportPhoto(report_id=test_report.id, filename_path=shared))
+    await db_session.commit()
+
+    assert not await releasePhoto(db_session, storage, shared)
+    assert await releasePhoto(db_session, storage, orphan)
+    assert not await releasePhoto(db_session, storage, fresh)  # grace period
+    assert not (tmp_path / orphan).exists()
+    assert not (tmp_path / f"{orphan}.thumbnail.jpg").exists()
+    assert (tmp_path / shared).exists() and (tmp_path / fresh).exists()
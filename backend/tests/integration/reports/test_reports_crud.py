@@ -5,12 +5,21 @@ import json
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.user import User
-from app.db.models.report import Report, ReportAddress, ReportPhoto
+from app.db.models.report import Report, ReportAddress, ReportPhoto, ReportStatus
+from app.db.crud.report_crud import createReportPhoto
+from app.db.models.job import AssessmentJob, JobStatus
+from app.db.models.vote import Vote
+from sqlalchemy import select
+from app.db.schemas.report_schema import ReportPhotoCreate
 from app.dependencies.common import getSettings
+from app.utils.geo import encodeGeohash
+from app.utils.map_clusters import cache as clusterCache
 
 REPORT_CREATE_URL = "/report/create"
 REPORT_ROUTE = "/report/{report_id}"
 REPORT_PHOTO_ROUTE = "/report/photo/{photo_id}"
+REPORT_FEED_ROUTE = "/report/feed"
+REPORT_CLUSTERS_ROUTE = "/report/map/clusters"
 
 
 @pytest.mark.asyncio
@@ -123,6 +132,37 @@ async def test_create_report_with_empty_photos(client: AsyncClient, test_user: U
     assert response.status_code == 422
 
 
+@pytest.mark.asyncio
+async def test_create_report_enqueues_assessment(
+    client: AsyncClient,
+    test_user: User,
+    db_session: AsyncSession,
+    tmp_path,
+    monkeypatch,
+):
+    monkeypatch.setattr(getSettings(), "REPORT_PHOTOS", tmp_path)
+    report_create_data = {
+        "user_id": test_user.id,
+        "note": "Broken lamp",
+        "address": {"latitude": 48.123456, "longitude": 17.654321},
+    }
+    response = await client.post(
+        REPORT_CREATE_URL,
+        data={"reportcreatestr": json.dumps(report_create_data)},
+        files={"photos": ("test.jpg", b"fake image content", "image/jpeg")},
+    )
+    assert response.status_code == 200
+    report_id = response.json()["id"]
+
+    jobs = (
+        await db_session.scalars(
+            select(AssessmentJob).where(AssessmentJob.report_id == report_id)
+        )
+    ).all()
+    assert len(jobs) == 1
+    assert jobs[0].status == JobStatus.pending
+
+
 @pytest.mark.asyncio
 async def test_get_report_success(
     client: AsyncClient, db_session: AsyncSession, test_user: User
@@ -337,6 +377,93 @@ async def test_get_report_photo_success(client: AsyncClient, test_user, db_sessi
     assert response.headers["content-type"].startswith("image/")
 
 
+@pytest.mark.asyncio
+async def test_get_report_photo_rendition_fallback(
+    client: AsyncClient, test_user, db_session, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(getSettings(), "REPORT_PHOTOS", tmp_path)
+    (tmp_path / "photo.jpg").write_bytes(b"original")
+    (tmp_path / "photo.jpg.thumbnail.jpg").write_bytes(b"thumbnail")
+    (tmp_path / "other.jpg").write_bytes(b"no renditions")
+
+    report = Report(user_id=test_user.id, note="Sample report")
+    db_session.add(report)
+    await db_session.flush()
+    photo = ReportPhoto(report_id=report.id, filename_path="photo.jpg")
+    other = ReportPhoto(report_id=report.id, filename_path="other.jpg")
+    db_session.add_all([photo, other])
+    await db_session.commit()
+
+    route = REPORT_PHOTO_ROUTE.format(photo_id=photo.id)
+    response = await client.get(route, params={"size": "thumbnail"})
+    assert response.content == b"thumbnail"
+    response = await client.get(route)
+    assert response.content == b"original"
+
+    route = REPORT_PHOTO_ROUTE.format(photo_id=other.id)
+    response = await client.get(route, params={"size": "medium"})
+    assert response.status_code == 200
+    assert response.content == b"no renditions"
+
+
+@pytest.mark.asyncio
+async def test_get_report_photo_conditional(
+    client: AsyncClient, test_user, db_session, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(getSettings(), "REPORT_PHOTOS", tmp_path)
+    (tmp_path / "photo.jpg").write_bytes(b"original")
+
+    report = Report(user_id=test_user.id, note="Sample report")
+    db_session.add(report)
+    await db_session.flush()
+    photo = ReportPhoto(report_id=report.id, filename_path="photo.jpg")
+    db_session.add(photo)
+    await db_session.commit()
+
+    route = REPORT_PHOTO_ROUTE.format(photo_id=photo.id)
+    response = await client.get(route)
+    assert response.status_code == 200
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+
+    response = await client.get(route, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = await client.get(route, headers={"Range": "bytes=0-3"})
+    assert response.status_code == 206
+    assert response.content == b"orig"
+
+
+@pytest.mark.asyncio
+async def test_get_report_photo_signed_url(
+    client: AsyncClient, test_user, db_session, tmp_path, monkeypatch
+):
+    monkeypatch.setattr(getSettings(), "REPORT_PHOTOS", tmp_path)
+    (tmp_path / "photo.jpg").write_bytes(b"original")
+
+    report = Report(user_id=test_user.id, note="Sample report")
+    db_session.add(report)
+    await db_session.flush()
+    db_session.add(
+        ReportAddress(report_id=report.id, latitude=48.1486, longitude=17.1077)
+    )
+    db_session.add(ReportPhoto(report_id=report.id, filename_path="photo.jpg"))
+    await db_session.commit()
+
+    response = await client.get(REPORT_ROUTE.format(report_id=report.id))
+    url = response.json()["photos"][0]["url"]
+    assert "filename_path" not in response.json()["photos"][0]
+
+    response = await client.get(url)
+    assert response.status_code == 200
+    assert response.content == b"original"
+
+    response = await client.get(url.replace("signature=", "signature=0"))
+    assert response.status_code == 403
+    response = await client.get(url.replace("photo.jpg", "other.jpg"))
+    assert response.status_code == 403
+
+
 @pytest.mark.asyncio
 async def test_get_report_photo_not_found(client: AsyncClient):
     response = await client.get(REPORT_PHOTO_ROUTE.format(photo_id=999999))
@@ -358,3 +485,188 @@ async def test_get_report_photo_file_missing(
 
     response = await client.get(REPORT_PHOTO_ROUTE.format(photo_id=photo.id))
     assert response.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_get_feed_paginated(client: AsyncClient, test_user, db_session):
+    report_ids = []
+    for score in (1, 5, 3):
+        report = Report(
+            user_id=test_user.id,
+            note=f"Report with score {score}",
+            status=ReportStatus.published,
+            feed_score=score,
+        )
+        db_session.add(report)
+        await db_session.flush()
+        db_session.add(
+            ReportAddress(report_id=report.id, latitude=48.1, longitude=17.1)
+        )
+        db_session.add(
+            ReportPhoto(report_id=report.id, filename_path="x.jpg", ai_score=score)
+        )
+        report_ids.append(report.id)
+    await db_session.commit()
+
+    response = await client.get(REPORT_FEED_ROUTE, params={"limit": 2})
+    assert response.status_code == 200
+    first_page = response.json()
+    assert [r["id"] for r in first_page["data"]] == [report_ids[1], report_ids[2]]
+    assert first_page["next_cursor"] is not None
+
+    response = await client.get(
+        REPORT_FEED_ROUTE,
+        params={"limit": 2, "cursor": first_page["next_cursor"]},
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert [r["id"] for r in second_page["data"]] == [report_ids[0]]
+    assert second_page["next_cursor"] is None
+
+
+@pytest.mark.asyncio
+async def test_get_feed_invalid_cursor(client: AsyncClient, test_user):
+    response = await client.get(REPORT_FEED_ROUTE, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_get_feed_viewer_vote(client: AsyncClient, test_user, db_session):
+    reports = [
+        Report(user_id=test_user.id, note=note, status=ReportStatus.published)
+        for note in ("Upvoted", "Downvoted", "Not voted")
+    ]
+    db_session.add_all(reports)
+    await db_session.flush()
+    for report in reports:
+        db_session.add(
+            ReportAddress(report_id=report.id, latitude=48.1, longitude=17.1)
+        )
+    db_session.add_all(
+        [
+            Vote(user_id=test_user.id, report_id=reports[0].id, is_positive=True),
+            Vote(user_id=test_user.id, report_id=reports[1].id, is_positive=False),
+        ]
+    )
+    await db_session.commit()
+
+    response = await client.get(REPORT_FEED_ROUTE)
+    assert response.status_code == 200
+    votes = {r["note"]: r["viewer_vote"] for r in response.json()["data"]}
+    assert votes == {"Upvoted": True, "Downvoted": False, "Not voted": None}
+
+    response = await client.get(REPORT_ROUTE.format(report_id=reports[1].id))
+    assert response.status_code == 200
+    assert response.json()["viewer_vote"] is False
+
+
+@pytest.mark.asyncio
+async def test_create_report_photo_updates_feed_score(
+    test_report: Report, db_session: AsyncSession
+):
+    for score in (2, 3):
+        await createReportPhoto(
+            db_session,
+            ReportPhotoCreate(
+                report_id=test_report.id, filename_path="x.jpg", ai_score=score
+            ),
+            nocommit=False,
+        )
+    await db_session.refresh(test_report)
+    assert test_report.feed_score == 5
+
+
+@pytest.mark.asyncio
+async def test_get_feed_near(client: AsyncClient, test_user, db_session):
+    locations = {
+        "old town": (48.1435, 17.1067),
+        "castle": (48.1423, 17.1000),  # ~500 m from the old town
+        "vienna": (48.2082, 16.3738),
+    }
+    report_ids = {}
+    for name, (lat, lon) in locations.items():
+        report = Report(user_id=test_user.id, note=name, status=ReportStatus.published)
+        db_session.add(report)
+        await db_session.flush()
+        db_session.add(
+            ReportAddress(
+                report_id=report.id,
+                latitude=lat,
+                longitude=lon,
+                geohash=encodeGeohash(lat, lon),
+            )
+        )
+        report_ids[name] = report.id
+    await db_session.commit()
+
+    response = await client.get(
+        REPORT_FEED_ROUTE, params={"lat": 48.1435, "lon": 17.1067, "radius": 1000}
+    )
+    assert response.status_code == 200
+    ids = {r["id"] for r in response.json()["data"]}
+    assert ids == {report_ids["old town"], report_ids["castle"]}
+
+    response = await client.get(
+        REPORT_FEED_ROUTE, params={"lat": 48.1435, "lon": 17.1067, "radius": 100}
+    )
+    assert {r["id"] for r in response.json()["data"]} == {report_ids["old town"]}
+
+
+@pytest.mark.asyncio
+async def test_get_feed_near_incomplete(client: AsyncClient, test_user):
+    response = await client.get(REPORT_FEED_ROUTE, params={"lat": 48.1, "lon": 17.1})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_map_clusters(client: AsyncClient, test_user, db_session):
+    clusterCache.clear()  # tables are recreated per test, the cache is not
+    report_ids = []
+    for lat, lon in ((48.1435, 17.1067), (48.1423, 17.1000)):
+        report = Report(user_id=test_user.id, note="x", status=ReportStatus.published)
+        db_session.add(report)
+        await db_session.flush()
+        db_session.add(
+            ReportAddress(
+                report_id=report.id,
+                latitude=lat,
+                longitude=lon,
+                geohash=encodeGeohash(lat, lon),
+            )
+        )
+        report_ids.append(report.id)
+    await db_session.commit()
+
+    params = {
+        "zoom": 10,
+        "min_lat": 48.0,
+        "min_lon": 17.0,
+        "max_lat": 48.3,
+        "max_lon": 17.3,
+    }
+    response = await client.get(REPORT_CLUSTERS_ROUTE, params=params)
+    assert response.status_code == 200
+    clusters = response.json()["data"]
+    assert len(clusters) == 1
+    assert clusters[0]["count"] == 2
+    assert clusters[0]["status"] == "published"
+
+    # Deleting a report invalidates its cached cell
+    response = await client.delete(REPORT_ROUTE.format(report_id=report_ids[0]))
+    assert response.status_code == 200
+    response = await client.get(REPORT_CLUSTERS_ROUTE, params=params)
+    assert response.json()["data"][0]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_get_map_clusters_viewport_too_large(client: AsyncClient, test_user):
+    params = {
+        "zoom": 18,
+        "min_lat": 48.0,
+        "min_lon": 17.0,
+        "max_lat": 49.0,
+        "max_lon": 18.0,
+    }
+    response = await client.get(REPORT_CLUSTERS_ROUTE, params=params)
+    assert response.status_code == 400
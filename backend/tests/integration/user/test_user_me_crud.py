@@ -5,6 +5,8 @@ from app.db.models.user import User
 from pathlib import Path
 from app.dependencies.common import getSettings
 from app.utils.passwords import verifyPassword
+from app.utils.blob_storage import INCOMING_DIR
+from app.utils.photo_store import isBlobName
 
 ME_URL = "/user/me"
 
@@ -58,6 +60,18 @@ async def test_get_me_photo_success(
     assert b"fake image content" in response.content
 
 
+@pytest.mark.asyncio
+async def test_get_me_photo_not_modified(
+    client: AsyncClient, test_user: User, override_user_photos
+):
+    response = await client.get(ME_URL + "/photo")
+    assert response.headers["cache-control"] == "private, no-cache"
+    etag = response.headers["etag"]
+
+    response = await client.get(ME_URL + "/photo", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
 @pytest.mark.asyncio
 async def test_get_me_photo_no_picture(
     client: AsyncClient, db_session: AsyncSession, test_user: User
@@ -81,27 +95,70 @@ async def test_get_me_photo_file_missing(
 
 
 @pytest.mark.asyncio
-async def test_put_me_photo_success(client: AsyncClient, override_user_photos):
+async def test_put_me_photo_success(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    test_user: User,
+    override_user_photos,
+):
     file_content = b"fake image"
     files = {"photo": ("test.jpg", file_content, "image/jpeg")}
     response = await client.put(ME_URL + "/photo", files=files)
     assert response.status_code == 200
-    uploaded_file = list(getSettings().USER_PHOTOS.iterdir())[0]
+    await db_session.refresh(test_user)
+    assert isBlobName(test_user.picture_path)
+    uploaded_file = getSettings().USER_PHOTOS / test_user.picture_path
     assert uploaded_file.read_bytes() == file_content
 
 
+@pytest.mark.asyncio
+async def test_put_me_photo_deduplicated(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    test_user: User,
+    admin_user: User,
+    override_user_photos,
+):
+    files = {"photo": ("test.jpg", b"fake image", "image/jpeg")}
+    await client.put(ME_URL + "/photo", files=files)
+    await db_session.refresh(test_user)
+
+    admin_user.picture_path = test_user.picture_path
+    await db_session.commit()
+    # Still referenced by admin_user, the blob stays
+    response = await client.delete(ME_URL + "/photo")
+    assert response.status_code == 200
+    assert (getSettings().USER_PHOTOS / admin_user.picture_path).exists()
+
+
 @pytest.mark.asyncio
 async def test_put_me_photo_invalid_extension_not_checked(
-    client: AsyncClient, override_user_photos
+    client: AsyncClient,
+    db_session: AsyncSession,
+    test_user: User,
+    override_user_photos,
 ):
     file_content = b"not an image"
     files = {"photo": ("test.txt", file_content, "text/plain")}
     response = await client.put(ME_URL + "/photo", files=files)
     assert response.status_code == 200
-    uploaded_file = list(getSettings().USER_PHOTOS.iterdir())[0]
+    await db_session.refresh(test_user)
+    uploaded_file = getSettings().USER_PHOTOS / test_user.picture_path
     assert uploaded_file.suffix == ".txt"
 
 
+@pytest.mark.asyncio
+async def test_put_me_photo_too_large(
+    client: AsyncClient, override_user_photos, monkeypatch
+):
+    monkeypatch.setattr(getSettings(), "MAX_UPLOAD_SIZE", 4)
+    files = {"photo": ("test.jpg", b"fake image", "image/jpeg")}
+    response = await client.put(ME_URL + "/photo", files=files)
+    assert response.status_code == 413
+    assert list((getSettings().USER_PHOTOS / INCOMING_DIR).glob("*")) == []
+    assert list(getSettings().USER_PHOTOS.glob("??/??/*")) == []
+
+
 @pytest.mark.asyncio
 async def test_delete_me_photo_success(
     client: AsyncClient, db_session: AsyncSession, test_user: User
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud.vision_crud import (
+    getVisionCacheStats,
+    pruneVisionAssessments,
+    saveVisionAssessments,
+)
+from app.utils import vision
+
+
+@pytest.mark.asyncio
+async def test_assess_photos_uses_cache(
+    db_session: AsyncSession, tmp_path, monkeypatch
+):
+    calls = []
+
+    def fake_annotate(image_paths):
+        calls.append(list(image_paths))
+        return [(["pothole"], 2, False) for _ in image_paths]
+
+    monkeypatch.setattr(vision, "_annotate_paths", fake_annotate)
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"same pothole")
+    copy = tmp_path / "b.jpg"
+    copy.write_bytes(b"same pothole")
+
+    first = await vision.assess_photos([str(photo), str(copy)], db=db_session)
+    await db_session.commit()
+    second = await vision.assess_photos([str(copy)], db=db_session)
+
+    assert first == [(["pothole"], 2, False)] * 2
+    assert second == [(["pothole"], 2, False)]
+    assert calls == [[str(photo)]]  # duplicates and re-uploads hit the cache
+    [stats] = await getVisionCacheStats(db_session)
+    assert (stats.hits, stats.misses) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_prune_vision_assessments(db_session: AsyncSession):
+    await saveVisionAssessments(
+        db_session,
+        [
+            {
+                "sha256": f"{i:064x}",
+                "backend": "stub",
+                "labels": [],
+                "score": 0,
+                "is_inappropriate": False,
+            }
+            for i in range(3)
+        ],
+    )
+    await db_session.commit()
+
+    assert await pruneVisionAssessments(db_session, 60, max_entries=2) == 1
+    assert await pruneVisionAssessments(db_session, 60, max_entries=2) == 0
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.crud.vote_crud import applyVoteCounterDeltas, createVote
+from app.db.models.report import Report
+from app.db.models.user import User
+from app.db.models.vote import Vote
+from app.db.schemas.vote_schema import VoteCreate
+from app.utils.vote_buffer import VoteCounterBuffer
+from app.tasks.vote_reconcile import reconcileVoteCounters
+
+
+@pytest.mark.asyncio
+async def test_reconcile_vote_counters(
+    db_session: AsyncSession, test_user: User, test_report: Report
+):
+    other_user = User(
+        email="other@example.com",
+        first_name="Other",
+        hashed_password="hashedpassword",
+        is_admin=False,
+    )
+    untouched = Report(user_id=test_user.id, note="No votes")
+    db_session.add_all([other_user, untouched])
+    await db_session.flush()
+    db_session.add_all(
+        [
+            Vote(user_id=test_user.id, report_id=test_report.id, is_positive=True),
+            Vote(user_id=other_user.id, report_id=test_report.id, is_positive=False),
+        ]
+    )
+    test_report.votes_pos = 5  # drifted, the votes were added behind its back
+    await db_session.commit()
+
+    stats = await reconcileVoteCounters(db_session, batch_size=1, dry_run=True)
+    assert stats.checked == 2
+    assert stats.corrected == 1
+
+    stats = await reconcileVoteCounters(db_session, batch_size=1)
+    assert stats.checked == 2
+    assert stats.corrected == 1
+    await db_session.refresh(test_report)
+    assert (test_report.votes_pos, test_report.votes_neg) == (1, 1)
+
+    stats = await reconcileVoteCounters(db_session, batch_size=1)
+    assert stats.corrected == 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_vote_counters_buffered(
+    db_session: AsyncSession, test_user: User, test_report: Report
+):
+    counters = VoteCounterBuffer()
+    await createVote(
+        db_session,
+        VoteCreate(user_id=test_user.id, report_id=test_report.id, is_positive=True),
+        counters=counters,
+    )
+
+    async def flusher():
+        # an API process flushing its buffer while reconcile waits
+        await asyncio.sleep(0.2)
+        async with AsyncSession(db_session.bind) as db:
+            await applyVoteCounterDeltas(db, counters.drain())
+            await db.commit()
+
+    stats, _ = await asyncio.gather(
+        reconcileVoteCounters(db_session, batch_size=10, settle_seconds=1.0),
+        flusher(),
+    )
+    assert stats.corrected == 0
+    await applyVoteCounterDeltas(db_session, counters.drain())  # nothing left
+    await db_session.commit()
+    await db_session.refresh(test_report)
+    assert (test_report.votes_pos, test_report.votes_neg) == (1, 0)
+
+    # A delta lost with its process does not move, that one is corrected
+    other_user = User(
+        email="other@example.com",
+        first_name="Other",
+        hashed_password="hashedpassword",
+        is_admin=False,
+    )
+    db_session.add(other_user)
+    await db_session.commit()
+    await createVote(
+        db_session,
+        VoteCreate(user_id=other_user.id, report_id=test_report.id, is_positive=False),
+        counters=VoteCounterBuffer(),
+    )
+    stats = await reconcileVoteCounters(db_session, batch_size=10, settle_seconds=0)
+    assert stats.corrected == 1
+    await db_session.refresh(test_report)
+    assert (test_report.votes_pos, test_report.votes_neg) == (1, 1)
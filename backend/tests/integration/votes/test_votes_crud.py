@@ -5,6 +5,10 @@ import asyncpg
 from app.db.models.vote import Vote
 from app.db.schemas.vote_schema import VoteCreate, VoteRead
 from app.db.models.user import User
+from app.db.models.report import Report
+from app.db.crud.vote_crud import applyVoteCounterDeltas
+from app.dependencies.common import getSettings
+from app.utils.vote_buffer import buffer as vote_buffer
 
 VOTE_CREATE_ROUTE = "/vote/create"
 VOTE_ROUTE = "/vote"
@@ -239,3 +243,61 @@ async def test_delete_vote_admin(client: AsyncClient, admin_user, test_vote):
     )
 
     assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_vote_counters(client: AsyncClient, test_user, test_report, db_session):
+    async def counters():
+        db_session.expire_all()
+        report = await db_session.get(Report, test_report.id)
+        return report.votes_pos, report.votes_neg
+
+    vote_data = {
+        "user_id": test_user.id,
+        "report_id": test_report.id,
+        "is_positive": False,
+    }
+    response = await client.post(VOTE_CREATE_ROUTE, json=vote_data)
+    assert response.status_code == 200
+    assert await counters() == (0, 1)
+
+    response = await client.patch(VOTE_ROUTE, json={**vote_data, "is_positive": True})
+    assert response.status_code == 200
+    assert await counters() == (1, 0)
+
+    # same value again leaves the counters alone
+    response = await client.patch(VOTE_ROUTE, json={**vote_data, "is_positive": True})
+    assert response.status_code == 200
+    assert await counters() == (1, 0)
+
+    response = await client.delete(
+        VOTE_ROUTE, params={"user_id": test_user.id, "report_id": test_report.id}
+    )
+    assert response.status_code == 200
+    assert await counters() == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_vote_counters_buffered(
+    client: AsyncClient, test_user, test_report, db_session, monkeypatch
+):
+    monkeypatch.setattr(getSettings(), "VOTE_COUNTER_MODE", "buffered")
+    monkeypatch.setattr(vote_buffer, "_deltas", {})
+    vote_data = {
+        "user_id": test_user.id,
+        "report_id": test_report.id,
+        "is_positive": True,
+    }
+    response = await client.post(VOTE_CREATE_ROUTE, json=vote_data)
+    assert response.status_code == 200
+    response = await client.patch(VOTE_ROUTE, json={**vote_data, "is_positive": False})
+    assert response.status_code == 200
+
+    db_session.expire_all()
+    report = await db_session.get(Report, test_report.id)
+    assert (report.votes_pos, report.votes_neg) == (0, 0)  # not flushed yet
+
+    await applyVoteCounterDeltas(db_session, vote_buffer.drain())
+    await db_session.commit()
+    await db_session.refresh(report)
+    assert (report.votes_pos, report.votes_neg) == (0, 1)
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import time
+
+from app.utils.blob_storage import (
+    INCOMING_DIR,
+    BlobInfo,
+    BlobStorage,
+    LocalBlobStorage,
+)
+
+
+class MemoryStorage(BlobStorage):
+    """Remote-like storage, exercises the generic (non-local) code paths"""
+
+    def __init__(self, incoming):
+        self.incoming = incoming
+        self.blobs = {}  # name -> (content, mtime)
+
+    @property
+    def location(self):
+        return f"memory:{id(self.blobs)}"
+
+    async def stat(self, name):
+        if name not in self.blobs:
+            return None
+        content, mtime = self.blobs[name]
+        return BlobInfo(name=name, size=len(content), mtime=mtime)
+
+    async def put(self, name, source):
+        self.blobs[name] = (source.read_bytes(), time.time())
+        source.unlink()
+
+    async def touch(self, name):
+        self.blobs[name] = (self.blobs[name][0], time.time())
+
+    async def delete(self, name):
+        self.blobs.pop(name, None)
+
+    async def read(self, name, start=0, end=None):
+        content = self.blobs[name][0]
+        yield content[start : None if end is None else end + 1]
+
+    async def list(self):
+        for name in list(self.blobs):
+            yield await self.stat(name)
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+def test_local_storage(tmp_path):
+    storage = LocalBlobStorage(tmp_path, chunk_size=4)
+    source = tmp_path / "source"
+    source.write_bytes(b"0123456789")
+
+    async def scenario():
+        assert await storage.stat("ab/cd/blob.jpg") is None
+        await storage.put("ab/cd/blob.jpg", source)
+        assert not source.exists()
+        info = await storage.stat("ab/cd/blob.jpg")
+        assert info.size == 10
+
+        assert await collect(storage.read("ab/cd/blob.jpg")) == b"0123456789"
+        assert await collect(storage.read("ab/cd/blob.jpg", 2, 6)) == b"23456"
+        assert await collect(storage.read("ab/cd/blob.jpg", 7)) == b"789"
+
+        (tmp_path / INCOMING_DIR).mkdir()
+        (tmp_path / INCOMING_DIR / "partial").write_bytes(b"x")
+        assert [blob.name async for blob in storage.list()] == ["ab/cd/blob.jpg"]
+
+        path = tmp_path / "ab/cd/blob.jpg"
+        os.utime(path, (0, 0))
+        await storage.touch("ab/cd/blob.jpg")
+        assert time.time() - path.stat().st_mtime < 60
+
+        await storage.delete("ab/cd/blob.jpg")
+        await storage.delete("ab/cd/blob.jpg")  # missing blobs are fine
+        assert await storage.stat("ab/cd/blob.jpg") is None
+
+    asyncio.run(scenario())
+
+
+def test_local_copy_of_remote_blob(tmp_path):
+    storage = MemoryStorage(tmp_path / "incoming")
+    source = tmp_path / "source"
+    source.write_bytes(b"remote")
+
+    async def scenario():
+        await storage.put("blob.jpg", source)
+        async with storage.localCopy("blob.jpg") as path:
+            assert path.parent == storage.incoming
+            assert path.read_bytes() == b"remote"
+        assert not path.exists()
+
+    asyncio.run(scenario())
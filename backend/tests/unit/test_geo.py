@@ -0,0 +1,32 @@
+from app.utils.geo import (
+    bboxAroundPoint,
+    coveringGeohashes,
+    encodeGeohash,
+    haversineDistance,
+)
+
+
+def test_encode_geohash_known_value():
+    # Reference value from the original geohash.org implementation
+    assert encodeGeohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_haversine_distance():
+    # Bratislava -> Vienna is roughly 55 km
+    distance = haversineDistance(48.1486, 17.1077, 48.2082, 16.3738)
+    assert 54_000 < distance < 56_000
+
+
+def test_covering_geohashes_contain_points_inside_bbox():
+    bbox = bboxAroundPoint(48.1486, 17.1077, 1_000)
+    cells = coveringGeohashes(*bbox)
+    assert 0 < len(cells) <= 16
+    min_lat, min_lon, max_lat, max_lon = bbox
+    for lat in (min_lat, (min_lat + max_lat) / 2, max_lat):
+        for lon in (min_lon, (min_lon + max_lon) / 2, max_lon):
+            geohash = encodeGeohash(lat, lon)
+            assert any(geohash.startswith(cell) for cell in cells)
+
+
+def test_covering_geohashes_whole_world():
+    assert coveringGeohashes(-90, -180, 90, 180) == []
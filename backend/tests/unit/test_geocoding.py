@@ -0,0 +1,26 @@
+import asyncio
+import time
+
+from app.utils.geocoding import Geocoder, ThrottledGeocoder
+
+
+class RecordingGeocoder(Geocoder):
+    def __init__(self):
+        self.calls = []
+
+    async def geocode(self, query):
+        self.calls.append(time.monotonic())
+        return None
+
+
+def test_throttled_geocoder_spaces_concurrent_requests():
+    recording = RecordingGeocoder()
+    geocoder = ThrottledGeocoder(recording, 0.05)
+
+    async def run():
+        await asyncio.gather(*(geocoder.geocode(f"q{i}") for i in range(3)))
+
+    asyncio.run(run())
+    gaps = [b - a for a, b in zip(recording.calls, recording.calls[1:])]
+    assert len(recording.calls) == 3
+    assert all(gap >= 0.045 for gap in gaps)
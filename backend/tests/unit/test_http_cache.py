@@ -0,0 +1,98 @@
+import asyncio
+from email.utils import formatdate
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.utils.blob_storage import LocalBlobStorage
+from app.utils.http_cache import (
+    IMMUTABLE,
+    RangeNotSatisfiable,
+    blobResponse,
+    parseRange,
+)
+from tests.unit.test_blob_storage import MemoryStorage
+
+
+def makeStorage(storage_class, tmp_path):
+    if storage_class is LocalBlobStorage:
+        return LocalBlobStorage(tmp_path)
+    storage = MemoryStorage(tmp_path / "incoming")
+    copy = tmp_path / "copy"
+    copy.write_bytes((tmp_path / "photo.jpg").read_bytes())
+    asyncio.run(storage.put("photo.jpg", copy))
+    return storage
+
+
+def makeClient(storage, name="photo.jpg"):
+    app = FastAPI()
+
+    @app.get("/photo")
+    async def photo(request: Request):
+        return blobResponse(request, storage, await storage.stat(name))
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("storage_class", [LocalBlobStorage, MemoryStorage])
+def test_validators_and_not_modified(tmp_path, storage_class):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"0123456789")
+    client = makeClient(makeStorage(storage_class, tmp_path))
+
+    response = client.get("/photo")
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+    assert response.headers["etag"] == '"photo.jpg"'
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["content-type"] == "image/jpeg"
+    assert "last-modified" in response.headers
+
+    response = client.get("/photo", headers={"If-None-Match": 'W/"x", "photo.jpg"'})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = client.get("/photo", headers={"If-None-Match": '"other.jpg"'})
+    assert response.status_code == 200
+
+    since = formatdate(path.stat().st_mtime + 60, usegmt=True)
+    response = client.get("/photo", headers={"If-Modified-Since": since})
+    assert response.status_code == 304
+
+    since = formatdate(path.stat().st_mtime - 60, usegmt=True)
+    response = client.get("/photo", headers={"If-Modified-Since": since})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("storage_class", [LocalBlobStorage, MemoryStorage])
+def test_range(tmp_path, storage_class):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(b"0123456789")
+    client = makeClient(makeStorage(storage_class, tmp_path))
+
+    response = client.get("/photo", headers={"Range": "bytes=2-5"})
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert response.headers["content-range"] == "bytes 2-5/10"
+
+    response = client.get(
+        "/photo", headers={"Range": "bytes=2-5", "If-Range": '"other.jpg"'}
+    )
+    assert response.status_code == 200
+    assert response.content == b"0123456789"
+
+    response = client.get("/photo", headers={"Range": "bytes=20-"})
+    assert response.status_code == 416
+
+
+def test_parse_range():
+    assert parseRange("bytes=0-0", 10) == (0, 0)
+    assert parseRange("bytes=4-", 10) == (4, 9)
+    assert parseRange("bytes=-3", 10) == (7, 9)
+    assert parseRange("bytes=5-100", 10) == (5, 9)
+    assert parseRange("bytes=0-1,4-5", 10) is None  # whole blob instead
+    assert parseRange("items=0-1", 10) is None
+    assert parseRange("bytes=a-b", 10) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parseRange("bytes=10-", 10)
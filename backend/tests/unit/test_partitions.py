@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta, timezone
+
+from app.dependencies.common import getSettings
+from app.utils.partitions import (
+    addMonths,
+    monthStart,
+    notificationPartitionMonth,
+    notificationPartitionName,
+    notificationRetentionStart,
+)
+
+
+def test_months():
+    may = datetime(2025, 5, 1, tzinfo=timezone.utc)
+    # 00:30 in UTC+2 is still April in UTC
+    late_april = datetime(2025, 5, 1, 0, 30, tzinfo=timezone(timedelta(hours=2)))
+    assert monthStart(late_april) == datetime(2025, 4, 1, tzinfo=timezone.utc)
+    assert monthStart(datetime(2025, 5, 31, 23, 59, tzinfo=timezone.utc)) == may
+    assert addMonths(may, 8) == datetime(2026, 1, 1, tzinfo=timezone.utc)
+    assert addMonths(may, -5) == datetime(2024, 12, 1, tzinfo=timezone.utc)
+
+
+def test_partition_names():
+    may = datetime(2025, 5, 1, tzinfo=timezone.utc)
+    assert notificationPartitionName(may) == "notifications_p2025_05"
+    assert notificationPartitionMonth("notifications_p2025_05") == may
+    assert notificationPartitionMonth("notifications_default") is None
+    assert notificationPartitionMonth("notifications_pold") is None
+
+
+def test_retention_start(monkeypatch):
+    settings = getSettings()
+    now = datetime(2025, 5, 29, 9, 41, tzinfo=timezone.utc)
+    monkeypatch.setattr(settings, "NOTIFICATION_RETENTION_MONTHS", 12)
+    assert notificationRetentionStart(now) == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    monkeypatch.setattr(settings, "NOTIFICATION_RETENTION_MONTHS", 0)
+    assert notificationRetentionStart(now) is None
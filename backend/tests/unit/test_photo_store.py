@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import io
+
+from fastapi import UploadFile
+from PIL import Image
+
+from app.utils.blob_storage import LocalBlobStorage
+from app.utils.photo_store import (
+    blobName,
+    isBlobName,
+    storeExistingFile,
+    storePhoto,
+)
+from app.utils.renditions import RENDITION_SIZES, renditionFilename
+
+
+def test_blob_name():
+    sha256 = hashlib.sha256(b"photo").hexdigest()
+    name = blobName(sha256, ".JPG")
+    assert name == f"{sha256[:2]}/{sha256[2:4]}/{sha256}.jpg"
+    assert isBlobName(name)
+    assert not isBlobName("6f1c2b9e-4d0a-4a57-9a3e-0d6b2f1e8c11.jpg")
+
+
+def test_store_photo_deduplicates(tmp_path):
+    storage = LocalBlobStorage(tmp_path)
+
+    async def store(content: bytes):
+        upload = UploadFile(io.BytesIO(content), filename="photo.jpg")
+        return await storePhoto(upload, storage)
+
+    first = asyncio.run(store(b"same content"))
+    second = asyncio.run(store(b"same content"))
+    other = asyncio.run(store(b"other content"))
+
+    assert first.is_new and not second.is_new and other.is_new
+    assert first.name == second.name != other.name
+    assert (tmp_path / first.name).read_bytes() == b"same content"
+    assert not any(storage.incoming.iterdir())
+
+
+def test_store_photo_adds_missing_renditions(tmp_path):
+    storage = LocalBlobStorage(tmp_path)
+    image = io.BytesIO()
+    Image.new("RGB", (3000, 2000), "red").save(image, "PNG")
+
+    async def store(renditions: bool):
+        upload = UploadFile(io.BytesIO(image.getvalue()), filename="photo.png")
+        return await storePhoto(upload, storage, renditions=renditions)
+
+    first = asyncio.run(store(renditions=False))
+    assert not (tmp_path / renditionFilename(first.name, "thumbnail")).exists()
+    second = asyncio.run(store(renditions=True))
+
+    assert not second.is_new and second.name == first.name
+    for size in RENDITION_SIZES:
+        assert (tmp_path / renditionFilename(first.name, size)).is_file()
+    assert not any(storage.incoming.iterdir())
+
+
+def test_store_existing_file(tmp_path):
+    storage = LocalBlobStorage(tmp_path)
+    (tmp_path / "legacy.jpg").write_bytes(b"legacy")
+    (tmp_path / "legacy.jpg.thumbnail.jpg").write_bytes(b"thumbnail")
+
+    name = asyncio.run(storeExistingFile(tmp_path, "legacy.jpg", storage))
+
+    assert name == blobName(hashlib.sha256(b"legacy").hexdigest(), ".jpg")
+    assert (tmp_path / name).read_bytes() == b"legacy"
+    assert (tmp_path / f"{name}.thumbnail.jpg").read_bytes() == b"thumbnail"
+    assert (tmp_path / "legacy.jpg").exists()  # removed after the DB commit
+    assert asyncio.run(storeExistingFile(tmp_path, "missing.jpg", storage)) is None
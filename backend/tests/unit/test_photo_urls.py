@@ -0,0 +1,28 @@
+from urllib.parse import parse_qs, urlsplit
+
+from app.dependencies.common import getSettings
+from app.utils.photo_urls import photoUrlExpiry, signPhotoUrl, verifyPhotoSignature
+
+
+def test_signed_url_roundtrip():
+    url = signPhotoUrl("abc.jpg", now=1_000_000)
+    parts = urlsplit(url)
+    query = {key: value[0] for key, value in parse_qs(parts.query).items()}
+    expires = int(query["expires"])
+
+    assert parts.path == "/report/photo/signed/abc.jpg"
+    assert verifyPhotoSignature("abc.jpg", expires, query["signature"], now=1_000_000)
+    assert not verifyPhotoSignature("abd.jpg", expires, query["signature"])
+    assert not verifyPhotoSignature(
+        "abc.jpg", expires + 1, query["signature"], now=1_000_000
+    )
+    assert not verifyPhotoSignature(
+        "abc.jpg", expires, query["signature"], now=expires + 1
+    )
+
+
+def test_expiry_is_stable_within_window():
+    ttl = getSettings().PHOTO_URL_EXPIRE_SECONDS
+    start = 10 * ttl
+    assert photoUrlExpiry(start) == photoUrlExpiry(start + ttl - 1)
+    assert ttl < photoUrlExpiry(start + ttl - 1) - (start + ttl - 1) <= 2 * ttl
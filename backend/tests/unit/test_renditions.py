@@ -0,0 +1,31 @@
+from PIL import Image
+
+from app.utils.renditions import (
+    RENDITION_SIZES,
+    _renderRenditions,
+    renditionFilename,
+    renditionOwner,
+)
+
+
+def test_rendition_filename():
+    assert renditionFilename("ab/abc.png", "thumbnail") == "ab/abc.png.thumbnail.jpg"
+    assert renditionFilename("abc.png", "original") == "abc.png"
+    assert renditionOwner("ab/abc.png.thumbnail.jpg") == "ab/abc.png"
+    assert renditionOwner("ab/abc.png") == "ab/abc.png"
+
+
+def test_render_renditions(tmp_path):
+    source = tmp_path / "photo.png"
+    Image.new("RGB", (3000, 2000), "red").save(source)
+
+    created = _renderRenditions(str(source))
+
+    assert created == {
+        "thumbnail": str(tmp_path / "photo.png.thumbnail.jpg"),
+        "medium": str(tmp_path / "photo.png.medium.jpg"),
+    }
+    with Image.open(tmp_path / "photo.png.thumbnail.jpg") as thumbnail:
+        assert max(thumbnail.size) == RENDITION_SIZES["thumbnail"]
+    with Image.open(tmp_path / "photo.png.medium.jpg") as medium:
+        assert medium.size == (1024, 683)
@@ -0,0 +1,20 @@
+import hashlib
+import io
+
+import pytest
+
+from app.utils.uploads import UploadTooLarge, _copyUpload
+
+
+def test_copy_upload_hashes_content(tmp_path):
+    content = b"x" * 10_000
+    stored = _copyUpload(io.BytesIO(content), tmp_path / "photo.jpg", 20_000, 1024)
+    assert stored.size == len(content)
+    assert stored.sha256 == hashlib.sha256(content).hexdigest()
+    assert (tmp_path / "photo.jpg").read_bytes() == content
+
+
+def test_copy_upload_too_large_removes_file(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        _copyUpload(io.BytesIO(b"x" * 10_000), tmp_path / "photo.jpg", 5_000, 1024)
+    assert not (tmp_path / "photo.jpg").exists()
@@ -0,0 +1,16 @@
+from app.utils.vision_backends import StubVisionBackend
+
+
+def test_stub_backend_is_deterministic(tmp_path):
+    first = tmp_path / "a.jpg"
+    first.write_bytes(b"pothole photo")
+    same = tmp_path / "b.jpg"
+    same.write_bytes(b"pothole photo")
+    other = tmp_path / "c.jpg"
+    other.write_bytes(b"graffiti photo")
+
+    backend = StubVisionBackend()
+    results = backend.annotate([str(first), str(same), str(other)])
+    assert results[0] == results[1]
+    assert all(labels and not is_inappropriate for labels, is_inappropriate in results)
+    assert backend.annotate([str(other)]) == [results[2]]
@@ -0,0 +1,42 @@
+import pytest
+
+from app.dependencies.common import getSettings
+from app.tasks.vote_flusher import flushVoteCounters
+from app.utils.vote_buffer import VoteCounterBuffer, buffer, getVoteBuffer
+
+
+def test_deltas_are_coalesced():
+    counters = VoteCounterBuffer()
+    counters.add(1, 1, 0)
+    counters.add(1, 1, 0)
+    counters.add(2, 1, 0)
+    counters.add(2, -1, 0)  # vote and unvote cancel out
+    counters.add(3, -1, 1)
+
+    assert counters.drain() == {1: (2, 0), 3: (-1, 1)}
+    assert len(counters) == 0
+
+    counters.add(1, 0, 1)
+    counters.restore({1: (2, 0)})
+    assert counters.drain() == {1: (2, 1)}
+
+
+def test_buffer_follows_mode(monkeypatch):
+    settings = getSettings()
+    monkeypatch.setattr(settings, "VOTE_COUNTER_MODE", "immediate")
+    assert getVoteBuffer() is None
+    monkeypatch.setattr(settings, "VOTE_COUNTER_MODE", "buffered")
+    assert getVoteBuffer() is buffer
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_deltas(monkeypatch):
+    async def failing(db, deltas):
+        raise ConnectionError("db is down")
+
+    monkeypatch.setattr("app.tasks.vote_flusher.applyVoteCounterDeltas", failing)
+    counters = VoteCounterBuffer()
+    counters.add(7, 1, 0)
+
+    assert await flushVoteCounters(counters) == 0
+    assert counters.drain() == {7: (1, 0)}